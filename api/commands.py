@@ -20,7 +20,7 @@ from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Dataset, DatasetCollectionBinding, DatasetKeywordTable, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -532,6 +532,60 @@ def add_qdrant_doc_id_index(field: str):
     click.echo(click.style(f"Index creation complete. Created {create_count} collection indexes.", fg="green"))
 
 
+@click.command("migrate-keyword-index", help="Convert dataset keyword tables into the inverted keyword index storage.")
+def migrate_keyword_index():
+    """
+    Load the postings of every legacy dataset keyword table into `dataset_keyword_indexes`.
+    The legacy tables are kept, so switching KEYWORD_STORE back to jieba is still possible.
+    """
+    from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+    click.echo(click.style("Starting keyword index migration.", fg="green"))
+    migrated_count = 0
+    skipped_count = 0
+    postings_count = 0
+    page = 1
+    while True:
+        try:
+            keyword_tables = (
+                DatasetKeywordTable.query.order_by(DatasetKeywordTable.id).paginate(page=page, per_page=50).items
+            )
+        except NotFound:
+            break
+        if not keyword_tables:
+            break
+
+        page += 1
+        for dataset_keyword_table in keyword_tables:
+            try:
+                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_keyword_table.dataset_id).first()
+                keyword_table_dict = dataset_keyword_table.keyword_table_dict
+                if not dataset or not keyword_table_dict:
+                    skipped_count += 1
+                    continue
+
+                keyword_table = keyword_table_dict["__data__"]["table"]
+                postings_count += JiebaInvertedIndex(dataset).import_keyword_table(keyword_table)
+                migrated_count += 1
+                click.echo(f"Migrated keyword table of dataset {dataset.id}.")
+            except Exception as e:
+                db.session.rollback()
+                click.echo(
+                    click.style(
+                        f"Failed to migrate keyword table of dataset {dataset_keyword_table.dataset_id}: {str(e)}",
+                        fg="red",
+                    )
+                )
+
+    click.echo(
+        click.style(
+            f"Keyword index migration complete. Migrated {migrated_count} datasets with {postings_count} postings."
+            f" Skipped {skipped_count} datasets.",
+            fg="green",
+        )
+    )
+
+
 @click.command("create-tenant", help="Create account and tenant.")
 @click.option("--email", prompt=True, help="Tenant account email.")
 @click.option("--name", prompt=True, help="Workspace name.")
@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -61,6 +62,45 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of concurrent active requests per app (0 for unlimited)",
         default=0,
     )
+    APP_MAX_REQUESTS_PER_MINUTE: NonNegativeInt = Field(
+        description="Maximum number of requests per minute per app (0 for unlimited)",
+        default=0,
+    )
+    APP_MAX_REQUESTS_PER_MINUTE_PER_END_USER: NonNegativeInt = Field(
+        description="Maximum number of requests per minute per end user of an app (0 for unlimited)",
+        default=0,
+    )
+    APP_MAX_REQUESTS_PER_MINUTE_PER_API_KEY: NonNegativeInt = Field(
+        description="Maximum number of requests per minute per API key of an app (0 for unlimited)",
+        default=0,
+    )
+    APP_STOP_FLAG_CHECK_INTERVAL: NonNegativeFloat = Field(
+        description="Interval in seconds between checks of the stop flag of a running app task (0 to check on every"
+        " queue message)",
+        default=0.5,
+    )
+    APP_GENERATE_EXECUTOR: Literal["api", "celery"] = Field(
+        description="Where streaming chatflow and workflow generations run, 'api' runs them in a thread of the api"
+        " process, 'celery' runs them on the celery `generation` queue and relays their responses through Redis"
+        " Streams",
+        default="api",
+    )
+    APP_GENERATE_STREAM_TTL: PositiveInt = Field(
+        description="Time in seconds the responses of a generation run on celery are kept for clients to resume from",
+        default=600,
+    )
+
+
+class AppStatisticConfig(BaseSettings):
+    """
+    Configuration for the rollups of app statistics
+    """
+
+    APP_STATISTIC_ROLLUP_REFRESH_DAYS: NonNegativeInt = Field(
+        description="Number of past days rolled up again by the scheduled task once a day is over, to pick up"
+        " feedbacks and messages of past conversations arriving later",
+        default=7,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -93,6 +133,34 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=10.0,
     )
 
+    CODE_EXECUTION_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections to the code execution service per process,"
+        " further requests wait for a connection",
+        default=100,
+    )
+
+    CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle connections to the code execution service kept alive per process",
+        default=20,
+    )
+
+    CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY: NonNegativeFloat = Field(
+        description="Seconds an idle connection to the code execution service is kept alive",
+        default=5.0,
+    )
+
+    CODE_EXECUTION_BATCH_SIZE: NonNegativeInt = Field(
+        description="Maximum number of inputs a code is executed with in one request when sequential iterations"
+        " continuing on errors run a code node over many items, 0 or 1 executes each input in its own request",
+        default=16,
+    )
+
+    CODE_EXECUTION_BATCH_MAX_DURATION: PositiveFloat = Field(
+        description="Seconds after which a request executing a code with several inputs starts no more executions,"
+        " the inputs left are executed in later requests, keep it well below the timeout of the sandbox",
+        default=1.0,
+    )
+
     CODE_MAX_NUMBER: PositiveInt = Field(
         description="Maximum allowed numeric value in code execution",
         default=9223372036854775807,
@@ -133,6 +201,37 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=1000,
     )
 
+    JINJA2_IN_PROCESS_RENDER_ENABLED: bool = Field(
+        description="Render jinja2 templates in process with a sandboxed environment,"
+        " templates exceeding its limits are still rendered by the code execution service",
+        default=False,
+    )
+
+    JINJA2_RENDER_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds a jinja2 template may take to render in process",
+        default=1.0,
+    )
+
+    JINJA2_RENDER_MAX_OUTPUT_SIZE: PositiveInt = Field(
+        description="Maximum number of characters a jinja2 template may output in process",
+        default=1000000,
+    )
+
+    JINJA2_RENDER_MAX_LOOP_ITERATIONS: PositiveInt = Field(
+        description="Maximum number of items all the for loops of a jinja2 template rendered in process may iterate",
+        default=100000,
+    )
+
+    JINJA2_RENDER_MAX_CALL_DEPTH: PositiveInt = Field(
+        description="Maximum depth of nested calls, such as recursive macros, of a jinja2 template rendered in process",
+        default=64,
+    )
+
+    JINJA2_TEMPLATE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled jinja2 templates cached in memory per process, 0 to disable",
+        default=512,
+    )
+
 
 class PluginConfig(BaseSettings):
     """
@@ -171,6 +270,48 @@ class PluginConfig(BaseSettings):
         default=15728640 * 12,
     )
 
+    PLUGIN_DAEMON_POOL_MAXSIZE: PositiveInt = Field(
+        description="Maximum number of keep-alive connections to the plugin daemon kept per process",
+        default=64,
+    )
+
+    PLUGIN_DAEMON_CONNECT_TIMEOUT: PositiveFloat = Field(
+        description="Connection timeout in seconds for plugin daemon requests",
+        default=10.0,
+    )
+
+    PLUGIN_DAEMON_READ_TIMEOUT: PositiveFloat = Field(
+        description="Read timeout in seconds for plugin daemon requests, between bytes of streamed responses",
+        default=600.0,
+    )
+
+    PLUGIN_DAEMON_MANAGEMENT_READ_TIMEOUT: PositiveFloat = Field(
+        description="Read timeout in seconds for plugin daemon management requests, which do not run a plugin",
+        default=60.0,
+    )
+
+    PLUGIN_DAEMON_MAX_RETRIES: NonNegativeInt = Field(
+        description="Maximum number of retries of plugin daemon requests that failed to connect",
+        default=3,
+    )
+
+    PLUGIN_MODEL_CACHE_TTL: NonNegativeInt = Field(
+        description="Seconds that model provider lists and model schemas of plugins are cached in Redis per tenant,"
+        " 0 to disable",
+        default=300,
+    )
+
+    PLUGIN_MODEL_CACHE_LOCAL_TTL: NonNegativeInt = Field(
+        description="Seconds that cached model provider lists and model schemas of plugins are also kept in process,"
+        " 0 to disable",
+        default=10,
+    )
+
+    PLUGIN_MODEL_CACHE_LOCAL_SIZE: PositiveInt = Field(
+        description="Maximum number of model provider lists and model schemas of plugins kept in process",
+        default=1024,
+    )
+
 
 class MarketplaceConfig(BaseSettings):
     """
@@ -447,6 +588,23 @@ class ModelLoadBalanceConfig(BaseSettings):
     )
 
 
+class TokenizerConfig(BaseSettings):
+    """
+    Configuration for counting tokens of prompts
+    """
+
+    LOCAL_TOKEN_COUNTING_ENABLED: bool = Field(
+        description="Count tokens of LLM prompts in process instead of with the model plugin,"
+        " models whose schema sets the tokenizer property to 'plugin' always count with the plugin",
+        default=True,
+    )
+
+    LOCAL_TOKENIZER_CACHE_SIZE: NonNegativeInt = Field(
+        description="Number of token counts of texts memoized in process, 0 to disable",
+        default=4096,
+    )
+
+
 class BillingConfig(BaseSettings):
     """
     Configuration for platform billing features
@@ -499,6 +657,11 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled workflow graphs cached in memory per process (0 to disable)",
+        default=256,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -510,6 +673,21 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         default=100,
     )
 
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer workflow node execution records in memory and write them to the database in batches",
+        default=False,
+    )
+
+    WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE: PositiveInt = Field(
+        description="Number of buffered node execution records that triggers a flush in write-behind mode",
+        default=50,
+    )
+
+    WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL: PositiveFloat = Field(
+        description="Maximum time in seconds buffered node execution records are kept before being flushed",
+        default=1.0,
+    )
+
 
 class AuthConfig(BaseSettings):
     """
@@ -573,6 +751,35 @@ class ModerationConfig(BaseSettings):
     )
 
 
+class OpsTraceConfig(BaseSettings):
+    """
+    Configuration for ops tracing export
+    """
+
+    OPS_TRACE_BATCH_INLINE_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum size in bytes of a compressed batch of traces sent inline in the broker message,"
+        " larger batches are saved to the storage as one object",
+        default=262144,
+    )
+
+    OPS_TRACE_INSTANCE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of trace instances of app tracing configs kept per process, 0 to disable",
+        default=128,
+    )
+
+
+class ProviderUsageConfig(BaseSettings):
+    """
+    Configuration for the provider usages buffered in Redis
+    """
+
+    PROVIDER_USAGE_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds between writes of the buffered quota used and last used time of providers"
+        " to the database",
+        default=30,
+    )
+
+
 class ToolConfig(BaseSettings):
     """
     Configuration for tool management
@@ -583,6 +790,12 @@ class ToolConfig(BaseSettings):
         default=3600,
     )
 
+    AGENT_MAX_PARALLEL_TOOL_CALLS: PositiveInt = Field(
+        description="Maximum number of tool calls of one agent turn invoked concurrently,"
+        " agents can lower it with max_parallel_tool_calls of their agent mode, 1 invokes them one after another",
+        default=4,
+    )
+
 
 class MailConfig(BaseSettings):
     """
@@ -740,6 +953,27 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    EMBEDDING_CACHE_LRU_SIZE: NonNegativeInt = Field(
+        description="Number of document embeddings kept in the in-process cache in front of the database, 0 to disable",
+        default=0,
+    )
+
+    RETRIEVAL_SEGMENT_CACHE_TTL: NonNegativeInt = Field(
+        description="Seconds that retrieved segments are cached in Redis per dataset, 0 to disable",
+        default=60,
+    )
+
+    INDEXING_PIPELINE_BATCH_SIZE: NonNegativeInt = Field(
+        description="Number of chunks split, embedded and checkpointed together by the pipelined indexing runner,"
+        " 0 to index each document in one pass",
+        default=0,
+    )
+
+    INDEXING_PIPELINE_QUEUE_SIZE: PositiveInt = Field(
+        description="Maximum number of split batches waiting to be embedded by the pipelined indexing runner",
+        default=4,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -848,6 +1082,7 @@ class AccountConfig(BaseSettings):
 class FeatureConfig(
     # place the configs in alphabet order
     AppExecutionConfig,
+    AppStatisticConfig,
     AuthConfig,  # Changed from OAuthConfig to AuthConfig
     BillingConfig,
     CodeExecutionSandboxConfig,
@@ -865,9 +1100,12 @@ class FeatureConfig(
     ModelLoadBalanceConfig,
     ModerationConfig,
     MultiModalTransferConfig,
+    OpsTraceConfig,
     PositionConfig,
+    ProviderUsageConfig,
     RagEtlConfig,
     SecurityConfig,
+    TokenizerConfig,
     ToolConfig,
     UpdateConfig,
     WorkflowConfig,
@@ -22,6 +22,7 @@ from .vdb.baidu_vector_config import BaiduVectorDBConfig
 from .vdb.chroma_config import ChromaConfig
 from .vdb.couchbase_config import CouchbaseConfig
 from .vdb.elasticsearch_config import ElasticsearchConfig
+from .vdb.embedded_vector_config import EmbeddedVectorConfig
 from .vdb.lindorm_config import LindormConfig
 from .vdb.milvus_config import MilvusConfig
 from .vdb.myscale_config import MyScaleConfig
@@ -80,11 +81,22 @@ class VectorStoreConfig(BaseSettings):
         default=False,
     )
 
+    VECTOR_STORE_POOL_SIZE: PositiveInt = Field(
+        description="Maximum number of connections of each shared vector store client per process.",
+        default=10,
+    )
+
+    VECTOR_STORE_POOL_IDLE_CHECK_INTERVAL: NonNegativeInt = Field(
+        description="Seconds a pooled vector store connection may stay idle before it is health-checked on reuse.",
+        default=30,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
         description="Method for keyword extraction and storage."
-        " Default is 'jieba', a Chinese text segmentation library.",
+        " Default is 'jieba', a Chinese text segmentation library."
+        " 'jieba_inverted_index' stores the keywords as an inverted index in the database.",
         default="jieba",
     )
 
@@ -281,5 +293,6 @@ class MiddlewareConfig(
     LindormConfig,
     OceanBaseVectorConfig,
     BaiduVectorDBConfig,
+    EmbeddedVectorConfig,
 ):
     pass
@@ -0,0 +1,24 @@
+from pydantic import Field, NonNegativeInt, PositiveInt
+from pydantic_settings import BaseSettings
+
+
+class EmbeddedVectorConfig(BaseSettings):
+    """
+    Configuration settings for the embedded in-process vector store
+    """
+
+    EMBEDDED_VECTOR_STORE_PATH: str = Field(
+        description="Local directory where the embedded vector store keeps its memory-mapped collections",
+        default="storage/embedded_vector",
+    )
+
+    EMBEDDED_VECTOR_IVF_THRESHOLD: NonNegativeInt = Field(
+        description="Minimum number of vectors for a collection to be searched through an IVF index"
+        " instead of exactly, 0 to always search exactly",
+        default=100000,
+    )
+
+    EMBEDDED_VECTOR_IVF_NPROBE: PositiveInt = Field(
+        description="Number of IVF lists searched per query, higher values trade latency for recall",
+        default=16,
+    )
@@ -1,10 +1,14 @@
-from flask_restful import Resource, marshal_with, reqparse  # type: ignore
+from flask_restful import Resource, marshal, reqparse  # type: ignore
 from flask_restful.inputs import int_range  # type: ignore
 
 from controllers.console import api
 from controllers.console.app.wraps import get_app_model
 from controllers.console.wraps import account_initialization_required, setup_required
-from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
+from fields.workflow_app_log_fields import (
+    workflow_app_log_infinite_scroll_pagination_fields,
+    workflow_app_log_pagination_fields,
+)
+from libs.helper import uuid_value
 from libs.login import login_required
 from models import App
 from models.model import AppMode
@@ -16,7 +20,6 @@ class WorkflowAppLogApi(Resource):
     @login_required
     @account_initialization_required
     @get_app_model(mode=[AppMode.WORKFLOW])
-    @marshal_with(workflow_app_log_pagination_fields)
     def get(self, app_model: App):
         """
         Get workflow app logs
@@ -26,15 +29,25 @@ class WorkflowAppLogApi(Resource):
         parser.add_argument("status", type=str, choices=["succeeded", "failed", "stopped"], location="args")
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        # logs after a log without counting them, empty for the first page
+        parser.add_argument("last_id", type=uuid_value, location="args")
         args = parser.parse_args()
 
-        # get paginate workflow app logs
         workflow_app_service = WorkflowAppService()
+        if args["last_id"] is not None:
+            workflow_app_log_infinite_scroll_pagination = workflow_app_service.get_infinite_scroll_workflow_app_logs(
+                app_model=app_model, args=args
+            )
+            return marshal(
+                workflow_app_log_infinite_scroll_pagination, workflow_app_log_infinite_scroll_pagination_fields
+            )
+
+        # get paginate workflow app logs
         workflow_app_log_pagination = workflow_app_service.get_paginate_workflow_app_logs(
             app_model=app_model, args=args
         )
 
-        return workflow_app_log_pagination
+        return marshal(workflow_app_log_pagination, workflow_app_log_pagination_fields)
 
 
 api.add_resource(WorkflowAppLogApi, "/apps/<uuid:app_id>/workflow-app-logs")
@@ -631,6 +631,7 @@ class DatasetRetrievalSettingApi(Resource):
                 | VectorType.VIKINGDB
                 | VectorType.UPSTASH
                 | VectorType.OCEANBASE
+                | VectorType.EMBEDDED
             ):
                 return {"retrieval_method": [RetrievalMethod.SEMANTIC_SEARCH.value]}
             case (
@@ -676,6 +677,7 @@ class DatasetRetrievalSettingMockApi(Resource):
                 | VectorType.VIKINGDB
                 | VectorType.UPSTASH
                 | VectorType.OCEANBASE
+                | VectorType.EMBEDDED
             ):
                 return {"retrieval_method": [RetrievalMethod.SEMANTIC_SEARCH.value]}
             case (
@@ -1,5 +1,6 @@
 import logging
 
+from flask import request
 from flask_restful import Resource, reqparse  # type: ignore
 from werkzeug.exceptions import InternalServerError, NotFound
 
@@ -151,7 +152,34 @@ class ChatStopApi(Resource):
         return {"result": "success"}, 200
 
 
+class GenerateStreamApi(Resource):
+    @validate_app_token(fetch_user_arg=FetchUserArg(fetch_from=WhereisUserArg.QUERY, required=True))
+    def get(self, app_model: App, end_user: EndUser):
+        """
+        Resume the streaming response of a chatflow or workflow generation after the last event received
+        """
+        app_mode = AppMode.value_of(app_model.mode)
+        if app_mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+            raise AppUnavailableError()
+
+        parser = reqparse.RequestParser()
+        parser.add_argument("last_event_id", type=str, location="args")
+        args = parser.parse_args()
+
+        last_event_id = request.headers.get("Last-Event-ID") or args["last_event_id"]
+        if not last_event_id:
+            raise ValueError("last_event_id is required")
+
+        try:
+            response = AppGenerateService.resume_stream(app_model=app_model, user=end_user, last_event_id=last_event_id)
+
+            return helper.compact_generate_response(response)
+        except services.errors.app.GenerateStreamNotFoundError:
+            raise NotFound("Stream Not Exists.")
+
+
 api.add_resource(CompletionApi, "/completion-messages")
 api.add_resource(CompletionStopApi, "/completion-messages/<string:task_id>/stop")
 api.add_resource(ChatApi, "/chat-messages")
 api.add_resource(ChatStopApi, "/chat-messages/<string:task_id>/stop")
+api.add_resource(GenerateStreamApi, "/generate-streams")
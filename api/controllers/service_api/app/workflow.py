@@ -1,6 +1,6 @@
 import logging
 
-from flask_restful import Resource, fields, marshal_with, reqparse  # type: ignore
+from flask_restful import Resource, fields, marshal, marshal_with, reqparse  # type: ignore
 from flask_restful.inputs import int_range  # type: ignore
 from werkzeug.exceptions import InternalServerError
 
@@ -22,7 +22,10 @@ from core.errors.error import (
 )
 from core.model_runtime.errors.invoke import InvokeError
 from extensions.ext_database import db
-from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
+from fields.workflow_app_log_fields import (
+    workflow_app_log_infinite_scroll_pagination_fields,
+    workflow_app_log_pagination_fields,
+)
 from libs import helper
 from models.model import App, AppMode, EndUser
 from models.workflow import WorkflowRun
@@ -117,7 +120,6 @@ class WorkflowTaskStopApi(Resource):
 
 class WorkflowAppLogApi(Resource):
     @validate_app_token
-    @marshal_with(workflow_app_log_pagination_fields)
     def get(self, app_model: App):
         """
         Get workflow app logs
@@ -127,15 +129,25 @@ class WorkflowAppLogApi(Resource):
         parser.add_argument("status", type=str, choices=["succeeded", "failed", "stopped"], location="args")
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        # logs after a log without counting them, empty for the first page
+        parser.add_argument("last_id", type=helper.uuid_value, location="args")
         args = parser.parse_args()
 
-        # get paginate workflow app logs
         workflow_app_service = WorkflowAppService()
+        if args["last_id"] is not None:
+            workflow_app_log_infinite_scroll_pagination = workflow_app_service.get_infinite_scroll_workflow_app_logs(
+                app_model=app_model, args=args
+            )
+            return marshal(
+                workflow_app_log_infinite_scroll_pagination, workflow_app_log_infinite_scroll_pagination_fields
+            )
+
+        # get paginate workflow app logs
         workflow_app_log_pagination = workflow_app_service.get_paginate_workflow_app_logs(
             app_model=app_model, args=args
         )
 
-        return workflow_app_log_pagination
+        return marshal(workflow_app_log_pagination, workflow_app_log_pagination_fields)
 
 
 api.add_resource(WorkflowRunApi, "/workflows/run")
@@ -4,7 +4,7 @@ from enum import Enum
 from functools import wraps
 from typing import Optional
 
-from flask import current_app, request
+from flask import current_app, g, request
 from flask_login import user_logged_in  # type: ignore
 from flask_restful import Resource  # type: ignore
 from pydantic import BaseModel
@@ -57,6 +57,8 @@ def validate_app_token(view: Optional[Callable] = None, *, fetch_user_arg: Optio
                 raise Forbidden("The workspace's status is archived.")
 
             kwargs["app_model"] = app_model
+            # requests of the app are also rate limited per API key
+            g.api_token_id = api_token.id
 
             if fetch_user_arg:
                 if fetch_user_arg.fetch_from == WhereisUserArg.QUERY:
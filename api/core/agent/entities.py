@@ -83,6 +83,7 @@ class AgentEntity(BaseModel):
     prompt: Optional[AgentPromptEntity] = None
     tools: Optional[list[AgentToolEntity]] = None
     max_iteration: int = 5
+    max_parallel_tool_calls: Optional[int] = None
 
 
 class AgentInvokeMessage(ToolInvokeMessage):
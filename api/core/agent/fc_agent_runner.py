@@ -1,9 +1,14 @@
+import concurrent.futures
+import contextvars
 import json
 import logging
 from collections.abc import Generator
 from copy import deepcopy
 from typing import Any, Optional, Union
 
+from flask import Flask, current_app
+
+from configs import dify_config
 from core.agent.base_agent_runner import BaseAgentRunner
 from core.app.apps.base_app_queue_manager import PublishFrom
 from core.app.entities.queue_entities import QueueAgentThoughtEvent, QueueMessageEndEvent, QueueMessageFileEvent
@@ -23,7 +28,9 @@ from core.model_runtime.entities import (
     UserPromptMessage,
 )
 from core.model_runtime.entities.message_entities import ImagePromptMessageContent
+from core.ops.ops_trace_manager import TraceQueueManager
 from core.prompt.agent_history_prompt_transform import AgentHistoryPromptTransform
+from core.tools.__base.tool import Tool
 from core.tools.entities.tool_entities import ToolInvokeMeta
 from core.tools.tool_engine import ToolEngine
 from models.model import Message
@@ -221,47 +228,19 @@ class FunctionCallAgentRunner(BaseAgentRunner):
 
             final_answer += response + "\n"
 
-            # call tools
+            # call tools, the results are handled in the order of the tool calls whatever order they finish in
             tool_responses = []
-            for tool_call_id, tool_call_name, tool_call_args in tool_calls:
-                tool_instance = tool_instances.get(tool_call_name)
-                if not tool_instance:
-                    tool_response = {
-                        "tool_call_id": tool_call_id,
-                        "tool_call_name": tool_call_name,
-                        "tool_response": f"there is not a tool named {tool_call_name}",
-                        "meta": ToolInvokeMeta.error_instance(f"there is not a tool named {tool_call_name}").to_dict(),
-                    }
-                else:
-                    # invoke tool
-                    tool_invoke_response, message_files, tool_invoke_meta = ToolEngine.agent_invoke(
-                        tool=tool_instance,
-                        tool_parameters=tool_call_args,
-                        user_id=self.user_id,
-                        tenant_id=self.tenant_id,
-                        message=self.message,
-                        invoke_from=self.application_generate_entity.invoke_from,
-                        agent_tool_callback=self.agent_callback,
-                        trace_manager=trace_manager,
-                        app_id=self.application_generate_entity.app_config.app_id,
-                        message_id=self.message.id,
-                        conversation_id=self.conversation.id,
+            for tool_call_id, tool_call_name, tool_response, message_files in self._invoke_tool_calls(
+                tool_calls, tool_instances, trace_manager
+            ):
+                # publish files
+                for message_file_id in message_files:
+                    # publish message file
+                    self.queue_manager.publish(
+                        QueueMessageFileEvent(message_file_id=message_file_id), PublishFrom.APPLICATION_MANAGER
                     )
-                    # publish files
-                    for message_file_id in message_files:
-                        # publish message file
-                        self.queue_manager.publish(
-                            QueueMessageFileEvent(message_file_id=message_file_id), PublishFrom.APPLICATION_MANAGER
-                        )
-                        # add message file ids
-                        message_file_ids.append(message_file_id)
-
-                    tool_response = {
-                        "tool_call_id": tool_call_id,
-                        "tool_call_name": tool_call_name,
-                        "tool_response": tool_invoke_response,
-                        "meta": tool_invoke_meta.to_dict(),
-                    }
+                    # add message file ids
+                    message_file_ids.append(message_file_id)
 
                 tool_responses.append(tool_response)
                 if tool_response["tool_response"] is not None:
@@ -314,6 +293,103 @@ class FunctionCallAgentRunner(BaseAgentRunner):
             PublishFrom.APPLICATION_MANAGER,
         )
 
+    def _invoke_tool_calls(
+        self,
+        tool_calls: list[tuple[str, str, dict[str, Any]]],
+        tool_instances: dict[str, Tool],
+        trace_manager: Optional[TraceQueueManager],
+    ) -> list[tuple[str, str, dict[str, Any], list[str]]]:
+        """
+        Invoke the tool calls of an assistant turn, concurrently if the agent allows parallel tool calls
+
+        :return: tool call id, tool call name, tool response and message file ids of each tool call, in order
+        """
+        max_workers = min(len(tool_calls), self._get_max_parallel_tool_calls())
+        if max_workers <= 1:
+            return [
+                (tool_call[0], tool_call[1], *self._invoke_tool_call(tool_instances, tool_call, trace_manager))
+                for tool_call in tool_calls
+            ]
+
+        flask_app = current_app._get_current_object()  # type: ignore
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self._invoke_tool_call_in_thread,
+                    flask_app=flask_app,
+                    context=contextvars.copy_context(),
+                    tool_instances=tool_instances,
+                    tool_call=tool_call,
+                    trace_manager=trace_manager,
+                )
+                for tool_call in tool_calls
+            ]
+            return [(tool_call[0], tool_call[1], *future.result()) for tool_call, future in zip(tool_calls, futures)]
+
+    def _get_max_parallel_tool_calls(self) -> int:
+        agent = self.app_config.agent
+        max_parallel_tool_calls = dify_config.AGENT_MAX_PARALLEL_TOOL_CALLS
+        if agent and agent.max_parallel_tool_calls:
+            max_parallel_tool_calls = min(agent.max_parallel_tool_calls, max_parallel_tool_calls)
+        return max_parallel_tool_calls
+
+    def _invoke_tool_call_in_thread(
+        self,
+        flask_app: Flask,
+        context: contextvars.Context,
+        tool_instances: dict[str, Tool],
+        tool_call: tuple[str, str, dict[str, Any]],
+        trace_manager: Optional[TraceQueueManager],
+    ) -> tuple[dict[str, Any], list[str]]:
+        for var, val in context.items():
+            var.set(val)
+        with flask_app.app_context():
+            return self._invoke_tool_call(tool_instances, tool_call, trace_manager)
+
+    def _invoke_tool_call(
+        self,
+        tool_instances: dict[str, Tool],
+        tool_call: tuple[str, str, dict[str, Any]],
+        trace_manager: Optional[TraceQueueManager],
+    ) -> tuple[dict[str, Any], list[str]]:
+        """
+        Invoke a tool call
+
+        :return: tool response and message file ids
+        """
+        tool_call_id, tool_call_name, tool_call_args = tool_call
+        tool_instance = tool_instances.get(tool_call_name)
+        if not tool_instance:
+            tool_response = {
+                "tool_call_id": tool_call_id,
+                "tool_call_name": tool_call_name,
+                "tool_response": f"there is not a tool named {tool_call_name}",
+                "meta": ToolInvokeMeta.error_instance(f"there is not a tool named {tool_call_name}").to_dict(),
+            }
+            return tool_response, []
+
+        # invoke tool
+        tool_invoke_response, message_files, tool_invoke_meta = ToolEngine.agent_invoke(
+            tool=tool_instance,
+            tool_parameters=tool_call_args,
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            message=self.message,
+            invoke_from=self.application_generate_entity.invoke_from,
+            agent_tool_callback=self.agent_callback,
+            trace_manager=trace_manager,
+            app_id=self.application_generate_entity.app_config.app_id,
+            message_id=self.message.id,
+            conversation_id=self.conversation.id,
+        )
+        tool_response = {
+            "tool_call_id": tool_call_id,
+            "tool_call_name": tool_call_name,
+            "tool_response": tool_invoke_response,
+            "meta": tool_invoke_meta.to_dict(),
+        }
+        return tool_response, message_files
+
     def check_tool_calls(self, llm_result_chunk: LLMResultChunk) -> bool:
         """
         Check if there is any tool call in llm result chunk
@@ -76,6 +76,7 @@ class AgentConfigManager:
                     prompt=agent_prompt_entity,
                     tools=agent_tools,
                     max_iteration=agent_dict.get("max_iteration", 5),
+                    max_parallel_tool_calls=agent_dict.get("max_parallel_tool_calls"),
                 )
 
         return None
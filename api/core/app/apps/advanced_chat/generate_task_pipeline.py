@@ -268,7 +268,9 @@ class AdvancedChatAppGenerateTaskPipeline:
         # init fake graph runtime state
         graph_runtime_state: Optional[GraphRuntimeState] = None
 
-        for queue_message in self._base_task_pipeline._queue_manager.listen():
+        for queue_message in self._workflow_cycle_manager.write_behind_listen(
+            self._base_task_pipeline._queue_manager.listen()
+        ):
             event = queue_message.event
 
             if isinstance(event, QueuePingEvent):
@@ -187,6 +187,14 @@ class AgentChatAppConfigManager(BaseAppConfigManager):
         ]:
             raise ValueError("strategy in agent_mode must be in the specified strategy list")
 
+        max_parallel_tool_calls = config["agent_mode"].get("max_parallel_tool_calls")
+        if max_parallel_tool_calls is not None and (
+            not isinstance(max_parallel_tool_calls, int)
+            or isinstance(max_parallel_tool_calls, bool)
+            or max_parallel_tool_calls < 1
+        ):
+            raise ValueError("max_parallel_tool_calls in agent_mode must be a positive integer")
+
         if not config["agent_mode"].get("tools"):
             config["agent_mode"]["tools"] = []
 
@@ -0,0 +1,119 @@
+import json
+import time
+import uuid
+from collections.abc import Generator, Mapping
+from typing import Any, Optional, Union
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+
+class AppGenerateStream:
+    """
+    Redis stream carrying the responses of a generation that runs outside the api process.
+
+    The worker publishes every response of the generation to the stream and the api process relays them to the
+    client as server-sent events. Each event id is `<stream id>:<entry id>`, so a client that lost its connection
+    can resume the stream from the last event id it received until the stream expires.
+    """
+
+    _END_FIELD = b"end"
+    _MESSAGE_FIELD = b"message"
+
+    def __init__(self, stream_id: str) -> None:
+        self.stream_id = stream_id
+        self._stream_key = f"generate_stream:{stream_id}"
+
+    @classmethod
+    def create(cls, app_id: str, user_id: str) -> "AppGenerateStream":
+        """
+        Create a stream owned by a user of an app
+        :param app_id: app id
+        :param user_id: user id
+        :return:
+        """
+        stream = cls(str(uuid.uuid4()))
+        redis_client.setex(
+            cls._generate_stream_belong_cache_key(stream.stream_id),
+            dify_config.APP_MAX_EXECUTION_TIME + dify_config.APP_GENERATE_STREAM_TTL,
+            f"{app_id}:{user_id}",
+        )
+        return stream
+
+    @classmethod
+    def get_by_event_id(cls, event_id: str, app_id: str, user_id: str) -> Optional[tuple["AppGenerateStream", str]]:
+        """
+        Get the stream of an event and the entry id of the event, if the stream is owned by the user
+        :param event_id: event id
+        :param app_id: app id
+        :param user_id: user id
+        :return:
+        """
+        stream_id, _, entry_id = event_id.partition(":")
+        result: Optional[Any] = redis_client.get(cls._generate_stream_belong_cache_key(stream_id))
+        if result is None or result.decode("utf-8") != f"{app_id}:{user_id}":
+            return None
+
+        return cls(stream_id), entry_id or "0-0"
+
+    def publish(self, message: Union[Mapping[str, Any], str]) -> None:
+        """
+        Publish a generate response to the stream
+        :param message: generate response
+        :return:
+        """
+        self._add({self._MESSAGE_FIELD: json.dumps(message)})
+
+    def end(self) -> None:
+        """
+        Mark the end of the stream
+        :return:
+        """
+        self._add({self._END_FIELD: b"1"})
+
+    def listen(self, last_entry_id: str = "0-0") -> Generator[tuple[str, Union[Mapping[str, Any], str]], None, None]:
+        """
+        Listen to the stream from the entry after `last_entry_id` until the stream ends
+        :param last_entry_id: id of the last entry received
+        :return: entry id and generate response
+        """
+        # wait for APP_MAX_EXECUTION_TIME seconds to stop listen
+        listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
+        start_time = time.time()
+        while time.time() - start_time < listen_timeout:
+            entries = redis_client.xread({self._stream_key: last_entry_id}, count=100, block=1000)
+            for _, messages in entries or []:
+                for entry_id, fields in messages:
+                    last_entry_id = entry_id.decode("utf-8")
+                    if self._END_FIELD in fields:
+                        return
+
+                    yield last_entry_id, json.loads(fields[self._MESSAGE_FIELD])
+
+    def to_event_stream(self, last_entry_id: str = "0-0") -> Generator[str, None, None]:
+        """
+        Convert the stream into server-sent events
+        :param last_entry_id: id of the last entry received
+        :return:
+        """
+        for entry_id, message in self.listen(last_entry_id):
+            event_id = f"{self.stream_id}:{entry_id}"
+            if isinstance(message, Mapping):
+                yield f"id: {event_id}\ndata: {json.dumps(message)}\n\n"
+            else:
+                yield f"id: {event_id}\nevent: {message}\n\n"
+
+    def _add(self, fields: Mapping[bytes, bytes | str]) -> None:
+        with redis_client.pipeline() as pipe:
+            pipe.xadd(self._stream_key, fields)
+            pipe.expire(self._stream_key, dify_config.APP_GENERATE_STREAM_TTL)
+            pipe.execute()
+
+    @classmethod
+    def _generate_stream_belong_cache_key(cls, stream_id: str) -> str:
+        """
+        Generate stream belong cache key
+        :param stream_id: stream id
+        :return:
+        """
+        return f"generate_stream_belong:{stream_id}"
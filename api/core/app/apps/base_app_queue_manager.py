@@ -1,9 +1,15 @@
 import queue
 import time
 from abc import abstractmethod
+from collections.abc import Mapping, Sequence
+from datetime import date
+from decimal import Decimal
 from enum import Enum
-from typing import Any, Optional
+from functools import cache
+from types import NoneType, UnionType
+from typing import Annotated, Any, Literal, Optional, Union, get_args, get_origin
 
+from pydantic import BaseModel
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
@@ -41,6 +47,8 @@ class AppQueueManager:
         q: queue.Queue[WorkflowQueueMessage | MessageQueueMessage | None] = queue.Queue()
 
         self._q = q
+        self._stopped = False
+        self._last_stop_check_time = 0.0
 
     def listen(self):
         """
@@ -96,7 +104,8 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        if _may_hold_sqlalchemy_models(type(event)):
+            self._check_for_sqlalchemy_models(event.model_dump())
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -129,14 +138,24 @@ class AppQueueManager:
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
+        The stop flag is read from redis at most once per APP_STOP_FLAG_CHECK_INTERVAL seconds
+        and a stopped task stays stopped.
         :return:
         """
+        if self._stopped:
+            return True
+
+        now = time.monotonic()
+        if now - self._last_stop_check_time < dify_config.APP_STOP_FLAG_CHECK_INTERVAL:
+            return False
+        self._last_stop_check_time = now
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
-            return True
+            self._stopped = True
 
-        return False
+        return self._stopped
 
     @classmethod
     def _generate_task_belong_cache_key(cls, task_id: str) -> str:
@@ -173,3 +192,37 @@ class AppQueueManager:
 
 class GenerateTaskStoppedError(Exception):
     pass
+
+
+_SCALAR_TYPES = (str, int, float, bool, bytes, Enum, date, Decimal, NoneType)
+
+
+@cache
+def _may_hold_sqlalchemy_models(model: type[BaseModel]) -> bool:
+    """
+    Check if the fields of a queue event class can hold arbitrary objects after `model_dump`
+    Events made of scalars and pydantic models only skip the runtime check of their dumped data.
+    :param model: queue event class
+    :return:
+    """
+    return any(_annotation_may_hold_objects(field.annotation, {model}) for field in model.model_fields.values())
+
+
+def _annotation_may_hold_objects(annotation: Any, seen: set[type]) -> bool:
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return False
+    if origin is Annotated:
+        return _annotation_may_hold_objects(get_args(annotation)[0], seen)
+    if origin in {Union, UnionType, list, set, frozenset, tuple, dict, Mapping, Sequence}:
+        return any(_annotation_may_hold_objects(arg, seen) for arg in get_args(annotation) if arg is not Ellipsis)
+    if not isinstance(annotation, type) or origin is not None:
+        return True
+    if issubclass(annotation, _SCALAR_TYPES):
+        return False
+    if issubclass(annotation, BaseModel):
+        if annotation in seen:
+            return False
+        seen.add(annotation)
+        return any(_annotation_may_hold_objects(field.annotation, seen) for field in annotation.model_fields.values())
+    return True
@@ -102,7 +102,7 @@ class WorkflowAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=workflow.graph_dict, graph_hash=workflow.unique_hash)
 
         # RUN WORKFLOW
         workflow_entry = WorkflowEntry(
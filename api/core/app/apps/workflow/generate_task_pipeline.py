@@ -236,7 +236,9 @@ class WorkflowAppGenerateTaskPipeline:
         """
         graph_runtime_state = None
 
-        for queue_message in self._base_task_pipeline._queue_manager.listen():
+        for queue_message in self._workflow_cycle_manager.write_behind_listen(
+            self._base_task_pipeline._queue_manager.listen()
+        ):
             event = queue_message.event
 
             if isinstance(event, QueuePingEvent):
@@ -1,23 +1,93 @@
 import logging
 import time
 import uuid
-from collections.abc import Generator, Mapping
+from collections.abc import Generator, Mapping, Sequence
 from datetime import timedelta
-from typing import Any, Optional, Union
+from typing import Any, NamedTuple, Optional, Union
 
+from redis.commands.core import Script
+
+from configs import dify_config
 from core.errors.error import AppInvokeQuotaExceededError
 from extensions.ext_redis import redis_client
 
 logger = logging.getLogger(__name__)
 
+# Admit a request in one round trip. The active requests of the client are a sorted set of request ids scored by the
+# time they entered, requests alive longer than the max alive time are trimmed before counting them. Each request rate
+# bucket is a hash of its tokens and the time they were refilled, refilled at its requests per minute up to as many
+# tokens. The request is added to the active requests and takes a token of every bucket only if it is admitted.
+#
+# KEYS[1]: active requests
+# KEYS[2..]: request rate buckets
+# ARGV[1]: max active requests, 0 to not track the request
+# ARGV[2]: request id
+# ARGV[3]: max alive time of a request in seconds
+# ARGV[4..]: requests per minute of each bucket
+# returns 0 if the request is admitted, -1 if there are too many active requests, or the number of the first bucket
+# without a token
+_ENTER_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local max_active_requests = tonumber(ARGV[1])
+
+if max_active_requests > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[3]))
+    if redis.call('ZCARD', KEYS[1]) >= max_active_requests then
+        return -1
+    end
+end
+
+local tokens = {}
+for i = 2, #KEYS do
+    local capacity = tonumber(ARGV[i + 2])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'refilled_at')
+    local bucket_tokens = tonumber(bucket[1])
+    local refilled_at = tonumber(bucket[2])
+    if bucket_tokens == nil or refilled_at == nil then
+        bucket_tokens = capacity
+    else
+        bucket_tokens = math.min(capacity, bucket_tokens + math.max(0, now - refilled_at) * capacity / 60)
+    end
+    if bucket_tokens < 1 then
+        return i - 1
+    end
+    tokens[i] = bucket_tokens - 1
+end
+
+for i = 2, #KEYS do
+    redis.call('HSET', KEYS[i], 'tokens', string.format('%.6f', tokens[i]), 'refilled_at', string.format('%.6f', now))
+    -- a bucket left alone for a minute is full, as if it did not exist
+    redis.call('EXPIRE', KEYS[i], 60)
+end
+
+if max_active_requests > 0 then
+    redis.call('ZADD', KEYS[1], string.format('%.6f', now), ARGV[2])
+    redis.call('EXPIRE', KEYS[1], 86400)
+end
+return 0
+"""
+
+
+class RequestRateBucket(NamedTuple):
+    """
+    Token bucket limiting the requests per minute of a scope, e.g. a client or an end user of a client
+    """
+
+    key: str
+    requests_per_minute: int
+
 
 class RateLimit:
+    # keys of the same client share a hash tag, so the enter script can use them all in a Redis cluster
     _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:max_active_requests"
-    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests"
+    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{{{}}}:active_request_set"
+    _REQUEST_RATE_BUCKET_KEY = "dify:rate_limit:{{{}}}:request_rate:{}"
     _UNLIMITED_REQUEST_ID = "unlimited_request_id"
     _REQUEST_MAX_ALIVE_TIME = 10 * 60  # 10 minutes
-    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # recalculate request_count from request_detail every 5 minutes
+    _MAX_ACTIVE_REQUESTS_FLUSH_INTERVAL = 5 * 60  # reload max_active_requests every 5 minutes
     _instance_dict: dict[str, "RateLimit"] = {}
+    _enter_script: Optional[Script] = None
 
     def __new__(cls: type["RateLimit"], client_id: str, max_active_requests: int):
         if client_id not in cls._instance_dict:
@@ -38,7 +108,7 @@ class RateLimit:
 
     def flush_cache(self, use_local_value=False):
         self.last_recalculate_time = time.time()
-        # flush max active requests
+        # flush max active requests, stale active requests are trimmed when entering
         if use_local_value or not redis_client.exists(self.max_active_requests_key):
             with redis_client.pipeline() as pipe:
                 pipe.set(self.max_active_requests_key, self.max_active_requests)
@@ -49,40 +119,74 @@ class RateLimit:
                 self.max_active_requests = int(redis_client.get(self.max_active_requests_key).decode("utf-8"))
                 redis_client.expire(self.max_active_requests_key, timedelta(days=1))
 
-        # flush max active requests (in-transit request list)
-        if not redis_client.exists(self.active_requests_key):
-            return
-        request_details = redis_client.hgetall(self.active_requests_key)
-        redis_client.expire(self.active_requests_key, timedelta(days=1))
-        timeout_requests = [
-            k
-            for k, v in request_details.items()
-            if time.time() - float(v.decode("utf-8")) > RateLimit._REQUEST_MAX_ALIVE_TIME
+    def get_request_rate_buckets(
+        self, end_user_id: Optional[str] = None, api_token_id: Optional[str] = None
+    ) -> list[RequestRateBucket]:
+        """
+        Get the request rate buckets of a request of the client, from the configured requests per minute
+        :param end_user_id: id of the end user sending the request
+        :param api_token_id: id of the API key the request is authorized with
+        :return:
+        """
+        scopes = [
+            ("client", dify_config.APP_MAX_REQUESTS_PER_MINUTE),
+            (f"end_user:{end_user_id}", dify_config.APP_MAX_REQUESTS_PER_MINUTE_PER_END_USER if end_user_id else 0),
+            (f"api_token:{api_token_id}", dify_config.APP_MAX_REQUESTS_PER_MINUTE_PER_API_KEY if api_token_id else 0),
+        ]
+        return [
+            RequestRateBucket(self._REQUEST_RATE_BUCKET_KEY.format(self.client_id, scope), requests_per_minute)
+            for scope, requests_per_minute in scopes
+            if requests_per_minute > 0
         ]
-        if timeout_requests:
-            redis_client.hdel(self.active_requests_key, *timeout_requests)
 
-    def enter(self, request_id: Optional[str] = None) -> str:
-        if time.time() - self.last_recalculate_time > RateLimit._ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL:
+    def enter(self, request_id: Optional[str] = None, request_rate_buckets: Sequence[RequestRateBucket] = ()) -> str:
+        """
+        Admit a request if the client has less active requests than its max active requests, and every request rate
+        bucket has a token left
+        :param request_id: request id
+        :param request_rate_buckets: request rate buckets of the request
+        :return: request id to exit with
+        :raises AppInvokeQuotaExceededError: if the request is not admitted
+        """
+        if time.time() - self.last_recalculate_time > RateLimit._MAX_ACTIVE_REQUESTS_FLUSH_INTERVAL:
             self.flush_cache()
-        if self.max_active_requests <= 0:
+        if self.max_active_requests <= 0 and not request_rate_buckets:
             return RateLimit._UNLIMITED_REQUEST_ID
         if not request_id:
             request_id = RateLimit.gen_request_key()
 
-        active_requests_count = redis_client.hlen(self.active_requests_key)
-        if active_requests_count >= self.max_active_requests:
+        max_active_requests = max(self.max_active_requests, 0)
+        result = self._get_enter_script()(
+            keys=[self.active_requests_key, *(bucket.key for bucket in request_rate_buckets)],
+            args=[
+                max_active_requests,
+                request_id,
+                RateLimit._REQUEST_MAX_ALIVE_TIME,
+                *(bucket.requests_per_minute for bucket in request_rate_buckets),
+            ],
+        )
+        if result == -1:
             raise AppInvokeQuotaExceededError(
                 "Too many requests. Please try again later. The current maximum "
                 "concurrent requests allowed is {}.".format(self.max_active_requests)
             )
-        redis_client.hset(self.active_requests_key, request_id, str(time.time()))
-        return request_id
+        if result:
+            raise AppInvokeQuotaExceededError(
+                "Too many requests. Please try again later. The current maximum "
+                "requests per minute allowed is {}.".format(request_rate_buckets[result - 1].requests_per_minute)
+            )
+        return request_id if max_active_requests else RateLimit._UNLIMITED_REQUEST_ID
 
     def exit(self, request_id: str):
         if request_id == RateLimit._UNLIMITED_REQUEST_ID:
             return
-        redis_client.hdel(self.active_requests_key, request_id)
+        redis_client.zrem(self.active_requests_key, request_id)
+
+    @classmethod
+    def _get_enter_script(cls) -> Script:
+        if cls._enter_script is None:
+            cls._enter_script = redis_client.register_script(_ENTER_SCRIPT)
+        return cls._enter_script
 
     @staticmethod
     def gen_request_key() -> str:
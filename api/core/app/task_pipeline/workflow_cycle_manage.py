@@ -1,13 +1,19 @@
 import json
+import logging
+import threading
 import time
-from collections.abc import Mapping, Sequence
+from collections.abc import Generator, Iterable, Mapping, Sequence
+from contextlib import nullcontext
 from datetime import UTC, datetime
-from typing import Any, Optional, Union, cast
+from typing import Any, Optional, TypeVar, Union, cast
 from uuid import uuid4
 
+from flask import current_app, has_app_context
 from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.app.entities.app_invoke_entities import AdvancedChatAppGenerateEntity, InvokeFrom, WorkflowAppGenerateEntity
 from core.app.entities.queue_entities import (
     QueueAgentLogEvent,
@@ -47,6 +53,7 @@ from core.workflow.enums import SystemVariableKey
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.tool.entities import ToolNodeData
 from core.workflow.workflow_entry import WorkflowEntry
+from extensions.ext_database import db
 from models.account import Account
 from models.enums import CreatedByRole, WorkflowRunTriggeredFrom
 from models.model import EndUser
@@ -61,6 +68,10 @@ from models.workflow import (
 
 from .exc import WorkflowRunNotFoundError
 
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
 
 class WorkflowCycleManage:
     def __init__(
@@ -68,12 +79,22 @@ class WorkflowCycleManage:
         *,
         application_generate_entity: Union[AdvancedChatAppGenerateEntity, WorkflowAppGenerateEntity],
         workflow_system_variables: dict[SystemVariableKey, Any],
+        write_behind: Optional[bool] = None,
     ) -> None:
         self._workflow_run: WorkflowRun | None = None
         self._workflow_node_executions: dict[str, WorkflowNodeExecution] = {}
         self._application_generate_entity = application_generate_entity
         self._workflow_system_variables = workflow_system_variables
 
+        # write-behind mode: node execution records are kept in memory and upserted in batches
+        self._write_behind = (
+            dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED if write_behind is None else write_behind
+        )
+        self._pending_node_executions: dict[str, WorkflowNodeExecution] = {}
+        self._last_flushed_at = time.perf_counter()
+        # the buffer is flushed by the listener and by its flusher thread
+        self._flush_lock = threading.Lock()
+
     def _handle_workflow_run_start(
         self,
         *,
@@ -166,6 +187,8 @@ class WorkflowCycleManage:
         workflow_run.total_steps = total_steps
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
 
+        self._flush_node_executions(session=session)
+
         if trace_manager:
             trace_manager.add_trace_task(
                 TraceTask(
@@ -202,6 +225,8 @@ class WorkflowCycleManage:
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
         workflow_run.exceptions_count = exceptions_count
 
+        self._flush_node_executions(session=session)
+
         if trace_manager:
             trace_manager.add_trace_task(
                 TraceTask(
@@ -248,19 +273,27 @@ class WorkflowCycleManage:
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
         workflow_run.exceptions_count = exceptions_count
 
-        stmt = select(WorkflowNodeExecution.node_execution_id).where(
-            WorkflowNodeExecution.tenant_id == workflow_run.tenant_id,
-            WorkflowNodeExecution.app_id == workflow_run.app_id,
-            WorkflowNodeExecution.workflow_id == workflow_run.workflow_id,
-            WorkflowNodeExecution.triggered_from == WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value,
-            WorkflowNodeExecution.workflow_run_id == workflow_run.id,
-            WorkflowNodeExecution.status == WorkflowNodeExecutionStatus.RUNNING.value,
-        )
-        ids = session.scalars(stmt).all()
-        # Use self._get_workflow_node_execution here to make sure the cache is updated
-        running_workflow_node_executions = [
-            self._get_workflow_node_execution(session=session, node_execution_id=id) for id in ids if id
-        ]
+        if self._write_behind:
+            # every node execution of this run lives in the in-memory cache, no need to query them back
+            running_workflow_node_executions = [
+                workflow_node_execution
+                for workflow_node_execution in self._workflow_node_executions.values()
+                if workflow_node_execution.status == WorkflowNodeExecutionStatus.RUNNING.value
+            ]
+        else:
+            stmt = select(WorkflowNodeExecution.node_execution_id).where(
+                WorkflowNodeExecution.tenant_id == workflow_run.tenant_id,
+                WorkflowNodeExecution.app_id == workflow_run.app_id,
+                WorkflowNodeExecution.workflow_id == workflow_run.workflow_id,
+                WorkflowNodeExecution.triggered_from == WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value,
+                WorkflowNodeExecution.workflow_run_id == workflow_run.id,
+                WorkflowNodeExecution.status == WorkflowNodeExecutionStatus.RUNNING.value,
+            )
+            ids = session.scalars(stmt).all()
+            # Use self._get_workflow_node_execution here to make sure the cache is updated
+            running_workflow_node_executions = [
+                self._get_workflow_node_execution(session=session, node_execution_id=id) for id in ids if id
+            ]
 
         for workflow_node_execution in running_workflow_node_executions:
             now = datetime.now(UTC).replace(tzinfo=None)
@@ -268,6 +301,10 @@ class WorkflowCycleManage:
             workflow_node_execution.error = error
             workflow_node_execution.finished_at = now
             workflow_node_execution.elapsed_time = (now - workflow_node_execution.created_at).total_seconds()
+            if self._write_behind:
+                self._buffer_node_execution(workflow_node_execution)
+
+        self._flush_node_executions(session=session)
 
         if trace_manager:
             trace_manager.add_trace_task(
@@ -308,7 +345,10 @@ class WorkflowCycleManage:
         )
         workflow_node_execution.created_at = datetime.now(UTC).replace(tzinfo=None)
 
-        session.add(workflow_node_execution)
+        if self._write_behind:
+            self._buffer_node_execution(workflow_node_execution)
+        else:
+            session.add(workflow_node_execution)
 
         self._workflow_node_executions[event.node_execution_id] = workflow_node_execution
         return workflow_node_execution
@@ -337,7 +377,10 @@ class WorkflowCycleManage:
         workflow_node_execution.finished_at = finished_at
         workflow_node_execution.elapsed_time = elapsed_time
 
-        workflow_node_execution = session.merge(workflow_node_execution)
+        if self._write_behind:
+            self._buffer_node_execution(workflow_node_execution)
+        else:
+            workflow_node_execution = session.merge(workflow_node_execution)
         return workflow_node_execution
 
     def _handle_workflow_node_execution_failed(
@@ -377,7 +420,10 @@ class WorkflowCycleManage:
         workflow_node_execution.elapsed_time = elapsed_time
         workflow_node_execution.execution_metadata = execution_metadata
 
-        workflow_node_execution = session.merge(workflow_node_execution)
+        if self._write_behind:
+            self._buffer_node_execution(workflow_node_execution)
+        else:
+            workflow_node_execution = session.merge(workflow_node_execution)
         return workflow_node_execution
 
     def _handle_workflow_node_execution_retried(
@@ -428,7 +474,10 @@ class WorkflowCycleManage:
         workflow_node_execution.execution_metadata = execution_metadata
         workflow_node_execution.index = event.node_run_index
 
-        session.add(workflow_node_execution)
+        if self._write_behind:
+            self._buffer_node_execution(workflow_node_execution)
+        else:
+            session.add(workflow_node_execution)
 
         self._workflow_node_executions[event.node_execution_id] = workflow_node_execution
         return workflow_node_execution
@@ -830,7 +879,10 @@ class WorkflowCycleManage:
     def _get_workflow_run(self, *, session: Session, workflow_run_id: str) -> WorkflowRun:
         if self._workflow_run and self._workflow_run.id == workflow_run_id:
             cached_workflow_run = self._workflow_run
-            cached_workflow_run = session.merge(cached_workflow_run)
+            # in write-behind mode trust the cached state instead of reloading the run on every event
+            cached_workflow_run = session.merge(cached_workflow_run, load=not self._write_behind)
+            # keep the merged run, which holds the changes made in this session, for the next merge
+            self._workflow_run = cached_workflow_run
             return cached_workflow_run
         stmt = select(WorkflowRun).where(WorkflowRun.id == workflow_run_id)
         workflow_run = session.scalar(stmt)
@@ -844,8 +896,107 @@ class WorkflowCycleManage:
         if node_execution_id not in self._workflow_node_executions:
             raise ValueError(f"Workflow node execution not found: {node_execution_id}")
         cached_workflow_node_execution = self._workflow_node_executions[node_execution_id]
+        if self._write_behind:
+            return cached_workflow_node_execution
         return session.merge(cached_workflow_node_execution)
 
+    def _buffer_node_execution(self, workflow_node_execution: WorkflowNodeExecution) -> None:
+        with self._flush_lock:
+            self._pending_node_executions[workflow_node_execution.id] = workflow_node_execution
+
+    def _should_flush_node_executions(self) -> bool:
+        if not self._pending_node_executions:
+            return False
+        if len(self._pending_node_executions) >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE:
+            return True
+        return time.perf_counter() - self._last_flushed_at >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL
+
+    def _flush_node_executions(self, *, session: Optional[Session] = None) -> None:
+        """
+        Upsert all buffered node executions in a single statement.
+
+        When a session is given the statement joins the caller's transaction, otherwise
+        a dedicated session is opened and committed. Standalone flush errors are logged and
+        the buffer is kept, so the records are retried with the next flush.
+        :param session: optional session to flush into
+        :return:
+        """
+        with self._flush_lock:
+            self._flush_pending_node_executions(session=session)
+
+    def _flush_pending_node_executions(self, *, session: Optional[Session] = None) -> None:
+        if not self._pending_node_executions:
+            self._last_flushed_at = time.perf_counter()
+            return
+
+        columns = WorkflowNodeExecution.__table__.columns
+        rows = []
+        for workflow_node_execution in self._pending_node_executions.values():
+            row = {}
+            for column in columns:
+                value = getattr(workflow_node_execution, column.name)
+                # unset attributes fall back to the server default, as a plain ORM insert would do
+                if value is None and column.server_default is not None:
+                    value = column.server_default.arg  # type: ignore[attr-defined]
+                row[column.name] = value
+            rows.append(row)
+
+        stmt = insert(WorkflowNodeExecution).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={column.name: stmt.excluded[column.name] for column in columns if column.name != "id"},
+        )
+
+        if session is not None:
+            session.execute(stmt)
+        else:
+            try:
+                with Session(db.engine) as flush_session:
+                    flush_session.execute(stmt)
+                    flush_session.commit()
+            except Exception:
+                logger.exception(f"Failed to flush {len(rows)} workflow node executions")
+                return
+
+        self._pending_node_executions.clear()
+        self._last_flushed_at = time.perf_counter()
+
+    def write_behind_listen(self, messages: Iterable[_T]) -> Generator[_T, None, None]:
+        """
+        Relay queue messages and flush buffered node executions once the size or time threshold is hit.
+
+        A flusher thread applies the time threshold while no message arrives, e.g. during a long node run. The buffer
+        is flushed one last time when the listener finishes, fails or is closed by a disconnected client, so at most
+        one flush window is lost if the process dies.
+        :param messages: queue messages
+        :return:
+        """
+        if not self._write_behind:
+            yield from messages
+            return
+
+        flask_app = current_app._get_current_object() if has_app_context() else None  # type: ignore
+        stop_event = threading.Event()
+        flusher = threading.Thread(
+            target=self._flush_node_executions_periodically, args=(flask_app, stop_event), daemon=True
+        )
+        flusher.start()
+        try:
+            for message in messages:
+                yield message
+                if self._should_flush_node_executions():
+                    self._flush_node_executions()
+        finally:
+            stop_event.set()
+            flusher.join()
+            self._flush_node_executions()
+
+    def _flush_node_executions_periodically(self, flask_app, stop_event: threading.Event) -> None:
+        with flask_app.app_context() if flask_app else nullcontext():
+            while not stop_event.wait(dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL):
+                if self._should_flush_node_executions():
+                    self._flush_node_executions()
+
     def _handle_agent_log(self, task_id: str, event: QueueAgentLogEvent) -> AgentLogStreamResponse:
         """
         Handle agent log
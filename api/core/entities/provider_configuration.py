@@ -19,7 +19,7 @@ from core.entities.provider_entities import (
     SystemConfigurationStatus,
 )
 from core.helper import encrypter
-from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.model_provider_cache import PluginModelCache, ProviderCredentialsCache, ProviderCredentialsCacheType
 from core.model_runtime.entities.model_entities import AIModelEntity, FetchFrom, ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -271,6 +271,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        PluginModelCache.invalidate(self.tenant_id)
 
         self.switch_preferred_provider_type(ProviderType.CUSTOM)
 
@@ -307,6 +308,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            PluginModelCache.invalidate(self.tenant_id)
 
     def get_custom_model_credentials(
         self, model_type: ModelType, model: str, obfuscated: bool = False
@@ -431,6 +433,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        PluginModelCache.invalidate(self.tenant_id)
 
     def delete_custom_model_credentials(self, model_type: ModelType, model: str) -> None:
         """
@@ -463,6 +466,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            PluginModelCache.invalidate(self.tenant_id)
 
     def enable_model(self, model_type: ModelType, model: str) -> ProviderModelSetting:
         """
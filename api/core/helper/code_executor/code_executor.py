@@ -1,15 +1,17 @@
 import logging
-from collections.abc import Mapping
+import os
+from collections.abc import Mapping, Sequence
 from enum import StrEnum
 from threading import Lock
-from typing import Any, Optional
+from typing import Any, Optional, Union, cast
 
-from httpx import Timeout, post
+from httpx import Client, Limits, Timeout
 from pydantic import BaseModel
 from yarl import URL
 
 from configs import dify_config
 from core.helper.code_executor.javascript.javascript_transformer import NodeJsTemplateTransformer
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2Renderer
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
 from core.helper.code_executor.template_transformer import TemplateTransformer
@@ -18,7 +20,10 @@ logger = logging.getLogger(__name__)
 
 
 class CodeExecutionError(Exception):
-    pass
+    def __init__(self, message: str = "", stdout: str = ""):
+        super().__init__(message)
+        # output printed before the error, e.g. by the executions a batch runner did before timing out
+        self.stdout = stdout
 
 
 class CodeExecutionResponse(BaseModel):
@@ -37,6 +42,33 @@ class CodeLanguage(StrEnum):
     JAVASCRIPT = "javascript"
 
 
+_client: Optional[Client] = None
+_client_pid: Optional[int] = None
+_client_lock = Lock()
+
+
+def _get_client() -> Client:
+    """
+    Get the client of the code execution service shared by the current process, requests wait for a pooled
+    connection once CODE_EXECUTION_POOL_MAX_CONNECTIONS are in use. A forked process creates its own client.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = Client(
+                    limits=Limits(
+                        max_connections=dify_config.CODE_EXECUTION_POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=dify_config.CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=dify_config.CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                _client_pid = pid
+    return _client
+
+
 class CodeExecutor:
     dependencies_cache: dict[str, str] = {}
     dependencies_cache_lock = Lock()
@@ -75,7 +107,7 @@ class CodeExecutor:
         }
 
         try:
-            response = post(
+            response = _get_client().post(
                 str(url),
                 json=data,
                 headers=headers,
@@ -113,7 +145,7 @@ class CodeExecutor:
         response_code = CodeExecutionResponse(**response_data)
 
         if response_code.data.error:
-            raise CodeExecutionError(response_code.data.error)
+            raise CodeExecutionError(response_code.data.error, stdout=response_code.data.stdout or "")
 
         return response_code.data.stdout or ""
 
@@ -130,6 +162,14 @@ class CodeExecutor:
         if not template_transformer:
             raise CodeExecutionError(f"Unsupported language {language}")
 
+        if language == CodeLanguage.JINJA2 and dify_config.JINJA2_IN_PROCESS_RENDER_ENABLED:
+            try:
+                result = Jinja2Renderer.render(code, inputs)
+            except Exception as e:
+                raise CodeExecutionError(f"{type(e).__name__}: {e}")
+            if result is not None:
+                return {"result": result}
+
         runner, preload = template_transformer.transform_caller(code, inputs)
 
         try:
@@ -138,3 +178,77 @@ class CodeExecutor:
             raise e
 
         return template_transformer.transform_response(response)
+
+    @classmethod
+    def execute_workflow_code_template_batch(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> list[Union[Mapping[str, Any], CodeExecutionError, None]]:
+        """
+        Execute code with each of the inputs, in runs of up to CODE_EXECUTION_BATCH_SIZE inputs per request
+
+        A run starts no more executions after CODE_EXECUTION_BATCH_MAX_DURATION seconds, and a run failing as a whole,
+        e.g. on the timeout of the sandbox, only fails the execution it was doing, the executions it did not get to
+        are left out instead of being failed or run again.
+        :param language: code language
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: result or error of each execution, None for the ones not done, in the order of the inputs
+        """
+        template_transformer = cls.code_template_transformers.get(language)
+        if not template_transformer:
+            raise CodeExecutionError(f"Unsupported language {language}")
+
+        batch_size = dify_config.CODE_EXECUTION_BATCH_SIZE
+        if batch_size <= 1 or not template_transformer.get_batch_runner_script():
+            return [cls._execute_workflow_code_template_or_error(language, code, inputs) for inputs in inputs_list]
+
+        results: list[Union[Mapping[str, Any], CodeExecutionError, None]] = []
+        for start in range(0, len(inputs_list), batch_size):
+            batch = inputs_list[start : start + batch_size]
+            runner, preload = template_transformer.transform_batch_caller(
+                code, batch, dify_config.CODE_EXECUTION_BATCH_MAX_DURATION
+            )
+            error: Optional[CodeExecutionError] = None
+            try:
+                response = cls.execute_code(language, preload, runner)
+            except CodeExecutionError as e:
+                logger.info(f"Failed to execute code in batch: {e}")
+                response, error = e.stdout, e
+
+            try:
+                batch_results = template_transformer.transform_batch_response(response, len(batch))
+            except ValueError as e:
+                # the code printed result tags itself, which a run of its own fails to parse as well
+                results.extend(CodeExecutionError(str(e)) for _ in batch)
+                continue
+
+            results.extend(
+                CodeExecutionError(result) if isinstance(result, str) else result for result in batch_results
+            )
+            if error is not None and len(batch_results) < len(batch):
+                # the execution the run was doing when it failed
+                results.append(error)
+                batch_results.append(str(error))
+            results.extend(None for _ in range(len(batch) - len(batch_results)))
+        return results
+
+    @classmethod
+    def supports_batch(cls, language: CodeLanguage) -> bool:
+        """
+        Whether code of a language can be executed with several inputs in one request
+        :param language: code language
+        :return:
+        """
+        template_transformer = cls.code_template_transformers.get(language)
+        return bool(template_transformer and template_transformer.get_batch_runner_script())
+
+    @classmethod
+    def _execute_workflow_code_template_or_error(
+        cls, language: CodeLanguage, code: str, inputs: Mapping[str, Any]
+    ) -> Union[Mapping[str, Any], CodeExecutionError]:
+        try:
+            return cast(Mapping[str, Any], cls.execute_workflow_code_template(language, code, inputs))
+        except CodeExecutionError as e:
+            return e
+        except ValueError as e:
+            return CodeExecutionError(str(e))
@@ -24,3 +24,34 @@ class NodeJsTemplateTransformer(TemplateTransformer):
             """
         )
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(
+            f"""
+            // declare main function
+            {cls._code_placeholder}
+            
+            // decode and prepare input objects
+            var inputs_list = JSON.parse(Buffer.from('{cls._inputs_placeholder}', 'base64').toString('utf-8'))
+            
+            // execute main function with each input object, printing the output of each execution, with its error,
+            // once it is done, and starting no more executions after the max duration
+            var started_at = Date.now()
+            for (var index = 0; index < inputs_list.length; index++) {{
+                if (index && (Date.now() - started_at) / 1000 >= {cls._max_duration_placeholder}) {{
+                    break
+                }}
+                var output_obj
+                try {{
+                    output_obj = {{ result: main(inputs_list[index]) }}
+                }} catch (e) {{
+                    output_obj = {{ error: String(e) }}
+                }}
+                var output_json = JSON.stringify(output_obj)
+                var result = `<<RESULT>>${{output_json}}<<RESULT>>`
+                console.log(result)
+            }}
+            """
+        )
+        return runner_script
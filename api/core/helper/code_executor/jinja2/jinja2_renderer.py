@@ -0,0 +1,412 @@
+import ast
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextvars import ContextVar
+from functools import update_wrapper
+from typing import Any, Optional, cast
+
+from jinja2 import Template, filters, nodes, pass_environment, pass_eval_context
+from jinja2.compiler import CodeGenerator, Frame
+from jinja2.exceptions import SecurityError
+from jinja2.runtime import Context, Undefined
+from jinja2.sandbox import SandboxedEnvironment, safe_range
+
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
+from libs import helper
+
+logger = logging.getLogger(__name__)
+
+# integers raised to a power are bounded by the bits of the result
+MAX_POWER_BITS = 65536
+
+# the deadline is checked every this many items of a range
+RANGE_CHECK_INTERVAL = 1024
+
+# digits of widths and precisions in format strings
+_FORMAT_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+class Jinja2RenderLimitExceededError(Exception):
+    """
+    Raised when a template exceeds the time, output size, loop iterations or call depth it may use in process
+    """
+
+    pass
+
+
+class _RenderBudget:
+    def __init__(self) -> None:
+        self.deadline = time.monotonic() + dify_config.JINJA2_RENDER_TIMEOUT
+        self.depth = 0
+        self.iterations = 0
+
+    def check(self) -> None:
+        if time.monotonic() > self.deadline:
+            raise Jinja2RenderLimitExceededError(
+                f"Template rendering exceeded {dify_config.JINJA2_RENDER_TIMEOUT} seconds"
+            )
+
+    def iterate(self) -> None:
+        self.iterations += 1
+        if self.iterations > dify_config.JINJA2_RENDER_MAX_LOOP_ITERATIONS:
+            raise Jinja2RenderLimitExceededError(
+                f"Template loops more than {dify_config.JINJA2_RENDER_MAX_LOOP_ITERATIONS} times"
+            )
+        self.check()
+
+
+_budget: ContextVar[Optional[_RenderBudget]] = ContextVar("jinja2_render_budget", default=None)
+
+
+def _check_budget() -> Optional[_RenderBudget]:
+    budget = _budget.get()
+    if budget is not None:
+        budget.check()
+    return budget
+
+
+def _check_size(size: int) -> None:
+    if size > dify_config.JINJA2_RENDER_MAX_OUTPUT_SIZE:
+        raise Jinja2RenderLimitExceededError(
+            f"Template builds a value of more than {dify_config.JINJA2_RENDER_MAX_OUTPUT_SIZE} items"
+        )
+
+
+def _check_width(width: Any) -> None:
+    if isinstance(width, int | float):
+        _check_size(int(width))
+
+
+def _check_format(format_string: Any, args: Iterable[Any], kwargs: Mapping[str, Any]) -> None:
+    # widths and precisions are either digits of the format string or numbers of the arguments
+    for number in _FORMAT_NUMBER_PATTERN.findall(str(format_string)):
+        _check_size(int(number))
+    for value in (*args, *kwargs.values()):
+        _check_width(value)
+
+
+def _replaced_size(s: str, old: str, new: str, count: Optional[int]) -> int:
+    occurrences = s.count(old) if old else len(s) + 1
+    if count is not None and count >= 0:
+        occurrences = min(occurrences, count)
+    return len(s) + occurrences * max(len(new) - len(old), 0)
+
+
+def _limited_range(*args: int) -> Iterator[int]:
+    for i, value in enumerate(safe_range(*args)):
+        if i % RANGE_CHECK_INTERVAL == 0:
+            _check_budget()
+        yield value
+
+
+def _center(value: str, width: int = 80) -> str:
+    _check_width(width)
+    return filters.do_center(value, width)
+
+
+@pass_eval_context
+def _replace(eval_ctx: Any, s: str, old: str, new: str, count: Optional[int] = None) -> str:
+    _check_size(_replaced_size(str(s), str(old), str(new), count))
+    return filters.do_replace(eval_ctx, s, old, new, count)
+
+
+def _indent(s: str, width: int | str = 4, first: bool = False, blank: bool = False) -> str:
+    s = str(s)
+    padding = len(width) if isinstance(width, str) else int(width)
+    _check_size(len(s) + (s.count("\n") + 1) * padding)
+    return filters.do_indent(s, width, first, blank)
+
+
+@pass_environment
+def _wordwrap(
+    environment: Any,
+    s: str,
+    width: int = 79,
+    break_long_words: bool = True,
+    wrapstring: Optional[str] = None,
+    break_on_hyphens: bool = True,
+) -> str:
+    s = str(s)
+    # a line ends at a word boundary or at the width
+    lines = len(s) // max(int(width), 1) + s.count(" ") + s.count("\n") + 1
+    _check_size(len(s) + lines * len(wrapstring if wrapstring is not None else environment.newline_sequence))
+    return filters.do_wordwrap(environment, s, width, break_long_words, wrapstring, break_on_hyphens)
+
+
+@pass_eval_context
+def _join(eval_ctx: Any, value: Iterable[Any], d: str = "", attribute: Optional[str | int] = None) -> str:
+    value = list(value)
+    _check_size(len(str(d)) * max(len(value) - 1, 0))
+    result = cast(str, filters.do_join(eval_ctx, value, d, attribute))
+    _check_size(len(result))
+    return result
+
+
+def _format(value: str, *args: Any, **kwargs: Any) -> str:
+    _check_format(value, args, kwargs)
+    return filters.do_format(value, *args, **kwargs)
+
+
+def _batch(value: Iterable[Any], linecount: int, fill_with: Any = None) -> Iterator[list[Any]]:
+    _check_width(linecount)
+    return filters.do_batch(value, linecount, fill_with)
+
+
+@pass_eval_context
+def _slice(eval_ctx: Any, value: Any, slices: int, fill_with: Any = None) -> Iterator[list[Any]]:
+    _check_width(slices)
+    return cast(Iterator[list[Any]], filters.do_slice(eval_ctx, value, slices, fill_with))
+
+
+# string methods whose result may be much larger than the string, checked before they are called
+def _check_str_method(name: str, value: str | bytes, args: tuple[Any, ...], kwargs: Mapping[str, Any]) -> None:
+    if name in ("center", "ljust", "rjust", "zfill") and args:
+        _check_width(args[0])
+    elif name == "expandtabs":
+        tabsize = args[0] if args else kwargs.get("tabsize", 8)
+        if isinstance(tabsize, int):
+            _check_size(len(value) * max(tabsize, 1))
+    elif name == "replace" and len(args) >= 2:
+        count = args[2] if len(args) > 2 else kwargs.get("count")
+        _check_size(_replaced_size(str(value), str(args[0]), str(args[1]), count))
+    elif name == "join" and args and isinstance(args[0], list | tuple):
+        _check_size(len(value) * max(len(args[0]) - 1, 0))
+
+
+class _LimitedCodeGenerator(CodeGenerator):
+    """
+    Code generator that counts the items of for loops and checks the size of concatenated strings
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._loop_iterables: set[int] = set()
+
+    def visit(self, node: nodes.Node, *args: Any, **kwargs: Any) -> Any:
+        if id(node) not in self._loop_iterables:
+            return super().visit(node, *args, **kwargs)
+
+        self.write("environment.limit_iterations(")
+        result = super().visit(node, *args, **kwargs)
+        self.write(")")
+        return result
+
+    def visit_For(self, node: nodes.For, frame: Frame) -> None:  # noqa: N802
+        self._loop_iterables.add(id(node.iter))
+        super().visit_For(node, frame)
+
+    def visit_Concat(self, node: nodes.Concat, frame: Frame) -> None:  # noqa: N802
+        # concatenations grow at most twice per step, so they are checked once built
+        self.write("environment.limit_size(")
+        super().visit_Concat(node, frame)
+        self.write(")")
+
+
+class _LimitedSandboxedEnvironment(SandboxedEnvironment):
+    """
+    Sandboxed environment that checks the render budget on every call, attribute and item lookup, loop item, range
+    item and intercepted operator, refuses filters, string methods and operators building values beyond the output
+    size limit, and raises on unsafe attributes instead of rendering them as undefined
+    """
+
+    code_generator_class = _LimitedCodeGenerator
+    intercepted_binops = frozenset(["*", "**", "+"])
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.globals["range"] = _limited_range
+        self.filters.update(
+            {
+                "center": _center,
+                "replace": _replace,
+                "indent": _indent,
+                "wordwrap": _wordwrap,
+                "join": _join,
+                "format": _format,
+                "batch": _batch,
+                "slice": _slice,
+            }
+        )
+
+    def limit_iterations(self, iterable: Any) -> Any:
+        budget = _budget.get()
+        if budget is None:
+            return iterable
+        return self._iterate(budget, iterable)
+
+    @staticmethod
+    def _iterate(budget: _RenderBudget, iterable: Any) -> Iterator[Any]:
+        for item in iterable:
+            budget.iterate()
+            yield item
+
+    def limit_size(self, value: Any) -> Any:
+        if isinstance(value, str):
+            _check_size(len(value))
+        return value
+
+    def call_binop(self, context: Context, operator: str, left: Any, right: Any) -> Any:
+        _check_budget()
+        if operator == "*":
+            for sequence, times in ((left, right), (right, left)):
+                if isinstance(sequence, str | bytes | list | tuple) and isinstance(times, int):
+                    _check_size(len(sequence) * times)
+        elif operator == "**":
+            if (
+                isinstance(left, int)
+                and isinstance(right, int)
+                and right > 0
+                and left.bit_length() * right > MAX_POWER_BITS
+            ):
+                raise Jinja2RenderLimitExceededError("Template raises a number to an oversized power")
+        elif operator == "+":
+            if isinstance(left, str | bytes | list | tuple) and isinstance(right, str | bytes | list | tuple):
+                _check_size(len(left) + len(right))
+        return super().call_binop(context, operator, left, right)
+
+    def call(__self, __context: Context, __obj: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: N805
+        budget = _check_budget()
+        if budget is None:
+            return super().call(__context, __obj, *args, **kwargs)
+
+        owner = getattr(__obj, "__self__", None)
+        if isinstance(owner, str | bytes):
+            _check_str_method(getattr(__obj, "__name__", ""), owner, args, kwargs)
+
+        budget.depth += 1
+        try:
+            if budget.depth > dify_config.JINJA2_RENDER_MAX_CALL_DEPTH:
+                raise Jinja2RenderLimitExceededError(
+                    f"Template calls nested deeper than {dify_config.JINJA2_RENDER_MAX_CALL_DEPTH}"
+                )
+            result = super().call(__context, __obj, *args, **kwargs)
+        finally:
+            budget.depth -= 1
+
+        # methods growing a container, such as list.extend in a loop, are checked once called
+        for value in (owner, result):
+            if isinstance(value, str | bytes | list | dict | set):
+                _check_size(len(value))
+        return result
+
+    def wrap_str_format(self, value: Any) -> Optional[Callable[..., str]]:
+        wrapper = super().wrap_str_format(value)
+        if wrapper is None:
+            return None
+
+        format_string = value.__self__
+        is_format_map = value.__name__ == "format_map"
+
+        def checked_wrapper(*args: Any, **kwargs: Any) -> str:
+            if is_format_map and len(args) == 1 and isinstance(args[0], Mapping):
+                _check_format(format_string, (), args[0])
+            else:
+                _check_format(format_string, args, kwargs)
+            return wrapper(*args, **kwargs)
+
+        return update_wrapper(checked_wrapper, value)
+
+    def unsafe_undefined(self, obj: Any, attribute: str) -> Undefined:
+        # the sandbox runner has access to the attribute, render the template there instead of as undefined
+        raise SecurityError(f"access to attribute {attribute!r} of {type(obj).__name__!r} object is unsafe.")
+
+    def getattr(self, obj: Any, attribute: str) -> Any:
+        _check_budget()
+        return super().getattr(obj, attribute)
+
+    def getitem(self, obj: Any, argument: Any) -> Any:
+        _check_budget()
+        return super().getitem(obj, argument)
+
+
+class Jinja2Renderer:
+    """
+    Render jinja2 templates in process with a sandboxed environment, instead of running them in the code
+    execution sandbox.
+
+    Templates are compiled once and kept in an LRU keyed by the hash of their source. A template is rendered the
+    way the sandbox runner does: its source is read as a Python string literal and its inputs go through JSON.
+    Templates that need the sandbox get None from `render`: templates the runner can not embed, templates refused
+    by the sandboxed environment, and templates exceeding the time, output size or call depth limits.
+    """
+
+    _environment = _LimitedSandboxedEnvironment()
+    _cache: Optional[LRUCache] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def render(cls, template: str, inputs: Mapping[str, Any]) -> Optional[str]:
+        """
+        Render a template in process
+        :param template: template source
+        :param inputs: inputs
+        :return: rendered text, None if the template has to be rendered in the code execution sandbox
+        :raises TemplateError: if the template is invalid or fails to render
+        """
+        compiled = cls._get_template(template)
+        if compiled is None:
+            return None
+
+        # inputs reach the template as the sandbox runner decodes them
+        inputs = json.loads(json.dumps(inputs, ensure_ascii=False))
+
+        token = _budget.set(_RenderBudget())
+        try:
+            output: list[str] = []
+            output_size = 0
+            for chunk in compiled.generate(**inputs):
+                output_size += len(chunk)
+                if output_size > dify_config.JINJA2_RENDER_MAX_OUTPUT_SIZE:
+                    raise Jinja2RenderLimitExceededError(
+                        f"Template output exceeds {dify_config.JINJA2_RENDER_MAX_OUTPUT_SIZE} characters"
+                    )
+                output.append(chunk)
+            return "".join(output)
+        except (Jinja2RenderLimitExceededError, SecurityError, RecursionError) as e:
+            logger.info(f"Render template in the code execution sandbox: {e}")
+            return None
+        finally:
+            _budget.reset(token)
+
+    @classmethod
+    def _get_template(cls, template: str) -> Optional[Template]:
+        if not dify_config.JINJA2_TEMPLATE_CACHE_SIZE:
+            return cls._compile(template)
+
+        key = helper.generate_text_hash(template)
+        with cls._lock:
+            if cls._cache is None or cls._cache.capacity != dify_config.JINJA2_TEMPLATE_CACHE_SIZE:
+                cls._cache = LRUCache(dify_config.JINJA2_TEMPLATE_CACHE_SIZE)
+            if key in cls._cache.cache:
+                return cast(Optional[Template], cls._cache.get(key))
+
+        compiled = cls._compile(template)
+        with cls._lock:
+            if cls._cache is not None:
+                cls._cache.put(key, compiled)
+        return compiled
+
+    @classmethod
+    def _compile(cls, template: str) -> Optional[Template]:
+        # the sandbox runner embeds the source in a triple quoted Python string literal
+        if "\\" in template or "'''" in template or template.endswith("'"):
+            try:
+                source = ast.literal_eval(f"'''{template}'''")
+            except (SyntaxError, ValueError):
+                return None
+        else:
+            source = template
+        return cls._environment.from_string(source)
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Drop all compiled templates
+        """
+        with cls._lock:
+            cls._cache = None
@@ -25,3 +25,32 @@ class Python3TemplateTransformer(TemplateTransformer):
             print(result)
             """)
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(f"""
+            # declare main function
+            {cls._code_placeholder}
+            
+            import json
+            import time
+            from base64 import b64decode
+            
+            # decode and prepare input dicts
+            inputs_list = json.loads(b64decode('{cls._inputs_placeholder}').decode('utf-8'))
+            
+            # execute main function with each input dict, printing the output of each execution, with its error,
+            # once it is done, and starting no more executions after the max duration
+            started_at = time.monotonic()
+            for index, inputs_obj in enumerate(inputs_list):
+                if index and time.monotonic() - started_at >= {cls._max_duration_placeholder}:
+                    break
+                try:
+                    output_obj = {{"result": main(**inputs_obj)}}
+                except Exception as e:
+                    output_obj = {{"error": f"{{type(e).__name__}}: {{e}}"}}
+                output_json = json.dumps(output_obj, indent=4)
+                result = f'''<<RESULT>>{{output_json}}<<RESULT>>'''
+                print(result, flush=True)
+            """)
+        return runner_script
@@ -2,13 +2,14 @@ import json
 import re
 from abc import ABC, abstractmethod
 from base64 import b64encode
-from collections.abc import Mapping
-from typing import Any
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional, Union
 
 
 class TemplateTransformer(ABC):
     _code_placeholder: str = "{{code}}"
     _inputs_placeholder: str = "{{inputs}}"
+    _max_duration_placeholder: str = "{{max_duration}}"
     _result_tag: str = "<<RESULT>>"
 
     @classmethod
@@ -24,6 +25,27 @@ class TemplateTransformer(ABC):
 
         return runner_script, preload_script
 
+    @classmethod
+    def transform_batch_caller(
+        cls, code: str, inputs_list: Sequence[Mapping[str, Any]], max_duration: float
+    ) -> tuple[str, str]:
+        """
+        Transform code to a runner executing it with each of the inputs, printing the output of each execution as
+        soon as it is done, and not starting executions once it has run for max duration
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :param max_duration: seconds after which no more executions are started
+        :return: runner, preload
+        """
+        runner_script = cls.get_batch_runner_script()
+        if not runner_script:
+            raise ValueError(f"{cls.__name__} does not support batch execution")
+
+        runner_script = runner_script.replace(cls._max_duration_placeholder, repr(float(max_duration)))
+        runner_script = runner_script.replace(cls._code_placeholder, code)
+        runner_script = runner_script.replace(cls._inputs_placeholder, cls.serialize_inputs(inputs_list))
+        return runner_script, cls.get_preload_script()
+
     @classmethod
     def extract_result_str_from_response(cls, response: str):
         result = re.search(rf"{cls._result_tag}(.*){cls._result_tag}", response, re.DOTALL)
@@ -48,6 +70,38 @@ class TemplateTransformer(ABC):
             raise ValueError("result keys must be strings")
         return result
 
+    @classmethod
+    def transform_batch_response(cls, response: str, count: int) -> list[Union[Mapping[str, Any], str]]:
+        """
+        Transform response of a batch runner to the result or error message of each execution done, in the order of
+        the inputs, executions the runner did not get to are left out
+        :param response: response, possibly the output printed by a runner which failed as a whole
+        :param count: number of inputs
+        :return:
+        """
+        outputs = re.findall(rf"{cls._result_tag}(.*?){cls._result_tag}", response, re.DOTALL)
+        if len(outputs) > count:
+            raise ValueError(f"batch response must have at most {count} outputs")
+
+        results: list[Union[Mapping[str, Any], str]] = []
+        for output_str in outputs:
+            try:
+                output = json.loads(output_str)
+            except json.JSONDecodeError:
+                results.append("failed to parse response")
+                continue
+            if not isinstance(output, dict):
+                results.append("batch output must be a dict")
+            elif "error" in output:
+                results.append(str(output["error"]))
+            elif not isinstance(output.get("result"), dict):
+                results.append("result must be a dict")
+            elif not all(isinstance(k, str) for k in output["result"]):
+                results.append("result keys must be strings")
+            else:
+                results.append(output["result"])
+        return results
+
     @classmethod
     @abstractmethod
     def get_runner_script(cls) -> str:
@@ -57,7 +111,14 @@ class TemplateTransformer(ABC):
         pass
 
     @classmethod
-    def serialize_inputs(cls, inputs: Mapping[str, Any]) -> str:
+    def get_batch_runner_script(cls) -> Optional[str]:
+        """
+        Get runner script executing the code with each of several inputs, None if batch execution is not supported
+        """
+        return None
+
+    @classmethod
+    def serialize_inputs(cls, inputs: Union[Mapping[str, Any], Sequence[Mapping[str, Any]]]) -> str:
         inputs_json_str = json.dumps(inputs, ensure_ascii=False).encode()
         input_base64_encoded = b64encode(inputs_json_str).decode("utf-8")
         return input_base64_encoded
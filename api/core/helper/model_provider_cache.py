@@ -1,8 +1,13 @@
+import hashlib
 import json
+import threading
+import time
 from enum import Enum
 from json import JSONDecodeError
-from typing import Optional
+from typing import Optional, cast
 
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
 from extensions.ext_redis import redis_client
 
 
@@ -50,3 +55,107 @@ class ProviderCredentialsCache:
         :return:
         """
         redis_client.delete(self.cache_key)
+
+
+class PluginModelCache:
+    """
+    Cache of the model provider list and model schemas of the plugins of a tenant.
+
+    Entries are kept in one Redis hash per tenant, which `invalidate` drops when plugins or credentials of the
+    tenant change, and in an in-process LRU for PLUGIN_MODEL_CACHE_LOCAL_TTL seconds in front of it. Entries are
+    serialized, so every reader gets its own copy to modify.
+    """
+
+    PROVIDERS_FIELD = "providers"
+
+    _local: Optional[LRUCache] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def model_schema_field(plugin_id: str, provider: str, model_type: str, model: str, credentials: dict) -> str:
+        """
+        Get the cache field of a model schema, the schema of a customizable model depends on its credentials
+
+        :return:
+        """
+        fingerprint = hashlib.sha256(json.dumps(credentials, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"schema:{plugin_id}:{provider}:{model_type}:{model}:{fingerprint}"
+
+    @classmethod
+    def get(cls, tenant_id: str, field: str) -> Optional[bytes]:
+        """
+        Get a cached entry of a tenant.
+
+        :param tenant_id: tenant id
+        :param field: cache field
+        :return:
+        """
+        if not dify_config.PLUGIN_MODEL_CACHE_TTL:
+            return None
+
+        key = (tenant_id, field)
+        with cls._lock:
+            local = cls._get_local()
+            entry = local.get(key) if local is not None else None
+        if entry is not None and entry[0] > time.monotonic():
+            return cast(bytes, entry[1])
+
+        data = cast(Optional[bytes], redis_client.hget(cls._cache_key(tenant_id), field))
+        if data is not None:
+            cls._set_local(key, data)
+        return data
+
+    @classmethod
+    def set(cls, tenant_id: str, field: str, data: bytes) -> None:
+        """
+        Cache an entry of a tenant.
+
+        :param tenant_id: tenant id
+        :param field: cache field
+        :param data: serialized entry
+        :return:
+        """
+        if not dify_config.PLUGIN_MODEL_CACHE_TTL:
+            return
+
+        cache_key = cls._cache_key(tenant_id)
+        with redis_client.pipeline() as pipe:
+            pipe.hset(cache_key, field, data)
+            pipe.expire(cache_key, dify_config.PLUGIN_MODEL_CACHE_TTL)
+            pipe.execute()
+        cls._set_local((tenant_id, field), data)
+
+    @classmethod
+    def invalidate(cls, tenant_id: str) -> None:
+        """
+        Drop the cached entries of a tenant.
+        Other processes keep their in-process entries for at most PLUGIN_MODEL_CACHE_LOCAL_TTL seconds.
+
+        :param tenant_id: tenant id
+        :return:
+        """
+        redis_client.delete(cls._cache_key(tenant_id))
+        with cls._lock:
+            local = cls._get_local()
+            if local is not None:
+                for key in [key for key in local.cache if key[0] == tenant_id]:
+                    del local.cache[key]
+
+    @classmethod
+    def _set_local(cls, key: tuple[str, str], data: bytes) -> None:
+        with cls._lock:
+            local = cls._get_local()
+            if local is not None:
+                local.put(key, (time.monotonic() + dify_config.PLUGIN_MODEL_CACHE_LOCAL_TTL, data))
+
+    @classmethod
+    def _get_local(cls) -> Optional[LRUCache]:
+        if not dify_config.PLUGIN_MODEL_CACHE_LOCAL_TTL:
+            return None
+        if cls._local is None or cls._local.capacity != dify_config.PLUGIN_MODEL_CACHE_LOCAL_SIZE:
+            cls._local = LRUCache(dify_config.PLUGIN_MODEL_CACHE_LOCAL_SIZE)
+        return cls._local
+
+    @staticmethod
+    def _cache_key(tenant_id: str) -> str:
+        return f"plugin_model_cache:tenant_id:{tenant_id}"
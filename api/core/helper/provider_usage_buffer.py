@@ -0,0 +1,216 @@
+import logging
+import time
+import uuid
+from collections.abc import Mapping
+from datetime import UTC, datetime
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.provider import Provider, ProviderType
+
+logger = logging.getLogger(__name__)
+
+# number of workspaces flushed per round
+FLUSH_BATCH_SIZE = 100
+# seconds after which usages staged by a flush and not deleted yet are taken as left by a flush that died
+STAGED_USAGE_TIMEOUT = 600
+
+
+class ProviderUsageBuffer:
+    """
+    Quota used and last used time of the providers of workspaces, buffered in Redis instead of updating the provider
+    records on every message.
+
+    Usages are added to per workspace hashes in one round trip, and flushed to the provider records by the flush task
+    at most every PROVIDER_USAGE_FLUSH_INTERVAL seconds, scheduled by the first usage after a flush. Buffered quota
+    used counts when checking the quota of the providers, so limits hold before it is flushed. The buffers outlive
+    the processes that added to them, and any flush writes every workspace with buffered usages.
+
+    A flush renames the hashes of a workspace to staging hashes of its own and deletes them once the provider records
+    are committed, usages staged by a flush that fails to write them are put back, and the ones left by a flush that
+    died are put back by the next flush.
+    """
+
+    _QUOTA_USED_KEY = "provider_usage:quota_used:{}"
+    _LAST_USED_KEY = "provider_usage:last_used:{}"
+    _DIRTY_TENANTS_KEY = "provider_usage:dirty_tenants"
+    _FLUSH_SCHEDULED_KEY = "provider_usage:flush_scheduled"
+    _STAGED_QUOTA_USED_KEY = "provider_usage:staged:quota_used:{}"
+    _STAGED_LAST_USED_KEY = "provider_usage:staged:last_used:{}"
+    # staged usages by time they were staged, as workspace id and flush id
+    _STAGED_KEY = "provider_usage:staged"
+
+    @classmethod
+    def add_quota_used(cls, tenant_id: str, provider_name: str, quota_type: str, used_quota: int) -> None:
+        """
+        Add quota used by a system provider of a workspace, the last used time of the provider is updated as well
+        :param tenant_id: workspace id
+        :param provider_name: provider name
+        :param quota_type: quota type
+        :param used_quota: used quota, in the quota unit of the provider
+        """
+        with redis_client.pipeline() as pipe:
+            pipe.hincrby(cls._QUOTA_USED_KEY.format(tenant_id), f"{provider_name}:{quota_type}", used_quota)
+            pipe.hset(cls._LAST_USED_KEY.format(tenant_id), provider_name, str(time.time()))
+            cls._mark_dirty(pipe, tenant_id)
+
+    @classmethod
+    def add_last_used(cls, tenant_id: str, provider_name: str) -> None:
+        """
+        Update the last used time of the providers of a workspace with a provider name
+        :param tenant_id: workspace id
+        :param provider_name: provider name
+        """
+        with redis_client.pipeline() as pipe:
+            pipe.hset(cls._LAST_USED_KEY.format(tenant_id), provider_name, str(time.time()))
+            cls._mark_dirty(pipe, tenant_id)
+
+    @classmethod
+    def get_quota_used(cls, tenant_id: str) -> dict[tuple[str, str], int]:
+        """
+        Get the quota used by the system providers of a workspace not flushed yet
+        :param tenant_id: workspace id
+        :return: used quota by provider name and quota type
+        """
+        try:
+            quota_used = redis_client.hgetall(cls._QUOTA_USED_KEY.format(tenant_id))
+        except Exception:
+            logger.exception(f"Failed to get buffered quota used of workspace {tenant_id}")
+            return {}
+
+        return {cls._parse_quota_field(field): int(value) for field, value in quota_used.items()}
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Write the buffered usages of every workspace to the provider records
+
+        A workspace failing to be written does not keep the others of its round from being written, its usages are
+        put back and the first error is raised once the round is done.
+        :return: number of workspaces flushed
+        """
+        cls._restore_left_staged()
+        flushed = 0
+        while True:
+            tenant_ids = redis_client.spop(cls._DIRTY_TENANTS_KEY, FLUSH_BATCH_SIZE)
+            if not tenant_ids:
+                return flushed
+            errors = []
+            for tenant_id in tenant_ids:
+                try:
+                    cls._flush_tenant(tenant_id.decode("utf-8"))
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                flushed += 1
+            # workspaces put back would be taken again by the next round
+            if errors:
+                raise errors[0]
+
+    @classmethod
+    def _mark_dirty(cls, pipe, tenant_id: str) -> None:
+        pipe.sadd(cls._DIRTY_TENANTS_KEY, tenant_id)
+        pipe.set(cls._FLUSH_SCHEDULED_KEY, "1", nx=True, ex=dify_config.PROVIDER_USAGE_FLUSH_INTERVAL)
+        *_, flush_scheduled = pipe.execute()
+        if flush_scheduled:
+            from tasks.flush_provider_usage_task import flush_provider_usage_task
+
+            flush_provider_usage_task.apply_async(countdown=dify_config.PROVIDER_USAGE_FLUSH_INTERVAL)
+
+    @classmethod
+    def _flush_tenant(cls, tenant_id: str) -> None:
+        quota_used_key = cls._QUOTA_USED_KEY.format(tenant_id)
+        last_used_key = cls._LAST_USED_KEY.format(tenant_id)
+        with redis_client.pipeline() as pipe:
+            pipe.exists(quota_used_key)
+            pipe.exists(last_used_key)
+            has_quota_used, has_last_used = pipe.execute()
+        if not has_quota_used and not has_last_used:
+            return
+
+        # a flush taking the workspace again meanwhile renames the hashes first and fails this one, which is harmless
+        staged = f"{tenant_id}:{uuid.uuid4().hex}"
+        staged_quota_used_key = cls._STAGED_QUOTA_USED_KEY.format(staged)
+        staged_last_used_key = cls._STAGED_LAST_USED_KEY.format(staged)
+        with redis_client.pipeline() as pipe:
+            if has_quota_used:
+                pipe.rename(quota_used_key, staged_quota_used_key)
+            if has_last_used:
+                pipe.rename(last_used_key, staged_last_used_key)
+            pipe.zadd(cls._STAGED_KEY, {staged: time.time()})
+            pipe.hgetall(staged_quota_used_key)
+            pipe.hgetall(staged_last_used_key)
+            *_, quota_used, last_used = pipe.execute()
+
+        try:
+            cls._write(tenant_id, quota_used, last_used)
+        except Exception:
+            db.session.rollback()
+            logger.exception(f"Failed to flush provider usage of workspace {tenant_id}, put it back")
+            cls._put_back(staged, quota_used, last_used)
+            raise
+
+        with redis_client.pipeline() as pipe:
+            pipe.delete(staged_quota_used_key, staged_last_used_key)
+            pipe.zrem(cls._STAGED_KEY, staged)
+            pipe.execute()
+
+    @classmethod
+    def _restore_left_staged(cls) -> None:
+        """
+        Put back the usages staged by flushes that died before deleting them
+        """
+        for member in redis_client.zrangebyscore(cls._STAGED_KEY, "-inf", time.time() - STAGED_USAGE_TIMEOUT):
+            staged = member.decode("utf-8")
+            with redis_client.pipeline() as pipe:
+                pipe.hgetall(cls._STAGED_QUOTA_USED_KEY.format(staged))
+                pipe.hgetall(cls._STAGED_LAST_USED_KEY.format(staged))
+                quota_used, last_used = pipe.execute()
+            # the flush removing it from the staged usages is the one putting it back
+            if redis_client.zrem(cls._STAGED_KEY, staged):
+                logger.warning(f"Put back provider usage left staged by flush {staged}")
+                cls._put_back(staged, quota_used, last_used)
+
+    @classmethod
+    def _put_back(cls, staged: str, quota_used: Mapping[bytes, bytes], last_used: Mapping[bytes, bytes]) -> None:
+        tenant_id = staged.rsplit(":", 1)[0]
+        quota_used_key = cls._QUOTA_USED_KEY.format(tenant_id)
+        last_used_key = cls._LAST_USED_KEY.format(tenant_id)
+        with redis_client.pipeline() as pipe:
+            for field, value in quota_used.items():
+                pipe.hincrby(quota_used_key, field, int(value))
+            for field, value in last_used.items():
+                pipe.hsetnx(last_used_key, field, value)
+            pipe.delete(cls._STAGED_QUOTA_USED_KEY.format(staged), cls._STAGED_LAST_USED_KEY.format(staged))
+            pipe.zrem(cls._STAGED_KEY, staged)
+            pipe.sadd(cls._DIRTY_TENANTS_KEY, tenant_id)
+            pipe.execute()
+
+    @classmethod
+    def _write(cls, tenant_id: str, quota_used: Mapping[bytes, bytes], last_used: Mapping[bytes, bytes]) -> None:
+        for field, value in quota_used.items():
+            provider_name, quota_type = cls._parse_quota_field(field)
+            used_quota = int(value)
+            if not used_quota:
+                continue
+            db.session.query(Provider).filter(
+                Provider.tenant_id == tenant_id,
+                Provider.provider_name == provider_name,
+                Provider.provider_type == ProviderType.SYSTEM.value,
+                Provider.quota_type == quota_type,
+                Provider.quota_limit > Provider.quota_used,
+            ).update({"quota_used": Provider.quota_used + used_quota})
+
+        for field, value in last_used.items():
+            db.session.query(Provider).filter(
+                Provider.tenant_id == tenant_id,
+                Provider.provider_name == field.decode("utf-8"),
+            ).update({"last_used": datetime.fromtimestamp(float(value), UTC).replace(tzinfo=None)})
+
+        db.session.commit()
+
+    @staticmethod
+    def _parse_quota_field(field: bytes) -> tuple[str, str]:
+        provider_name, quota_type = field.decode("utf-8").rsplit(":", 1)
+        return provider_name, quota_type
@@ -1,11 +1,14 @@
 import concurrent.futures
 import datetime
+import itertools
 import json
 import logging
+import queue
 import re
 import threading
 import time
 import uuid
+from collections.abc import Generator
 from typing import Any, Optional, cast
 
 from flask import current_app
@@ -38,6 +41,7 @@ from libs import helper
 from models.dataset import ChildChunk, Dataset, DatasetProcessRule, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
+from services.entities.knowledge_entities.knowledge_entities import ParentMode
 from services.feature_service import FeatureService
 
 
@@ -69,6 +73,16 @@ class IndexingRunner:
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
+                if self._is_pipelined(dataset_document, processing_rule.to_dict()):
+                    self._run_pipeline(
+                        index_processor=index_processor,
+                        dataset=dataset,
+                        dataset_document=dataset_document,
+                        text_docs=text_docs,
+                        process_rule=processing_rule.to_dict(),
+                    )
+                    continue
+
                 # transform
                 documents = self._transform(
                     index_processor, dataset, text_docs, dataset_document.doc_language, processing_rule.to_dict()
@@ -108,17 +122,6 @@ class IndexingRunner:
             if not dataset:
                 raise ValueError("no dataset found")
 
-            # get exist document_segment list and delete
-            document_segments = DocumentSegment.query.filter_by(
-                dataset_id=dataset.id, document_id=dataset_document.id
-            ).all()
-
-            for document_segment in document_segments:
-                db.session.delete(document_segment)
-                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
-                    # delete child chunks
-                    db.session.query(ChildChunk).filter(ChildChunk.segment_id == document_segment.id).delete()
-            db.session.commit()
             # get the process rule
             processing_rule = (
                 db.session.query(DatasetProcessRule)
@@ -130,6 +133,23 @@ class IndexingRunner:
 
             index_type = dataset_document.doc_form
             index_processor = IndexProcessorFactory(index_type).init_index_processor()
+
+            if dify_config.INDEXING_PIPELINE_BATCH_SIZE:
+                # segments may have been loaded by an interrupted pipelined run, resume after its last checkpoint
+                self._resume_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict())
+                return
+
+            # get exist document_segment list and delete
+            document_segments = DocumentSegment.query.filter_by(
+                dataset_id=dataset.id, document_id=dataset_document.id
+            ).all()
+
+            for document_segment in document_segments:
+                db.session.delete(document_segment)
+                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                    # delete child chunks
+                    db.session.query(ChildChunk).filter(ChildChunk.segment_id == document_segment.id).delete()
+            db.session.commit()
             # extract
             text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
@@ -687,6 +707,17 @@ class IndexingRunner:
         doc_language: str,
         process_rule: dict,
     ) -> list[Document]:
+        documents = index_processor.transform(
+            text_docs,
+            embedding_model_instance=self._get_splitter_embedding_model_instance(dataset),
+            process_rule=process_rule,
+            tenant_id=dataset.tenant_id,
+            doc_language=doc_language,
+        )
+
+        return documents
+
+    def _get_splitter_embedding_model_instance(self, dataset: Dataset) -> Optional[ModelInstance]:
         # get embedding model instance
         embedding_model_instance = None
         if dataset.indexing_technique == "high_quality":
@@ -702,16 +733,7 @@ class IndexingRunner:
                     tenant_id=dataset.tenant_id,
                     model_type=ModelType.TEXT_EMBEDDING,
                 )
-
-        documents = index_processor.transform(
-            text_docs,
-            embedding_model_instance=embedding_model_instance,
-            process_rule=process_rule,
-            tenant_id=dataset.tenant_id,
-            doc_language=doc_language,
-        )
-
-        return documents
+        return embedding_model_instance
 
     def _load_segments(self, dataset, dataset_document, documents):
         # save node to document segment
@@ -743,6 +765,375 @@ class IndexingRunner:
         )
         pass
 
+    @staticmethod
+    def _is_pipelined(dataset_document: DatasetDocument, process_rule: dict) -> bool:
+        """
+        Check if a document is indexed in batches by the pipeline.
+        QA chunks are generated by a model and a full-doc parent spans the whole document, so neither can be split
+        again into the same chunks to resume from a checkpoint.
+        """
+        if not dify_config.INDEXING_PIPELINE_BATCH_SIZE:
+            return False
+        if dataset_document.doc_form == IndexType.PARAGRAPH_INDEX:
+            return True
+        if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+            rules = process_rule.get("rules") or {}
+            return rules.get("parent_mode") != ParentMode.FULL_DOC
+        return False
+
+    def _resume_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        process_rule: dict,
+    ) -> None:
+        """
+        Clean the segments that were not completed and index the rest of the document after the completed ones.
+        Documents that are not pipelined are cleaned and indexed again from the start.
+        """
+        document_segments = (
+            DocumentSegment.query.filter_by(dataset_id=dataset.id, document_id=dataset_document.id)
+            .order_by(DocumentSegment.position)
+            .all()
+        )
+        completed_segments: list[DocumentSegment] = []
+        if self._is_pipelined(dataset_document, process_rule):
+            # batches are loaded in order, so the completed segments are the leading ones
+            completed_segments = list(
+                itertools.takewhile(lambda segment: segment.status == "completed", document_segments)
+            )
+        checkpoint_hashes = [segment.index_node_hash for segment in completed_segments]
+        checkpoint_node_ids = [segment.index_node_id for segment in completed_segments]
+        checkpoint_tokens = sum(segment.tokens for segment in completed_segments)
+        self._clean_segments(
+            index_processor,
+            dataset,
+            dataset_document,
+            [segment.index_node_id for segment in document_segments[len(completed_segments) :]],
+        )
+
+        text_docs = self._extract(index_processor, dataset_document, process_rule)
+        if not self._is_pipelined(dataset_document, process_rule):
+            documents = self._transform(
+                index_processor, dataset, text_docs, dataset_document.doc_language, process_rule
+            )
+            self._load_segments(dataset, dataset_document, documents)
+            self._load(
+                index_processor=index_processor, dataset=dataset, dataset_document=dataset_document, documents=documents
+            )
+            return
+
+        try:
+            self._run_pipeline(
+                index_processor=index_processor,
+                dataset=dataset,
+                dataset_document=dataset_document,
+                text_docs=text_docs,
+                process_rule=process_rule,
+                checkpoint_hashes=checkpoint_hashes,
+                checkpoint_tokens=checkpoint_tokens,
+            )
+        except DocumentCheckpointMismatchError:
+            logging.warning("Document changed since its last checkpoint, document id: {}".format(dataset_document.id))
+            self._clean_segments(index_processor, dataset, dataset_document, checkpoint_node_ids)
+            text_docs = self._extract(index_processor, dataset_document, process_rule)
+            self._run_pipeline(
+                index_processor=index_processor,
+                dataset=dataset,
+                dataset_document=dataset_document,
+                text_docs=text_docs,
+                process_rule=process_rule,
+            )
+
+    @staticmethod
+    def _clean_segments(
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        index_node_ids: list[str],
+    ) -> None:
+        """
+        Delete segments of a document and their child chunks from the index and the database.
+        """
+        if not index_node_ids:
+            return
+        index_processor.clean(dataset, index_node_ids, with_keywords=True, delete_child_chunks=True)
+        segment_ids = db.session.query(DocumentSegment.id).filter(
+            DocumentSegment.document_id == dataset_document.id, DocumentSegment.index_node_id.in_(index_node_ids)
+        )
+        db.session.query(ChildChunk).filter(ChildChunk.segment_id.in_(segment_ids.scalar_subquery())).delete(
+            synchronize_session=False
+        )
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == dataset_document.id, DocumentSegment.index_node_id.in_(index_node_ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _run_pipeline(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        text_docs: list[Document],
+        process_rule: dict,
+        checkpoint_hashes: Optional[list[str]] = None,
+        checkpoint_tokens: int = 0,
+    ) -> None:
+        """
+        Split, embed and load a document in batches of INDEXING_PIPELINE_BATCH_SIZE chunks.
+        Batches are split and saved as segments in this thread and loaded by a loader thread, through a queue of at
+        most INDEXING_PIPELINE_QUEUE_SIZE batches, which embeds the chunks of a batch in parallel. The segments of a
+        loaded batch are marked completed, which is the checkpoint an interrupted run resumes from.
+        """
+        embedding_model_instance = None
+        if dataset.indexing_technique == "high_quality":
+            embedding_model_instance = self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model,
+            )
+
+        indexing_start_at = time.perf_counter()
+        batch_queue: queue.Queue[Optional[list[Document]]] = queue.Queue(
+            maxsize=dify_config.INDEXING_PIPELINE_QUEUE_SIZE
+        )
+        stop_event = threading.Event()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self._load_batches,
+                current_app._get_current_object(),  # type: ignore
+                index_processor,
+                dataset,
+                dataset_document,
+                embedding_model_instance,
+                batch_queue,
+                stop_event,
+            )
+            try:
+                for batch in self._split_to_batches(
+                    index_processor, dataset, text_docs, dataset_document.doc_language, process_rule, checkpoint_hashes
+                ):
+                    self._save_batch_segments(dataset, dataset_document, batch)
+                    self._put_batch(batch_queue, batch, future)
+
+                # all segments are saved, an interrupted run resumes in indexing status from here
+                cur_time = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+                self._update_document_index_status(
+                    document_id=dataset_document.id,
+                    after_indexing_status="indexing",
+                    extra_update_params={
+                        DatasetDocument.cleaning_completed_at: cur_time,
+                        DatasetDocument.splitting_completed_at: cur_time,
+                    },
+                )
+                self._put_batch(batch_queue, None, future)
+            except BaseException:
+                stop_event.set()
+                raise
+            tokens = checkpoint_tokens + future.result()
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+                DatasetDocument.error: None,
+            },
+        )
+
+    def _split_to_batches(
+        self,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        text_docs: list[Document],
+        doc_language: str,
+        process_rule: dict,
+        checkpoint_hashes: Optional[list[str]] = None,
+    ) -> Generator[list[Document], None, None]:
+        """
+        Split text documents into batches of chunks, skipping the chunks up to the checkpoint.
+        Text documents are released from `text_docs` once they are split.
+        """
+        checkpoint_hashes = checkpoint_hashes or []
+        embedding_model_instance = self._get_splitter_embedding_model_instance(dataset)
+        batch_size = dify_config.INDEXING_PIPELINE_BATCH_SIZE
+        batch: list[Document] = []
+        position = 0
+        text_docs.reverse()
+        while text_docs:
+            documents = index_processor.transform(
+                [text_docs.pop()],
+                embedding_model_instance=embedding_model_instance,
+                process_rule=process_rule,
+                tenant_id=dataset.tenant_id,
+                doc_language=doc_language,
+            )
+            for document in documents:
+                position += 1
+                if position <= len(checkpoint_hashes):
+                    # the chunk is already loaded
+                    doc_hash = document.metadata.get("doc_hash") if document.metadata else None
+                    if doc_hash != checkpoint_hashes[position - 1]:
+                        raise DocumentCheckpointMismatchError()
+                    continue
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if position < len(checkpoint_hashes):
+            raise DocumentCheckpointMismatchError()
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _save_batch_segments(dataset: Dataset, dataset_document: DatasetDocument, documents: list[Document]) -> None:
+        doc_store = DatasetDocumentStore(
+            dataset=dataset, user_id=dataset_document.created_by, document_id=dataset_document.id
+        )
+
+        # add document segments
+        doc_store.add_documents(docs=documents, save_child=dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX)
+
+        # update segment status to indexing
+        document_ids = [document.metadata["doc_id"] for document in documents if document.metadata is not None]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == dataset_document.id,
+            DocumentSegment.index_node_id.in_(document_ids),
+        ).update(
+            {
+                DocumentSegment.status: "indexing",
+                DocumentSegment.indexing_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+
+    @staticmethod
+    def _put_batch(
+        batch_queue: queue.Queue[Optional[list[Document]]],
+        batch: Optional[list[Document]],
+        future: concurrent.futures.Future,
+    ) -> None:
+        """
+        Put a batch to the loader queue, waiting while the queue is full and the loader is running.
+        Errors of the loader are raised here.
+        """
+        while True:
+            if future.done():
+                future.result()
+                return
+            try:
+                batch_queue.put(batch, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _load_batches(
+        self,
+        flask_app,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        dataset_document: DatasetDocument,
+        embedding_model_instance: Optional[ModelInstance],
+        batch_queue: queue.Queue[Optional[list[Document]]],
+        stop_event: threading.Event,
+    ) -> int:
+        """
+        Load the batches of the queue, embedding the chunks of a batch in parallel across groups of chunks, while its
+        keyword index is built on a thread of its own, as `_load` does for a whole document.
+        """
+        max_workers = 10
+        with flask_app.app_context(), concurrent.futures.ThreadPoolExecutor(max_workers=max_workers + 1) as executor:
+            tokens = 0
+            while not stop_event.is_set():
+                try:
+                    batch = batch_queue.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if batch is None:
+                    break
+
+                # check document is paused
+                self._check_document_paused_status(dataset_document.id)
+
+                futures = []
+                # parent-child documents have no keyword index
+                if dataset_document.doc_form != IndexType.PARENT_CHILD_INDEX:
+                    futures.append(executor.submit(self._load_batch_keywords, flask_app, dataset, batch))
+
+                if dataset.indexing_technique == "high_quality":
+                    # Distribute documents into multiple groups based on the hash values of page_content
+                    # This is done to prevent multiple threads from processing the same document,
+                    # Thereby avoiding potential database insertion deadlocks
+                    document_groups: list[list[Document]] = [[] for _ in range(max_workers)]
+                    for document in batch:
+                        hash = helper.generate_text_hash(document.page_content)
+                        document_groups[int(hash, 16) % max_workers].append(document)
+                    for group_documents in document_groups:
+                        if not group_documents:
+                            continue
+                        futures.append(
+                            executor.submit(
+                                self._load_batch_vectors,
+                                flask_app,
+                                index_processor,
+                                dataset,
+                                group_documents,
+                                embedding_model_instance,
+                            )
+                        )
+
+                for future in futures:
+                    tokens += future.result()
+
+                # mark the batch completed as the checkpoint, once both of its indexes are loaded
+                document_ids = [document.metadata["doc_id"] for document in batch if document.metadata is not None]
+                db.session.query(DocumentSegment).filter(
+                    DocumentSegment.document_id == dataset_document.id,
+                    DocumentSegment.dataset_id == dataset.id,
+                    DocumentSegment.index_node_id.in_(document_ids),
+                    DocumentSegment.status == "indexing",
+                ).update(
+                    {
+                        DocumentSegment.status: "completed",
+                        DocumentSegment.enabled: True,
+                        DocumentSegment.completed_at: datetime.datetime.now(datetime.UTC).replace(tzinfo=None),
+                    },
+                    synchronize_session=False,
+                )
+                db.session.commit()
+
+            return tokens
+
+    @staticmethod
+    def _load_batch_keywords(flask_app, dataset: Dataset, documents: list[Document]) -> int:
+        with flask_app.app_context():
+            Keyword(dataset).add_texts(documents)
+            return 0
+
+    @staticmethod
+    def _load_batch_vectors(
+        flask_app,
+        index_processor: BaseIndexProcessor,
+        dataset: Dataset,
+        documents: list[Document],
+        embedding_model_instance: Optional[ModelInstance],
+    ) -> int:
+        with flask_app.app_context():
+            tokens = 0
+            if embedding_model_instance:
+                page_content_list = [document.page_content for document in documents]
+                tokens += sum(embedding_model_instance.get_text_embedding_num_tokens(page_content_list))
+
+            index_processor.load(dataset, documents, with_keywords=False)
+            return tokens
+
 
 class DocumentIsPausedError(Exception):
     pass
@@ -750,3 +1141,7 @@ class DocumentIsPausedError(Exception):
 
 class DocumentIsDeletedPausedError(Exception):
     pass
+
+
+class DocumentCheckpointMismatchError(Exception):
+    pass
@@ -1,8 +1,10 @@
-from collections.abc import Sequence
+import logging
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
 from typing import Optional
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
-from core.file import file_manager
+from core.file import FileUploadConfig, file_manager
 from core.model_manager import ModelInstance
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -15,12 +17,25 @@ from core.model_runtime.entities import (
 )
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from factories import file_factory
 from models.model import AppMode, Conversation, Message, MessageFile
-from models.workflow import WorkflowRun
+from models.workflow import Workflow, WorkflowRun
+
+logger = logging.getLogger(__name__)
+
+# token counts of a conversation are kept for a day after its last turn
+TOKEN_COUNT_CACHE_TTL = 86400
 
 
 class TokenBufferMemory:
+    """
+    History of a conversation as prompt messages within a token limit.
+
+    Token counts of history messages are cached in Redis per conversation and model, so a turn only counts the
+    messages answered since the previous turn, and prompt messages are only built for the messages kept.
+    """
+
     def __init__(self, conversation: Conversation, model_instance: ModelInstance) -> None:
         self.conversation = conversation
         self.model_instance = model_instance
@@ -33,8 +48,6 @@ class TokenBufferMemory:
         :param max_token_limit: max token limit
         :param message_limit: message limit
         """
-        app_record = self.conversation.app
-
         # fetch limited messages, and return reversed
         query = (
             db.session.query(
@@ -66,68 +79,173 @@ class TokenBufferMemory:
         if thread_messages and not thread_messages[0].answer:
             thread_messages.pop(0)
 
-        messages = list(reversed(thread_messages))
+        if not thread_messages:
+            return []
+
+        files_by_message_id = self._get_files_by_message_id([message.id for message in thread_messages])
+        file_extra_configs = self._get_file_extra_configs(
+            {message.workflow_run_id for message in thread_messages if message.id in files_by_message_id}
+        )
 
+        token_counts = self._get_cached_token_counts([message.id for message in thread_messages])
+        new_token_counts: dict[str, int] = {}
+
+        # walk backwards from the newest message and keep the messages within the token limit,
+        # the newest message is kept even if it exceeds the limit on its own
         prompt_messages: list[PromptMessage] = []
-        for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
-            if files:
-                file_extra_config = None
-                if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
-                    file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
-                else:
-                    if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
-
-                        if workflow_run and workflow_run.workflow:
-                            file_extra_config = FileUploadConfigManager.convert(
-                                workflow_run.workflow.features_dict, is_vision=False
-                            )
-
-                detail = ImagePromptMessageContent.DETAIL.LOW
-                if file_extra_config and app_record:
-                    file_objs = file_factory.build_from_message_files(
-                        message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
-                    )
-                    if file_extra_config.image_config and file_extra_config.image_config.detail:
-                        detail = file_extra_config.image_config.detail
-                else:
-                    file_objs = []
-
-                if not file_objs:
-                    prompt_messages.append(UserPromptMessage(content=message.query))
-                else:
-                    prompt_message_contents: list[PromptMessageContent] = []
-                    prompt_message_contents.append(TextPromptMessageContent(data=message.query))
-                    for file in file_objs:
-                        prompt_message = file_manager.to_prompt_message_content(
-                            file,
-                            image_detail_config=detail,
-                        )
-                        prompt_message_contents.append(prompt_message)
-
-                    prompt_messages.append(UserPromptMessage(content=prompt_message_contents))
+        curr_message_tokens = 0
+        history = self._iter_prompt_messages(thread_messages, files_by_message_id, file_extra_configs)
+        for field, prompt_message in history:
+            message_tokens = token_counts.get(field)
+            if message_tokens is None:
+                message_tokens = self.model_instance.get_llm_num_tokens([prompt_message])
+                new_token_counts[field] = message_tokens
 
-            else:
-                prompt_messages.append(UserPromptMessage(content=message.query))
+            if prompt_messages and curr_message_tokens + message_tokens > max_token_limit:
+                break
+            prompt_messages.append(prompt_message)
+            curr_message_tokens += message_tokens
 
-            prompt_messages.append(AssistantPromptMessage(content=message.answer))
+        self._set_cached_token_counts(new_token_counts)
 
-        if not prompt_messages:
-            return []
+        return list(reversed(prompt_messages))
+
+    def _iter_prompt_messages(
+        self,
+        thread_messages: list[Message],
+        files_by_message_id: dict[str, list[MessageFile]],
+        file_extra_configs: dict[Optional[str], FileUploadConfig],
+    ) -> Iterator[tuple[str, PromptMessage]]:
+        """
+        Build prompt messages lazily from the newest to the oldest, with their token count cache fields
+        """
+        for message in thread_messages:
+            yield (
+                self._token_count_field(message.id, PromptMessageRole.ASSISTANT),
+                AssistantPromptMessage(content=message.answer),
+            )
+            yield (
+                self._token_count_field(message.id, PromptMessageRole.USER),
+                self._build_user_prompt_message(
+                    message, files_by_message_id.get(message.id, []), file_extra_configs.get(message.workflow_run_id)
+                ),
+            )
+
+    def _get_files_by_message_id(self, message_ids: list[str]) -> dict[str, list[MessageFile]]:
+        """
+        Get files of messages in one query
+        """
+        files_by_message_id: dict[str, list[MessageFile]] = defaultdict(list)
+        files = db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all()
+        for file in files:
+            files_by_message_id[file.message_id].append(file)
+        return files_by_message_id
+
+    def _get_file_extra_configs(self, workflow_run_ids: set[Optional[str]]) -> dict[Optional[str], FileUploadConfig]:
+        """
+        Get file upload configs of messages keyed by their workflow run id,
+        workflows shared by runs are only converted once
+        """
+        if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+            if not workflow_run_ids:
+                return {}
+            file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
+            if not file_extra_config:
+                return {}
+            return dict.fromkeys(workflow_run_ids, file_extra_config)
+
+        run_ids = [workflow_run_id for workflow_run_id in workflow_run_ids if workflow_run_id]
+        if not run_ids:
+            return {}
+
+        workflow_runs = (
+            db.session.query(WorkflowRun.id, WorkflowRun.workflow_id).filter(WorkflowRun.id.in_(run_ids)).all()
+        )
+        workflows = {
+            workflow.id: workflow
+            for workflow in db.session.query(Workflow)
+            .filter(Workflow.id.in_({workflow_run.workflow_id for workflow_run in workflow_runs}))
+            .all()
+        }
+
+        configs_by_workflow_id: dict[str, Optional[FileUploadConfig]] = {}
+        file_extra_configs: dict[Optional[str], FileUploadConfig] = {}
+        for workflow_run in workflow_runs:
+            workflow = workflows.get(workflow_run.workflow_id)
+            if not workflow:
+                continue
+            if workflow.id not in configs_by_workflow_id:
+                configs_by_workflow_id[workflow.id] = FileUploadConfigManager.convert(
+                    workflow.features_dict, is_vision=False
+                )
+            file_extra_config = configs_by_workflow_id[workflow.id]
+            if file_extra_config:
+                file_extra_configs[workflow_run.id] = file_extra_config
+        return file_extra_configs
+
+    def _build_user_prompt_message(
+        self, message: Message, files: list[MessageFile], file_extra_config: Optional[FileUploadConfig]
+    ) -> UserPromptMessage:
+        app_record = self.conversation.app
+        if not files or not file_extra_config or not app_record:
+            return UserPromptMessage(content=message.query)
+
+        file_objs = file_factory.build_from_message_files(
+            message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
+        )
+        if not file_objs:
+            return UserPromptMessage(content=message.query)
+
+        detail = ImagePromptMessageContent.DETAIL.LOW
+        if file_extra_config.image_config and file_extra_config.image_config.detail:
+            detail = file_extra_config.image_config.detail
+
+        prompt_message_contents: list[PromptMessageContent] = []
+        prompt_message_contents.append(TextPromptMessageContent(data=message.query))
+        for file in file_objs:
+            prompt_message_content = file_manager.to_prompt_message_content(
+                file,
+                image_detail_config=detail,
+            )
+            prompt_message_contents.append(prompt_message_content)
+
+        return UserPromptMessage(content=prompt_message_contents)
+
+    def _token_count_field(self, message_id: str, role: PromptMessageRole) -> str:
+        return f"{self.model_instance.provider}:{self.model_instance.model}:{message_id}:{role.value}"
+
+    def _token_count_cache_key(self) -> str:
+        return f"conversation_message_tokens:conversation_id:{self.conversation.id}"
+
+    def _get_cached_token_counts(self, message_ids: list[str]) -> dict[str, int]:
+        """
+        Get token counts of messages counted in previous turns of the conversation
+        """
+        fields = [
+            self._token_count_field(message_id, role)
+            for message_id in message_ids
+            for role in (PromptMessageRole.USER, PromptMessageRole.ASSISTANT)
+        ]
+        try:
+            values = redis_client.hmget(self._token_count_cache_key(), fields)
+        except Exception:
+            logger.exception("Failed to get cached token counts of conversation %s", self.conversation.id)
+            return {}
 
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        return {field: int(value) for field, value in zip(fields, values) if value is not None}
 
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+    def _set_cached_token_counts(self, token_counts: dict[str, int]) -> None:
+        if not token_counts:
+            return
 
-        return prompt_messages
+        cache_key = self._token_count_cache_key()
+        try:
+            with redis_client.pipeline() as pipe:
+                pipe.hset(cache_key, mapping=token_counts)
+                pipe.expire(cache_key, TOKEN_COUNT_CACHE_TTL)
+                pipe.execute()
+        except Exception:
+            logger.exception("Failed to cache token counts of conversation %s", self.conversation.id)
 
     def get_history_prompt_text(
         self,
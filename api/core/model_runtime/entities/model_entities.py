@@ -143,6 +143,7 @@ class ModelPropertyKey(Enum):
     WORD_LIMIT = "word_limit"
     AUDIO_TYPE = "audio_type"
     MAX_WORKERS = "max_workers"
+    TOKENIZER = "tokenizer"
 
 
 class ProviderModel(BaseModel):
@@ -19,6 +19,7 @@ from core.model_runtime.entities.model_entities import (
     PriceType,
 )
 from core.model_runtime.model_providers.__base.ai_model import AIModel
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
 from core.plugin.manager.model import PluginModelManager
 
 logger = logging.getLogger(__name__)
@@ -295,6 +296,11 @@ class LargeLanguageModel(AIModel):
         :param tools: tools for tool calling
         :return:
         """
+        if dify_config.LOCAL_TOKEN_COUNTING_ENABLED:
+            encoding_name = LocalTokenizer.get_encoding_name(model, self.get_model_schema(model, credentials))
+            if encoding_name:
+                return LocalTokenizer.get_num_tokens(encoding_name, prompt_messages, tools)
+
         plugin_model_manager = PluginModelManager()
         return plugin_model_manager.get_llm_num_tokens(
             tenant_id=self.tenant_id,
@@ -0,0 +1,186 @@
+import json
+import logging
+from collections.abc import Sequence
+from threading import Lock
+from typing import Any, Optional, cast
+
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    PromptMessage,
+    PromptMessageContentType,
+    PromptMessageTool,
+    TextPromptMessageContent,
+)
+from core.model_runtime.entities.model_entities import AIModelEntity, ModelPropertyKey
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+from libs.helper import generate_text_hash
+
+logger = logging.getLogger(__name__)
+
+GPT2_ENCODING = "gpt2"
+
+# tokenizer of models that count their tokens with the plugin
+PLUGIN_TOKENIZER = "plugin"
+
+# tokens wrapping each message and priming the reply, as counted for chat models of OpenAI
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_PER_REPLY = 3
+
+_encoders: dict[str, Any] = {}
+_encoders_lock = Lock()
+_counts: Optional[LRUCache] = None
+_counts_lock = Lock()
+
+
+class LocalTokenizer:
+    """
+    Count tokens of prompt messages in process instead of asking the plugin of the model.
+
+    The tokenizer of a model is the `tokenizer` property of its schema, a tiktoken encoding name or "plugin" to keep
+    counting with the plugin. Models without it use the encoding tiktoken knows for the model name, or GPT-2.
+    Counts are memoized per encoding and text, so counting a conversation again after trimming its history only
+    tokenizes texts not seen before.
+    """
+
+    @staticmethod
+    def get_encoding_name(model: str, model_schema: Optional[AIModelEntity]) -> Optional[str]:
+        """
+        Get the encoding to count the tokens of a model with
+
+        :param model: model name
+        :param model_schema: model schema
+        :return: encoding name, None if the model counts its tokens with the plugin or no tokenizer can be loaded
+        """
+        tokenizer = model_schema.model_properties.get(ModelPropertyKey.TOKENIZER) if model_schema else None
+        if tokenizer == PLUGIN_TOKENIZER:
+            return None
+
+        encoding_name = str(tokenizer) if tokenizer else GPT2_ENCODING
+        if not tokenizer:
+            try:
+                import tiktoken
+
+                encoding_name = tiktoken.encoding_name_for_model(model)
+            except KeyError:
+                pass
+
+        if LocalTokenizer._get_encoder(encoding_name) is None:
+            return None
+        return encoding_name
+
+    @classmethod
+    def get_num_tokens(
+        cls,
+        encoding_name: str,
+        prompt_messages: Sequence[PromptMessage],
+        tools: Optional[Sequence[PromptMessageTool]] = None,
+    ) -> int:
+        """
+        Get number of tokens of prompt messages and tools
+
+        :param encoding_name: encoding name
+        :param prompt_messages: prompt messages
+        :param tools: tools for tool calling
+        :return:
+        """
+        num_tokens = sum(cls.get_message_num_tokens(encoding_name, message) for message in prompt_messages)
+        if prompt_messages:
+            num_tokens += TOKENS_PER_REPLY
+        for tool in tools or []:
+            num_tokens += cls.get_text_num_tokens(
+                encoding_name,
+                json.dumps(
+                    {"name": tool.name, "description": tool.description, "parameters": tool.parameters},
+                    ensure_ascii=False,
+                ),
+            )
+        return num_tokens
+
+    @classmethod
+    def get_message_num_tokens(cls, encoding_name: str, message: PromptMessage) -> int:
+        """
+        Get number of tokens of a prompt message, only text contents are counted
+
+        :param encoding_name: encoding name
+        :param message: prompt message
+        :return:
+        """
+        num_tokens = TOKENS_PER_MESSAGE
+        if isinstance(message.content, str):
+            num_tokens += cls.get_text_num_tokens(encoding_name, message.content)
+        elif message.content:
+            for content in message.content:
+                if content.type == PromptMessageContentType.TEXT and isinstance(content, TextPromptMessageContent):
+                    num_tokens += cls.get_text_num_tokens(encoding_name, content.data)
+        if message.name:
+            num_tokens += TOKENS_PER_NAME + cls.get_text_num_tokens(encoding_name, message.name)
+        if isinstance(message, AssistantPromptMessage):
+            for tool_call in message.tool_calls:
+                num_tokens += cls.get_text_num_tokens(encoding_name, tool_call.function.name)
+                num_tokens += cls.get_text_num_tokens(encoding_name, tool_call.function.arguments)
+        return num_tokens
+
+    @classmethod
+    def get_text_num_tokens(cls, encoding_name: str, text: str) -> int:
+        """
+        Get number of tokens of a text
+
+        :param encoding_name: encoding name
+        :param text: text
+        :return:
+        """
+        if not text:
+            return 0
+
+        global _counts
+        # keyed by a hash so the memo does not keep the texts alive
+        key = (encoding_name, generate_text_hash(text))
+        if dify_config.LOCAL_TOKENIZER_CACHE_SIZE:
+            with _counts_lock:
+                if _counts is None or _counts.capacity != dify_config.LOCAL_TOKENIZER_CACHE_SIZE:
+                    _counts = LRUCache(dify_config.LOCAL_TOKENIZER_CACHE_SIZE)
+                num_tokens = cast(Optional[int], _counts.get(key))
+            if num_tokens is not None:
+                return num_tokens
+
+        encoder = cls._get_encoder(encoding_name)
+        if encoder is None:
+            raise ValueError(f"Tokenizer {encoding_name} is not available")
+        # tiktoken encodings count special tokens in the text as plain text
+        num_tokens = len(getattr(encoder, "encode_ordinary", encoder.encode)(text))
+
+        if dify_config.LOCAL_TOKENIZER_CACHE_SIZE:
+            with _counts_lock:
+                if _counts is not None:
+                    _counts.put(key, num_tokens)
+        return num_tokens
+
+    @staticmethod
+    def _get_encoder(encoding_name: str) -> Optional[Any]:
+        if encoding_name in _encoders:
+            return _encoders[encoding_name]
+
+        with _encoders_lock:
+            if encoding_name not in _encoders:
+                _encoders[encoding_name] = _load_encoder(encoding_name)
+            return _encoders[encoding_name]
+
+
+def _load_encoder(encoding_name: str) -> Optional[Any]:
+    if encoding_name != GPT2_ENCODING:
+        try:
+            import tiktoken
+
+            return tiktoken.get_encoding(encoding_name)
+        except Exception:
+            # unknown encodings and encodings that can not be downloaded count with GPT-2
+            logger.warning(f"Failed to load tokenizer {encoding_name}, fallback to GPT-2")
+
+    try:
+        return GPT2Tokenizer.get_encoder()
+    except Exception:
+        logger.warning(f"Failed to load GPT-2 tokenizer, tokens of {encoding_name} are counted with the plugin")
+        return None
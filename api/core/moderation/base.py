@@ -75,6 +75,17 @@ class Moderation(Extensible, ABC):
         """
         raise NotImplementedError
 
+    def moderation_for_outputs_chunk(self, text: str) -> Optional[ModerationOutputsResult]:
+        """
+        Moderation for outputs fed in chunks.
+        While LLM outputs content, this method is called with each part of the output content not reviewed yet,
+        so moderations keeping the review state of the previous parts do not review them again.
+
+        :param text: LLM output content following the content of the previous calls
+        :return: result of the output content so far, None if the moderation only reviews whole output contents
+        """
+        return None
+
     @classmethod
     def _validate_inputs_and_outputs_config(cls, config: dict, is_preset_response_required: bool) -> None:
         # inputs_config
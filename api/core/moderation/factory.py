@@ -1,3 +1,5 @@
+from typing import Optional
+
 from core.extension.extensible import ExtensionModule
 from core.moderation.base import Moderation, ModerationInputsResult, ModerationOutputsResult
 from extensions.ext_code_based_extension import code_based_extension
@@ -47,3 +49,13 @@ class ModerationFactory:
         :return:
         """
         return self.__extension_instance.moderation_for_outputs(text)
+
+    def moderation_for_outputs_chunk(self, text: str) -> Optional[ModerationOutputsResult]:
+        """
+        Moderation for outputs fed in chunks.
+        While LLM outputs content, this method is called with each part of the output content not reviewed yet.
+
+        :param text: LLM output content following the content of the previous calls
+        :return: result of the output content so far, None if the moderation only reviews whole output contents
+        """
+        return self.__extension_instance.moderation_for_outputs_chunk(text)
@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+from collections.abc import Sequence
+from typing import Optional, cast
+
+from core.helper.lru_cache import LRUCache
+from libs import helper
+
+# number of compiled keyword lists kept per process
+MATCHER_CACHE_SIZE = 256
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive matcher of many keywords at once, an Aho–Corasick automaton of the lowercased keywords.
+
+    Checking a text scans it once whatever the number of keywords, and a `KeywordMatchStream` scans a text fed in
+    chunks without scanning any chunk again. Matchers are immutable and cached by the hash of their keywords.
+    """
+
+    _cache: Optional[LRUCache] = None
+    _lock = threading.Lock()
+
+    def __init__(self, keywords: Sequence[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._matched: list[bool] = [False]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword.lower())
+        self._link()
+
+    @classmethod
+    def get(cls, keywords: Sequence[str]) -> "KeywordMatcher":
+        """
+        Get the matcher of keywords, compiling it on a cache miss
+        :param keywords: keywords
+        :return: matcher
+        """
+        key = helper.generate_text_hash("\n".join(keywords))
+        with cls._lock:
+            if cls._cache is None:
+                cls._cache = LRUCache(MATCHER_CACHE_SIZE)
+            matcher = cast(Optional[KeywordMatcher], cls._cache.get(key))
+        if matcher is not None:
+            return matcher
+
+        matcher = cls(keywords)
+        with cls._lock:
+            cls._cache.put(key, matcher)
+        return matcher
+
+    def search(self, text: str) -> bool:
+        """
+        Check if the text contains any keyword
+        :param text: text
+        :return:
+        """
+        return self.stream().feed(text)
+
+    def stream(self) -> "KeywordMatchStream":
+        """
+        Start matching a text fed in chunks
+        """
+        return KeywordMatchStream(self)
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._matched.append(False)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._matched[state] = True
+
+    def _link(self) -> None:
+        # breadth first, so the failure state of a state is linked before the states it leads to
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._matched[next_state] = self._matched[next_state] or self._matched[self._fail[next_state]]
+                queue.append(next_state)
+
+    def _next(self, state: int, char: str) -> int:
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+
+class KeywordMatchStream:
+    """
+    Match state of a text fed in chunks, it stays matched once a keyword is found
+    """
+
+    def __init__(self, matcher: KeywordMatcher) -> None:
+        self._matcher = matcher
+        self._state = 0
+        self.matched = False
+
+    def feed(self, text: str) -> bool:
+        """
+        Feed the next chunk of the text
+        :param text: chunk
+        :return: whether the text fed so far contains any keyword
+        """
+        if self.matched:
+            return True
+
+        matcher = self._matcher
+        state = self._state
+        for char in text.lower():
+            state = matcher._next(state, char)
+            if matcher._matched[state]:
+                self.matched = True
+                break
+        self._state = state
+        return self.matched
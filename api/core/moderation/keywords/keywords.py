@@ -1,12 +1,16 @@
-from collections.abc import Sequence
-from typing import Any
+from typing import Any, Optional
 
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
+from core.moderation.keywords.keyword_matcher import KeywordMatcher, KeywordMatchStream
 
 
 class KeywordsModeration(Moderation):
     name: str = "keywords"
 
+    def __init__(self, app_id: str, tenant_id: str, config: Optional[dict] = None) -> None:
+        super().__init__(app_id, tenant_id, config)
+        self._output_stream: Optional[KeywordMatchStream] = None
+
     @classmethod
     def validate_config(cls, tenant_id: str, config: dict) -> None:
         """
@@ -66,8 +70,28 @@ class KeywordsModeration(Moderation):
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
+    def moderation_for_outputs_chunk(self, text: str) -> Optional[ModerationOutputsResult]:
+        flagged = False
+        preset_response = ""
+        if self.config is None:
+            raise ValueError("The config is not set.")
+
+        if self.config["outputs_config"]["enabled"]:
+            if self._output_stream is None:
+                # Filter out empty values
+                keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
+                self._output_stream = KeywordMatcher.get(keywords_list).stream()
+
+            flagged = self._output_stream.feed(text)
+            preset_response = self.config["outputs_config"]["preset_response"]
+
+        return ModerationOutputsResult(
+            flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
+        )
+
     def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
-        return any(self._check_keywords_in_value(keywords_list, value) for value in inputs.values())
+        matcher = KeywordMatcher.get(keywords_list)
+        return any(self._check_keywords_in_value(matcher, value) for value in inputs.values())
 
-    def _check_keywords_in_value(self, keywords_list: Sequence[str], value: Any) -> bool:
-        return any(keyword.lower() in str(value).lower() for keyword in keywords_list)
+    def _check_keywords_in_value(self, matcher: KeywordMatcher, value: Any) -> bool:
+        return matcher.search(str(value))
@@ -32,6 +32,7 @@ class OutputModeration(BaseModel):
     buffer: str = ""
     is_final_chunk: bool = False
     final_output: Optional[str] = None
+    moderation_factory: Optional[ModerationFactory] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def should_direct_output(self) -> bool:
@@ -95,10 +96,14 @@ class OutputModeration(BaseModel):
                         time.sleep(1)
                         continue
 
+                moderated_length = current_length
                 current_length = buffer_length
 
                 result = self.moderation(
-                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
+                    tenant_id=self.tenant_id,
+                    app_id=self.app_id,
+                    moderation_buffer=moderation_buffer,
+                    moderated_length=moderated_length,
                 )
 
                 if not result or not result.flagged:
@@ -117,13 +122,29 @@ class OutputModeration(BaseModel):
                 if result.action == ModerationAction.DIRECT_OUTPUT:
                     break
 
-    def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
+    def moderation(
+        self, tenant_id: str, app_id: str, moderation_buffer: str, moderated_length: Optional[int] = None
+    ) -> Optional[ModerationOutputsResult]:
+        """
+        Moderate the output buffer
+        :param tenant_id: tenant id
+        :param app_id: app id
+        :param moderation_buffer: output buffer
+        :param moderated_length: length of the buffer moderated by the previous calls of the worker,
+            moderations reviewing outputs in chunks only review the rest of the buffer
+        :return:
+        """
         try:
-            moderation_factory = ModerationFactory(
-                name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
-            )
+            if self.moderation_factory is None:
+                self.moderation_factory = ModerationFactory(
+                    name=self.rule.type, app_id=app_id, tenant_id=tenant_id, config=self.rule.config
+                )
 
-            result: ModerationOutputsResult = moderation_factory.moderation_for_outputs(moderation_buffer)
+            result: Optional[ModerationOutputsResult] = None
+            if moderated_length is not None:
+                result = self.moderation_factory.moderation_for_outputs_chunk(moderation_buffer[moderated_length:])
+            if result is None:
+                result = self.moderation_factory.moderation_for_outputs(moderation_buffer)
             return result
         except Exception as e:
             logger.exception(f"Moderation Output error, app_id: {app_id}")
@@ -24,3 +24,10 @@ class BaseTraceInstance(ABC):
         Subclasses must implement specific tracing logic for activities.
         """
         ...
+
+    def flush(self):
+        """
+        Send the traces buffered by the client of the service.
+        Called once after a batch of traces, clients that send traces as they come do nothing.
+        """
+        return None
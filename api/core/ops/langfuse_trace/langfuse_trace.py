@@ -401,6 +401,10 @@ class LangFuseDataTrace(BaseTraceInstance):
         )
         self.add_span(langfuse_span_data=name_generation_span_data)
 
+    def flush(self):
+        # the client ingests the traces of its queue in batches
+        self.langfuse_client.flush()
+
     def add_trace(self, langfuse_trace_data: Optional[LangfuseTrace] = None):
         format_trace_data = filter_none_values(langfuse_trace_data.model_dump()) if langfuse_trace_data else {}
         try:
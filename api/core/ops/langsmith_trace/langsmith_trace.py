@@ -471,6 +471,12 @@ class LangSmithDataTrace(BaseTraceInstance):
 
         self.add_run(name_run)
 
+    def flush(self):
+        # the client ingests the runs of its tracing queue in batches, wait until the queue is drained
+        tracing_queue = self.langsmith_client.tracing_queue
+        if tracing_queue is not None:
+            tracing_queue.join()
+
     def add_run(self, run_data: LangSmithRunModel):
         data = run_data.model_dump()
         if self.project_id:
@@ -73,6 +73,7 @@ class OpikDataTrace(BaseTraceInstance):
             workspace=opik_config.workspace,
             host=opik_config.url,
             api_key=opik_config.api_key,
+            _use_batching=True,
         )
         self.project = opik_config.project
         self.file_base_url = os.getenv("FILES_URL", "http://127.0.0.1:5001")
@@ -438,6 +439,10 @@ class OpikDataTrace(BaseTraceInstance):
 
         self.add_span(span_data)
 
+    def flush(self):
+        # traces and spans are created in batches
+        self.opik_client.flush()
+
     def add_trace(self, opik_trace_data: dict) -> Trace:
         try:
             trace = self.opik_client.trace(**opik_trace_data)
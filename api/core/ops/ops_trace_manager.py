@@ -1,18 +1,23 @@
+import base64
 import json
 import logging
 import os
 import queue
 import threading
 import time
+import zlib
 from datetime import timedelta
-from typing import Any, Optional, Union
+from typing import Any, Optional, Union, cast
 from uuid import UUID, uuid4
 
 from flask import current_app
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
+from core.helper.lru_cache import LRUCache
+from core.ops.base_trace_instance import BaseTraceInstance
 from core.ops.entities.config_entity import (
     OPS_FILE_PATH,
     LangfuseConfig,
@@ -37,9 +42,10 @@ from core.ops.opik_trace.opik_trace import OpikDataTrace
 from core.ops.utils import get_message_data
 from extensions.ext_database import db
 from extensions.ext_storage import storage
+from libs import helper
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_tasks_batch
 
 provider_config_map: dict[str, dict[str, Any]] = {
     TracingProviderEnum.LANGFUSE.value: {
@@ -64,6 +70,11 @@ provider_config_map: dict[str, dict[str, Any]] = {
 
 
 class OpsTraceManager:
+    # trace instances keyed by app id, tracing provider and hash of the encrypted tracing config, so the clients of
+    # the services and the batches they buffer are reused until the config changes
+    _trace_instance_cache: Optional[LRUCache] = None
+    _trace_instance_lock = threading.Lock()
+
     @classmethod
     def encrypt_tracing_config(
         cls, tenant_id: str, tracing_provider: str, tracing_config: dict, current_trace_config=None
@@ -207,17 +218,59 @@ class OpsTraceManager:
         if tracing_provider is None or tracing_provider not in provider_config_map:
             return None
 
-        # decrypt_token
-        decrypt_trace_config = cls.get_decrypted_tracing_config(app_id, tracing_provider)
-        if app_ops_trace_config.get("enabled"):
-            trace_instance, config_class = (
-                provider_config_map[tracing_provider]["trace_instance"],
-                provider_config_map[tracing_provider]["config_class"],
-            )
-            tracing_instance = trace_instance(config_class(**decrypt_trace_config))
+        if not app_ops_trace_config.get("enabled"):
+            return None
+
+        trace_config_data: Optional[TraceAppConfig] = (
+            db.session.query(TraceAppConfig)
+            .filter(TraceAppConfig.app_id == app_id, TraceAppConfig.tracing_provider == tracing_provider)
+            .first()
+        )
+        if not trace_config_data:
+            return None
+
+        cache_key = (
+            app_id,
+            tracing_provider,
+            helper.generate_text_hash(json.dumps(trace_config_data.tracing_config, sort_keys=True)),
+        )
+        tracing_instance = cls._get_cached_trace_instance(cache_key)
+        if tracing_instance is not None:
             return tracing_instance
 
-        return None
+        # decrypt_token
+        decrypt_trace_config = cls.decrypt_tracing_config(
+            app.tenant_id, tracing_provider, trace_config_data.tracing_config
+        )
+        trace_instance, config_class = (
+            provider_config_map[tracing_provider]["trace_instance"],
+            provider_config_map[tracing_provider]["config_class"],
+        )
+        tracing_instance = trace_instance(config_class(**decrypt_trace_config))
+        cls._set_cached_trace_instance(cache_key, tracing_instance)
+        return tracing_instance
+
+    @classmethod
+    def _get_cached_trace_instance(cls, key: tuple[str, str, str]) -> Optional[BaseTraceInstance]:
+        if not dify_config.OPS_TRACE_INSTANCE_CACHE_SIZE:
+            return None
+
+        with cls._trace_instance_lock:
+            if (
+                cls._trace_instance_cache is None
+                or cls._trace_instance_cache.capacity != dify_config.OPS_TRACE_INSTANCE_CACHE_SIZE
+            ):
+                cls._trace_instance_cache = LRUCache(dify_config.OPS_TRACE_INSTANCE_CACHE_SIZE)
+            return cast(Optional[BaseTraceInstance], cls._trace_instance_cache.get(key))
+
+    @classmethod
+    def _set_cached_trace_instance(cls, key: tuple[str, str, str], trace_instance: BaseTraceInstance) -> None:
+        if not dify_config.OPS_TRACE_INSTANCE_CACHE_SIZE:
+            return
+
+        with cls._trace_instance_lock:
+            if cls._trace_instance_cache is not None:
+                cls._trace_instance_cache.put(key, trace_instance)
 
     @classmethod
     def get_app_config_through_message_id(cls, message_id: str):
@@ -792,20 +845,31 @@ class TraceQueueManager:
 
     def send_to_celery(self, tasks: list[TraceTask]):
         with self.flask_app.app_context():
+            tasks_data: list[str] = []
             for task in tasks:
                 if task.app_id is None:
                     continue
-                file_id = uuid4().hex
-                trace_info = task.execute()
+                try:
+                    trace_info = task.execute()
+                except Exception:
+                    logging.exception(f"Error preprocessing trace task, trace_type {task.trace_type}")
+                    continue
                 task_data = TaskData(
                     app_id=task.app_id,
                     trace_info_type=type(trace_info).__name__,
                     trace_info=trace_info.model_dump() if trace_info else None,
                 )
-                file_path = f"{OPS_FILE_PATH}{task.app_id}/{file_id}.json"
-                storage.save(file_path, task_data.model_dump_json().encode("utf-8"))
-                file_info = {
-                    "file_id": file_id,
-                    "app_id": task.app_id,
-                }
-                process_trace_tasks.delay(file_info)
+                tasks_data.append(task_data.model_dump_json())
+
+            if not tasks_data:
+                return
+
+            # one compressed payload per batch, inline in the message unless it is too large for the broker
+            payload = zlib.compress(f"[{','.join(tasks_data)}]".encode())
+            if len(payload) > dify_config.OPS_TRACE_BATCH_INLINE_MAX_SIZE:
+                file_path = f"{OPS_FILE_PATH}batches/{uuid4().hex}.json.zlib"
+                storage.save(file_path, payload)
+                batch_info = {"file_path": file_path}
+            else:
+                batch_info = {"payload": base64.b64encode(payload).decode("ascii")}
+            process_trace_tasks_batch.delay(batch_info)
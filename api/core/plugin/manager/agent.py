@@ -30,6 +30,7 @@ class PluginAgentManager(BasePluginManager):
             list[PluginAgentProviderEntity],
             params={"page": 1, "page_size": 256},
             transformer=transformer,
+            timeout=self._management_timeout(),
         )
 
         for provider in response:
@@ -63,6 +64,7 @@ class PluginAgentManager(BasePluginManager):
             PluginAgentProviderEntity,
             params={"provider": agent_provider_id.provider_name, "plugin_id": agent_provider_id.plugin_id},
             transformer=transformer,
+            timeout=self._management_timeout(),
         )
 
         response.declaration.identity.name = f"{response.plugin_id}/{response.declaration.identity.name}"
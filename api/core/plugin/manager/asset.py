@@ -6,7 +6,9 @@ class PluginAssetManager(BasePluginManager):
         """
         Fetch an asset by id.
         """
-        response = self._request(method="GET", path=f"plugin/{tenant_id}/asset/{id}")
+        response = self._request(
+            method="GET", path=f"plugin/{tenant_id}/asset/{id}", timeout=self._management_timeout()
+        )
         if response.status_code != 200:
             raise ValueError(f"can not found asset {id}")
         return response.content
@@ -1,6 +1,7 @@
 import inspect
 import json
 import logging
+import time
 from collections.abc import Callable, Generator
 from typing import TypeVar
 
@@ -28,6 +29,7 @@ from core.plugin.manager.exc import (
     PluginPermissionDeniedError,
     PluginUniqueIdentifierError,
 )
+from core.plugin.manager.http_client import get_session, plugin_daemon_request_stats
 
 plugin_daemon_inner_api_baseurl = dify_config.PLUGIN_DAEMON_URL
 plugin_daemon_inner_api_key = dify_config.PLUGIN_DAEMON_KEY
@@ -47,9 +49,12 @@ class BasePluginManager:
         params: dict | None = None,
         files: dict | None = None,
         stream: bool = False,
+        timeout: tuple[float, float] | None = None,
     ) -> requests.Response:
         """
         Make a request to the plugin daemon inner API.
+
+        `timeout` is the (connect, read) timeout of the request, it defaults to the one of calls dispatched to plugins.
         """
         url = URL(str(plugin_daemon_inner_api_baseurl)) / path
         headers = headers or {}
@@ -59,16 +64,36 @@ class BasePluginManager:
         if headers.get("Content-Type") == "application/json" and isinstance(data, dict):
             data = json.dumps(data)
 
+        plugin_id = headers.get("X-Plugin-ID", "")
+        plugin_daemon_request_stats.start(plugin_id)
+        start_at = time.perf_counter()
+        failed = True
         try:
-            response = requests.request(
-                method=method, url=str(url), headers=headers, data=data, params=params, stream=stream, files=files
+            response = get_session().request(
+                method=method,
+                url=str(url),
+                headers=headers,
+                data=data,
+                params=params,
+                stream=stream,
+                files=files,
+                timeout=timeout or (dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT, dify_config.PLUGIN_DAEMON_READ_TIMEOUT),
             )
-        except requests.exceptions.ConnectionError:
+            failed = False
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
             logger.exception("Request to Plugin Daemon Service failed")
             raise PluginDaemonInnerError(code=-500, message="Request to Plugin Daemon Service failed")
+        finally:
+            plugin_daemon_request_stats.finish(plugin_id, time.perf_counter() - start_at, failed)
 
         return response
 
+    def _management_timeout(self) -> tuple[float, float]:
+        """
+        Timeout of management calls, which are answered by the plugin daemon itself without running a plugin.
+        """
+        return (dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT, dify_config.PLUGIN_DAEMON_MANAGEMENT_READ_TIMEOUT)
+
     def _stream_request(
         self,
         method: str,
@@ -77,17 +102,20 @@ class BasePluginManager:
         headers: dict | None = None,
         data: bytes | dict | None = None,
         files: dict | None = None,
+        timeout: tuple[float, float] | None = None,
     ) -> Generator[bytes, None, None]:
         """
         Make a stream request to the plugin daemon inner API
         """
-        response = self._request(method, path, headers, data, params, files, stream=True)
-        for line in response.iter_lines():
-            line = line.decode("utf-8").strip()
-            if line.startswith("data:"):
-                line = line[5:].strip()
-            if line:
-                yield line
+        response = self._request(method, path, headers, data, params, files, stream=True, timeout=timeout)
+        # close the response even if the stream is not consumed, to release its connection to the pool
+        with response:
+            for line in response.iter_lines():
+                line = line.decode("utf-8").strip()
+                if line.startswith("data:"):
+                    line = line[5:].strip()
+                if line:
+                    yield line
 
     def _stream_request_with_model(
         self,
@@ -98,11 +126,12 @@ class BasePluginManager:
         data: bytes | dict | None = None,
         params: dict | None = None,
         files: dict | None = None,
+        timeout: tuple[float, float] | None = None,
     ) -> Generator[T, None, None]:
         """
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
-        for line in self._stream_request(method, path, params, headers, data, files):
+        for line in self._stream_request(method, path, params, headers, data, files, timeout):
             yield type(**json.loads(line))  # type: ignore
 
     def _request_with_model(
@@ -114,11 +143,12 @@ class BasePluginManager:
         data: bytes | None = None,
         params: dict | None = None,
         files: dict | None = None,
+        timeout: tuple[float, float] | None = None,
     ) -> T:
         """
         Make a request to the plugin daemon inner API and return the response as a model.
         """
-        response = self._request(method, path, headers, data, params, files)
+        response = self._request(method, path, headers, data, params, files, timeout=timeout)
         return type(**response.json())  # type: ignore
 
     def _request_with_plugin_daemon_response(
@@ -131,11 +161,12 @@ class BasePluginManager:
         params: dict | None = None,
         files: dict | None = None,
         transformer: Callable[[dict], dict] | None = None,
+        timeout: tuple[float, float] | None = None,
     ) -> T:
         """
         Make a request to the plugin daemon inner API and return the response as a model.
         """
-        response = self._request(method, path, headers, data, params, files)
+        response = self._request(method, path, headers, data, params, files, timeout=timeout)
         json_response = response.json()
         if transformer:
             json_response = transformer(json_response)
@@ -163,11 +194,12 @@ class BasePluginManager:
         data: bytes | dict | None = None,
         params: dict | None = None,
         files: dict | None = None,
+        timeout: tuple[float, float] | None = None,
     ) -> Generator[T, None, None]:
         """
         Make a stream request to the plugin daemon inner API and yield the response as a model.
         """
-        for line in self._stream_request(method, path, params, headers, data, files):
+        for line in self._stream_request(method, path, params, headers, data, files, timeout):
             line_data = None
             try:
                 line_data = json.loads(line)
@@ -12,6 +12,8 @@ class PluginDebuggingManager(BasePluginManager):
         class Response(BaseModel):
             key: str
 
-        response = self._request_with_plugin_daemon_response("POST", f"plugin/{tenant_id}/debugging/key", Response)
+        response = self._request_with_plugin_daemon_response(
+            "POST", f"plugin/{tenant_id}/debugging/key", Response, timeout=self._management_timeout()
+        )
 
         return response.key
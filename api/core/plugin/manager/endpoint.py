@@ -24,6 +24,7 @@ class PluginEndpointManager(BasePluginManager):
                 "settings": settings,
                 "name": name,
             },
+            timeout=self._management_timeout(),
         )
 
     def list_endpoints(self, tenant_id: str, user_id: str, page: int, page_size: int):
@@ -35,6 +36,7 @@ class PluginEndpointManager(BasePluginManager):
             f"plugin/{tenant_id}/endpoint/list",
             list[EndpointEntityWithInstance],
             params={"page": page, "page_size": page_size},
+            timeout=self._management_timeout(),
         )
 
     def list_endpoints_for_single_plugin(self, tenant_id: str, user_id: str, plugin_id: str, page: int, page_size: int):
@@ -46,6 +48,7 @@ class PluginEndpointManager(BasePluginManager):
             f"plugin/{tenant_id}/endpoint/list/plugin",
             list[EndpointEntityWithInstance],
             params={"plugin_id": plugin_id, "page": page, "page_size": page_size},
+            timeout=self._management_timeout(),
         )
 
     def update_endpoint(self, tenant_id: str, user_id: str, endpoint_id: str, name: str, settings: dict):
@@ -65,6 +68,7 @@ class PluginEndpointManager(BasePluginManager):
             headers={
                 "Content-Type": "application/json",
             },
+            timeout=self._management_timeout(),
         )
 
     def delete_endpoint(self, tenant_id: str, user_id: str, endpoint_id: str):
@@ -81,6 +85,7 @@ class PluginEndpointManager(BasePluginManager):
             headers={
                 "Content-Type": "application/json",
             },
+            timeout=self._management_timeout(),
         )
 
     def enable_endpoint(self, tenant_id: str, user_id: str, endpoint_id: str):
@@ -97,6 +102,7 @@ class PluginEndpointManager(BasePluginManager):
             headers={
                 "Content-Type": "application/json",
             },
+            timeout=self._management_timeout(),
         )
 
     def disable_endpoint(self, tenant_id: str, user_id: str, endpoint_id: str):
@@ -113,4 +119,5 @@ class PluginEndpointManager(BasePluginManager):
             headers={
                 "Content-Type": "application/json",
             },
+            timeout=self._management_timeout(),
         )
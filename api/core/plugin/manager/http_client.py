@@ -0,0 +1,117 @@
+"""
+Pooled HTTP session and request statistics of the plugin daemon inner API
+"""
+
+import bisect
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from configs import dify_config
+
+BACKOFF_FACTOR = 0.1
+BACKOFF_JITTER = 0.1
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the session of the plugin daemon shared by the current process.
+    A forked process creates its own session instead of sharing the pooled connections of its parent.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _session_pid = pid
+    return _session
+
+
+def _create_session() -> requests.Session:
+    # requests that failed to connect are retried whatever the method, read errors only for idempotent methods
+    retry = Retry(
+        total=dify_config.PLUGIN_DAEMON_MAX_RETRIES,
+        connect=dify_config.PLUGIN_DAEMON_MAX_RETRIES,
+        read=dify_config.PLUGIN_DAEMON_MAX_RETRIES,
+        status=0,
+        other=0,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+    )
+    adapter = HTTPAdapter(pool_maxsize=dify_config.PLUGIN_DAEMON_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PluginDaemonRequestStats:
+    """
+    Request statistics of the plugin daemon per plugin id, requests not bound to a plugin are counted under "".
+
+    A request is in flight until the headers of its response are received. A request that starts while the
+    connection pool is in use by as many requests as it can keep alive overflows the pool, it opens a connection
+    that is closed once the response is consumed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats: dict[str, dict[str, Any]] = defaultdict(self._new_stats)
+
+    @staticmethod
+    def _new_stats() -> dict[str, Any]:
+        return {
+            "in_flight": 0,
+            "requests": 0,
+            "errors": 0,
+            "pool_overflows": 0,
+            "latency_sum": 0.0,
+            "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        }
+
+    def start(self, plugin_id: str) -> None:
+        with self._lock:
+            stats = self._stats[plugin_id]
+            if self._in_flight >= dify_config.PLUGIN_DAEMON_POOL_MAXSIZE:
+                stats["pool_overflows"] += 1
+            self._in_flight += 1
+            stats["in_flight"] += 1
+
+    def finish(self, plugin_id: str, latency: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats[plugin_id]
+            self._in_flight -= 1
+            stats["in_flight"] -= 1
+            stats["requests"] += 1
+            if failed:
+                stats["errors"] += 1
+            stats["latency_sum"] += latency
+            stats["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Get a copy of the statistics of every plugin id
+        """
+        with self._lock:
+            return {
+                plugin_id: {**stats, "latency_buckets": list(stats["latency_buckets"])}
+                for plugin_id, stats in self._stats.items()
+            }
+
+
+plugin_daemon_request_stats = PluginDaemonRequestStats()
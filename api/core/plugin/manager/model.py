@@ -2,6 +2,9 @@ import binascii
 from collections.abc import Generator, Sequence
 from typing import IO, Optional
 
+from pydantic import TypeAdapter
+
+from core.helper.model_provider_cache import PluginModelCache
 from core.model_runtime.entities.llm_entities import LLMResultChunk
 from core.model_runtime.entities.message_entities import PromptMessage, PromptMessageTool
 from core.model_runtime.entities.model_entities import AIModelEntity
@@ -20,18 +23,27 @@ from core.plugin.entities.plugin_daemon import (
 )
 from core.plugin.manager.base import BasePluginManager
 
+_model_providers_adapter = TypeAdapter(list[PluginModelProviderEntity])
+_model_schema_adapter: TypeAdapter[Optional[AIModelEntity]] = TypeAdapter(Optional[AIModelEntity])
+
 
 class PluginModelManager(BasePluginManager):
     def fetch_model_providers(self, tenant_id: str) -> Sequence[PluginModelProviderEntity]:
         """
         Fetch model providers for the given tenant.
         """
+        cached_providers = PluginModelCache.get(tenant_id, PluginModelCache.PROVIDERS_FIELD)
+        if cached_providers is not None:
+            return _model_providers_adapter.validate_json(cached_providers)
+
         response = self._request_with_plugin_daemon_response(
             "GET",
             f"plugin/{tenant_id}/management/models",
             list[PluginModelProviderEntity],
             params={"page": 1, "page_size": 256},
+            timeout=self._management_timeout(),
         )
+        PluginModelCache.set(tenant_id, PluginModelCache.PROVIDERS_FIELD, _model_providers_adapter.dump_json(response))
         return response
 
     def get_model_schema(
@@ -47,6 +59,25 @@ class PluginModelManager(BasePluginManager):
         """
         Get model schema
         """
+        cache_field = PluginModelCache.model_schema_field(plugin_id, provider, model_type, model, credentials)
+        cached_schema = PluginModelCache.get(tenant_id, cache_field)
+        if cached_schema is not None:
+            return _model_schema_adapter.validate_json(cached_schema)
+
+        model_schema = self._fetch_model_schema(tenant_id, user_id, plugin_id, provider, model_type, model, credentials)
+        PluginModelCache.set(tenant_id, cache_field, _model_schema_adapter.dump_json(model_schema))
+        return model_schema
+
+    def _fetch_model_schema(
+        self,
+        tenant_id: str,
+        user_id: str,
+        plugin_id: str,
+        provider: str,
+        model_type: str,
+        model: str,
+        credentials: dict,
+    ) -> AIModelEntity | None:
         response = self._request_with_plugin_daemon_response_stream(
             "POST",
             f"plugin/{tenant_id}/dispatch/model/schema",
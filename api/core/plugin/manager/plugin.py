@@ -24,6 +24,7 @@ class PluginInstallationManager(BasePluginManager):
             f"plugin/{tenant_id}/management/fetch/identifier",
             bool,
             params={"plugin_unique_identifier": identifier},
+            timeout=self._management_timeout(),
         )
 
     def list_plugins(self, tenant_id: str) -> list[PluginEntity]:
@@ -32,6 +33,7 @@ class PluginInstallationManager(BasePluginManager):
             f"plugin/{tenant_id}/management/list",
             list[PluginEntity],
             params={"page": 1, "page_size": 256},
+            timeout=self._management_timeout(),
         )
 
     def upload_pkg(
@@ -57,6 +59,7 @@ class PluginInstallationManager(BasePluginManager):
             PluginUploadResponse,
             files=body,
             data=data,
+            timeout=self._management_timeout(),
         )
 
     def upload_bundle(
@@ -74,6 +77,7 @@ class PluginInstallationManager(BasePluginManager):
             list[PluginBundleDependency],
             files={"dify_bundle": ("dify_bundle", bundle, "application/octet-stream")},
             data={"verify_signature": "true" if verify_signature else "false"},
+            timeout=self._management_timeout(),
         )
 
     def install_from_identifiers(
@@ -97,6 +101,7 @@ class PluginInstallationManager(BasePluginManager):
                 "metas": metas,
             },
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
 
     def fetch_plugin_installation_tasks(self, tenant_id: str, page: int, page_size: int) -> Sequence[PluginInstallTask]:
@@ -108,6 +113,7 @@ class PluginInstallationManager(BasePluginManager):
             f"plugin/{tenant_id}/management/install/tasks",
             list[PluginInstallTask],
             params={"page": page, "page_size": page_size},
+            timeout=self._management_timeout(),
         )
 
     def fetch_plugin_installation_task(self, tenant_id: str, task_id: str) -> PluginInstallTask:
@@ -118,6 +124,7 @@ class PluginInstallationManager(BasePluginManager):
             "GET",
             f"plugin/{tenant_id}/management/install/tasks/{task_id}",
             PluginInstallTask,
+            timeout=self._management_timeout(),
         )
 
     def delete_plugin_installation_task(self, tenant_id: str, task_id: str) -> bool:
@@ -128,6 +135,7 @@ class PluginInstallationManager(BasePluginManager):
             "POST",
             f"plugin/{tenant_id}/management/install/tasks/{task_id}/delete",
             bool,
+            timeout=self._management_timeout(),
         )
 
     def delete_all_plugin_installation_task_items(self, tenant_id: str) -> bool:
@@ -138,6 +146,7 @@ class PluginInstallationManager(BasePluginManager):
             "POST",
             f"plugin/{tenant_id}/management/install/tasks/delete_all",
             bool,
+            timeout=self._management_timeout(),
         )
 
     def delete_plugin_installation_task_item(self, tenant_id: str, task_id: str, identifier: str) -> bool:
@@ -148,6 +157,7 @@ class PluginInstallationManager(BasePluginManager):
             "POST",
             f"plugin/{tenant_id}/management/install/tasks/{task_id}/delete/{identifier}",
             bool,
+            timeout=self._management_timeout(),
         )
 
     def fetch_plugin_manifest(self, tenant_id: str, plugin_unique_identifier: str) -> PluginDeclaration:
@@ -160,6 +170,7 @@ class PluginInstallationManager(BasePluginManager):
             f"plugin/{tenant_id}/management/fetch/manifest",
             PluginDeclaration,
             params={"plugin_unique_identifier": plugin_unique_identifier},
+            timeout=self._management_timeout(),
         )
 
     def fetch_plugin_installation_by_ids(
@@ -174,6 +185,7 @@ class PluginInstallationManager(BasePluginManager):
             list[PluginInstallation],
             data={"plugin_ids": plugin_ids},
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
 
     def fetch_missing_dependencies(
@@ -188,6 +200,7 @@ class PluginInstallationManager(BasePluginManager):
             list[MissingPluginDependency],
             data={"plugin_unique_identifiers": plugin_unique_identifiers},
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
 
     def uninstall(self, tenant_id: str, plugin_installation_id: str) -> bool:
@@ -202,6 +215,7 @@ class PluginInstallationManager(BasePluginManager):
                 "plugin_installation_id": plugin_installation_id,
             },
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
 
     def upgrade_plugin(
@@ -226,6 +240,7 @@ class PluginInstallationManager(BasePluginManager):
                 "meta": meta,
             },
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
 
     def check_tools_existence(self, tenant_id: str, provider_ids: Sequence[GenericProviderID]) -> Sequence[bool]:
@@ -246,4 +261,5 @@ class PluginInstallationManager(BasePluginManager):
                 ]
             },
             headers={"Content-Type": "application/json"},
+            timeout=self._management_timeout(),
         )
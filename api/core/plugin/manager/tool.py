@@ -30,6 +30,7 @@ class PluginToolManager(BasePluginManager):
             list[PluginToolProviderEntity],
             params={"page": 1, "page_size": 256},
             transformer=transformer,
+            timeout=self._management_timeout(),
         )
 
         for provider in response:
@@ -61,6 +62,7 @@ class PluginToolManager(BasePluginManager):
             PluginToolProviderEntity,
             params={"provider": tool_provider_id.provider_name, "plugin_id": tool_provider_id.plugin_id},
             transformer=transformer,
+            timeout=self._management_timeout(),
         )
 
         response.declaration.identity.name = f"{response.plugin_id}/{response.declaration.identity.name}"
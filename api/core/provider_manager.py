@@ -22,6 +22,7 @@ from core.entities.provider_entities import (
 from core.helper import encrypter
 from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
 from core.helper.position_helper import is_filtered
+from core.helper.provider_usage_buffer import ProviderUsageBuffer
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -127,6 +128,11 @@ class ProviderManager:
             tenant_id
         )
 
+        # Get the quota used by system providers not flushed to the provider records yet
+        pending_quota_used = {}
+        if ext_hosting_provider.hosting_configuration.provider_map:
+            pending_quota_used = ProviderUsageBuffer.get_quota_used(tenant_id)
+
         provider_configurations = ProviderConfigurations(tenant_id=tenant_id)
 
         # Construct ProviderConfiguration objects for each provider
@@ -150,7 +156,9 @@ class ProviderManager:
             )
 
             # Convert to system configuration
-            system_configuration = self._to_system_configuration(tenant_id, provider_entity, provider_records)
+            system_configuration = self._to_system_configuration(
+                tenant_id, provider_entity, provider_records, pending_quota_used
+            )
 
             # Get preferred provider type
             preferred_provider_type_record = provider_name_to_preferred_model_provider_records_dict.get(provider_name)
@@ -676,7 +684,11 @@ class ProviderManager:
         return CustomConfiguration(provider=custom_provider_configuration, models=custom_model_configurations)
 
     def _to_system_configuration(
-        self, tenant_id: str, provider_entity: ProviderEntity, provider_records: list[Provider]
+        self,
+        tenant_id: str,
+        provider_entity: ProviderEntity,
+        provider_records: list[Provider],
+        pending_quota_used: Optional[dict[tuple[str, str], int]] = None,
     ) -> SystemConfiguration:
         """
         Convert to system configuration.
@@ -684,6 +696,8 @@ class ProviderManager:
         :param tenant_id: workspace id
         :param provider_entity: provider entity
         :param provider_records: provider records
+        :param pending_quota_used: quota used not flushed to the provider records yet,
+            by provider name and quota type
         :return:
         """
         # Get hosting configuration
@@ -718,14 +732,18 @@ class ProviderManager:
                     continue
             else:
                 provider_record = quota_type_to_provider_records_dict[provider_quota.quota_type]
+                quota_used = provider_record.quota_used
+                if pending_quota_used:
+                    pending = pending_quota_used.get((provider_record.provider_name, provider_record.quota_type))
+                    if pending:
+                        quota_used = (quota_used or 0) + pending
 
                 quota_configuration = QuotaConfiguration(
                     quota_type=provider_quota.quota_type,
                     quota_unit=provider_hosting_configuration.quota_unit or QuotaUnit.TOKENS,
-                    quota_used=provider_record.quota_used,
+                    quota_used=quota_used,
                     quota_limit=provider_record.quota_limit,
-                    is_valid=provider_record.quota_limit > provider_record.quota_used
-                    or provider_record.quota_limit == -1,
+                    is_valid=provider_record.quota_limit > quota_used or provider_record.quota_limit == -1,
                     restrict_models=provider_quota.restrict_models,
                 )
 
@@ -91,14 +91,22 @@ class Jieba(BaseKeyword):
 
         sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table or {}, query, k)
 
-        documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index)
-                .first()
+        return self._get_documents_by_chunk_indices(sorted_chunk_indices)
+
+    def _get_documents_by_chunk_indices(self, sorted_chunk_indices: list[str]) -> list[Document]:
+        if not sorted_chunk_indices:
+            return []
+
+        segments = {
+            segment.index_node_id: segment
+            for segment in db.session.query(DocumentSegment).filter(
+                DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(sorted_chunk_indices)
             )
+        }
 
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segments.get(chunk_index)
             if segment:
                 documents.append(
                     Document(
@@ -0,0 +1,133 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import DatasetKeywordIndex
+
+# maximum number of postings written by a single insert statement
+_POSTINGS_BATCH_SIZE = 1000
+
+
+class JiebaInvertedIndex(Jieba):
+    """
+    Jieba keyword store backed by a normalized inverted index.
+
+    Each (keyword, index node) pair is a row of `dataset_keyword_indexes`, so appends and deletes only touch
+    the postings of the affected chunks and a search only loads the postings of the query keywords.
+    """
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self._add_texts(texts)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        self._add_texts(texts, keywords_list=kwargs.get("keywords_list"))
+
+    def text_exists(self, id: str) -> bool:
+        stmt = db.session.query(DatasetKeywordIndex).filter(
+            DatasetKeywordIndex.dataset_id == self.dataset.id, DatasetKeywordIndex.index_node_id == id
+        )
+        return bool(db.session.query(stmt.exists()).scalar())
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        db.session.query(DatasetKeywordIndex).filter(
+            DatasetKeywordIndex.dataset_id == self.dataset.id, DatasetKeywordIndex.index_node_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = list(keyword_table_handler.extract_keywords(query))
+        if not keywords:
+            return []
+
+        # rank chunks by the number of query keywords they contain
+        match_count = func.count(DatasetKeywordIndex.keyword)
+        rows = (
+            db.session.query(DatasetKeywordIndex.index_node_id, match_count)
+            .filter(DatasetKeywordIndex.dataset_id == self.dataset.id, DatasetKeywordIndex.keyword.in_(keywords))
+            .group_by(DatasetKeywordIndex.index_node_id)
+            .order_by(match_count.desc(), DatasetKeywordIndex.index_node_id)
+            .limit(k)
+            .all()
+        )
+
+        return self._get_documents_by_chunk_indices([index_node_id for index_node_id, _ in rows])
+
+    def delete(self) -> None:
+        db.session.query(DatasetKeywordIndex).filter(DatasetKeywordIndex.dataset_id == self.dataset.id).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+        # drop the legacy keyword table as well if the dataset still has one
+        super().delete()
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segment_keywords(self.dataset.id, node_id, keywords)
+        self._add_postings({node_id: keywords})
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        postings = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data["segment"]
+            if pre_segment_data["keywords"]:
+                segment.keywords = pre_segment_data["keywords"]
+            else:
+                keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
+                segment.keywords = list(keywords)
+            postings[segment.index_node_id] = segment.keywords
+        self._add_postings(postings)
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        self._add_postings({node_id: keywords})
+
+    def import_keyword_table(self, keyword_table: Mapping[str, Sequence[str]]) -> int:
+        """
+        Load a legacy keyword table (keyword -> index node ids) into the inverted index.
+        :param keyword_table: legacy keyword table
+        :return: number of postings
+        """
+        postings: dict[str, list[str]] = {}
+        for keyword, node_ids in keyword_table.items():
+            for node_id in node_ids:
+                postings.setdefault(node_id, []).append(keyword)
+        return self._add_postings(postings)
+
+    def _add_texts(self, texts: list[Document], keywords_list: Optional[list] = None):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        postings = {}
+        for i, text in enumerate(texts):
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            if text.metadata is not None:
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                postings[text.metadata["doc_id"]] = list(keywords)
+        self._add_postings(postings)
+
+    def _add_postings(self, postings: Mapping[str, Sequence[str]]) -> int:
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in postings.items()
+            for keyword in set(keywords)
+        ]
+        for i in range(0, len(rows), _POSTINGS_BATCH_SIZE):
+            stmt = insert(DatasetKeywordIndex).values(rows[i : i + _POSTINGS_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            db.session.execute(stmt)
+        db.session.commit()
+        return len(rows)
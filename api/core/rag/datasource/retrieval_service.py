@@ -9,6 +9,7 @@ from sqlalchemy.orm import load_only
 from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.index_processor.constant.index_type import IndexType
@@ -16,7 +17,7 @@ from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from extensions.ext_database import db
-from models.dataset import ChildChunk, Dataset, DocumentSegment
+from models.dataset import Dataset
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
@@ -266,6 +267,25 @@ class RetrievalService:
                 .all()
             }
 
+            # Collect the index node ids of all documents to hydrate them in batch
+            child_index_node_ids: dict[str, set[str]] = {}
+            index_node_ids: dict[str, set[str]] = {}
+            for document in documents:
+                dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+                index_node_id = document.metadata.get("doc_id")
+                if not dataset_document or not index_node_id:
+                    continue
+                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                    child_index_node_ids.setdefault(dataset_document.dataset_id, set()).add(index_node_id)
+                else:
+                    index_node_ids.setdefault(dataset_document.dataset_id, set()).add(index_node_id)
+
+            child_chunks = SegmentHydrator.get_child_chunks(child_index_node_ids) if child_index_node_ids else {}
+            parent_segment_ids: dict[str, set[str]] = {}
+            for chunk in child_chunks.values():
+                parent_segment_ids.setdefault(chunk.dataset_id, set()).add(chunk.segment_id)
+            segments_by_node_id, segments_by_id = SegmentHydrator.get_segments(index_node_ids, parent_segment_ids)
+
             records = []
             include_segment_ids = set()
             segment_child_map = {}
@@ -281,33 +301,17 @@ class RetrievalService:
                 if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
                     # Handle parent-child documents
                     child_index_node_id = document.metadata.get("doc_id")
+                    if not child_index_node_id:
+                        continue
 
-                    child_chunk = (
-                        db.session.query(ChildChunk).filter(ChildChunk.index_node_id == child_index_node_id).first()
-                    )
+                    child_chunk = child_chunks.get(child_index_node_id)
 
                     if not child_chunk:
                         continue
 
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.id == child_chunk.segment_id,
-                        )
-                        .options(
-                            load_only(
-                                DocumentSegment.id,
-                                DocumentSegment.content,
-                                DocumentSegment.answer,
-                            )
-                        )
-                        .first()
-                    )
+                    segment = segments_by_id.get(child_chunk.segment_id)
 
-                    if not segment:
+                    if not segment or segment.dataset_id != dataset_document.dataset_id:
                         continue
 
                     if segment.id not in include_segment_ids:
@@ -344,18 +348,9 @@ class RetrievalService:
                     if not index_node_id:
                         continue
 
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.index_node_id == index_node_id,
-                        )
-                        .first()
-                    )
+                    segment = segments_by_node_id.get(index_node_id)
 
-                    if not segment:
+                    if not segment or segment.dataset_id != dataset_document.dataset_id:
                         continue
 
                     include_segment_ids.add(segment.id)
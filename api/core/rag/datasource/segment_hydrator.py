@@ -0,0 +1,180 @@
+import json
+import logging
+import time
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any, Optional, TypeVar
+
+from sqlalchemy import DateTime, or_
+
+from configs import dify_config
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import ChildChunk, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+_ModelT = TypeVar("_ModelT", ChildChunk, DocumentSegment)
+
+
+class SegmentHydrator:
+    """
+    Loads the child chunks and segments referenced by retrieved documents with set-based queries.
+
+    Hydrated rows are cached per dataset in a Redis hash for `RETRIEVAL_SEGMENT_CACHE_TTL` seconds. Only enabled
+    and completed segments are cached, and the segment tasks drop a dataset's cache through `invalidate`
+    whenever segments of that dataset are enabled, disabled, updated or deleted.
+    """
+
+    @staticmethod
+    def get_child_chunks(index_node_ids: Mapping[str, Iterable[str]]) -> dict[str, ChildChunk]:
+        """
+        Get child chunks by index node id.
+        :param index_node_ids: child index node ids grouped by dataset id
+        :return: child chunks keyed by index node id
+        """
+        wanted = {
+            dataset_id: {f"child:{node_id}" for node_id in node_ids} for dataset_id, node_ids in index_node_ids.items()
+        }
+        cached = _get_cached(ChildChunk, wanted)
+        child_chunks = {child_chunk.index_node_id: child_chunk for child_chunk in cached.values()}
+
+        missing = {node_id for node_ids in index_node_ids.values() for node_id in node_ids} - child_chunks.keys()
+        if missing:
+            loaded = (
+                db.session.query(ChildChunk)
+                .filter(ChildChunk.dataset_id.in_(index_node_ids.keys()), ChildChunk.index_node_id.in_(missing))
+                .all()
+            )
+            _set_cached({(c.dataset_id, f"child:{c.index_node_id}"): c for c in loaded})
+            child_chunks.update({child_chunk.index_node_id: child_chunk for child_chunk in loaded})
+
+        return child_chunks
+
+    @staticmethod
+    def get_segments(
+        index_node_ids: Mapping[str, Iterable[str]], segment_ids: Mapping[str, Iterable[str]]
+    ) -> tuple[dict[str, DocumentSegment], dict[str, DocumentSegment]]:
+        """
+        Get enabled and completed segments by index node id and by segment id in a single query.
+        :param index_node_ids: segment index node ids grouped by dataset id
+        :param segment_ids: segment ids grouped by dataset id
+        :return: segments keyed by index node id, segments keyed by segment id
+        """
+        wanted: dict[str, set[str]] = {}
+        for dataset_id, node_ids in index_node_ids.items():
+            wanted.setdefault(dataset_id, set()).update(f"node:{node_id}" for node_id in node_ids)
+        for dataset_id, ids in segment_ids.items():
+            wanted.setdefault(dataset_id, set()).update(f"segment:{segment_id}" for segment_id in ids)
+
+        segments_by_node_id: dict[str, DocumentSegment] = {}
+        segments_by_id: dict[str, DocumentSegment] = {}
+        for (_, field), segment in _get_cached(DocumentSegment, wanted).items():
+            if field.startswith("node:"):
+                segments_by_node_id[segment.index_node_id] = segment
+            else:
+                segments_by_id[segment.id] = segment
+
+        missing_node_ids = {n for node_ids in index_node_ids.values() for n in node_ids} - segments_by_node_id.keys()
+        missing_ids = {s for ids in segment_ids.values() for s in ids} - segments_by_id.keys()
+        if missing_node_ids or missing_ids:
+            loaded = (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.dataset_id.in_(wanted.keys()),
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                    or_(DocumentSegment.index_node_id.in_(missing_node_ids), DocumentSegment.id.in_(missing_ids)),
+                )
+                .all()
+            )
+            to_cache = {}
+            for segment in loaded:
+                if segment.index_node_id in missing_node_ids:
+                    segments_by_node_id[segment.index_node_id] = segment
+                    to_cache[(segment.dataset_id, f"node:{segment.index_node_id}")] = segment
+                if segment.id in missing_ids:
+                    segments_by_id[segment.id] = segment
+                    to_cache[(segment.dataset_id, f"segment:{segment.id}")] = segment
+            _set_cached(to_cache)
+
+        return segments_by_node_id, segments_by_id
+
+    @staticmethod
+    def invalidate(dataset_id: str) -> None:
+        """
+        Drop the cached segments of a dataset.
+        :param dataset_id: dataset id
+        """
+        try:
+            redis_client.delete(_cache_key(dataset_id))
+        except Exception:
+            logger.exception("Failed to invalidate segment cache of dataset %s", dataset_id)
+
+
+def _cache_key(dataset_id: str) -> str:
+    return f"retrieval_segment_cache:{dataset_id}"
+
+
+def _get_cached(model: type[_ModelT], wanted: Mapping[str, set[str]]) -> dict[tuple[str, str], _ModelT]:
+    if not dify_config.RETRIEVAL_SEGMENT_CACHE_TTL or not wanted:
+        return {}
+
+    requests = [(dataset_id, sorted(fields)) for dataset_id, fields in wanted.items() if fields]
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        for dataset_id, fields in requests:
+            pipeline.hmget(_cache_key(dataset_id), fields)
+        responses = pipeline.execute()
+    except Exception:
+        logger.exception("Failed to read segment cache")
+        return {}
+
+    # the hash expiry is refreshed on every write, so entries carry their own timestamp
+    min_cached_at = time.time() - dify_config.RETRIEVAL_SEGMENT_CACHE_TTL
+    result = {}
+    for (dataset_id, fields), values in zip(requests, responses):
+        for field, value in zip(fields, values):
+            if value is None:
+                continue
+            cached_at, row = _deserialize(model, value)
+            if cached_at >= min_cached_at:
+                result[(dataset_id, field)] = row
+    return result
+
+
+def _set_cached(rows: Mapping[tuple[str, str], ChildChunk | DocumentSegment]) -> None:
+    ttl = dify_config.RETRIEVAL_SEGMENT_CACHE_TTL
+    if not ttl or not rows:
+        return
+
+    cached_at = time.time()
+    mappings: dict[str, dict[str, str]] = {}
+    for (dataset_id, field), row in rows.items():
+        mappings.setdefault(dataset_id, {})[field] = _serialize(row, cached_at)
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        for dataset_id, mapping in mappings.items():
+            pipeline.hset(_cache_key(dataset_id), mapping=mapping)
+            pipeline.expire(_cache_key(dataset_id), ttl)
+        pipeline.execute()
+    except Exception:
+        logger.exception("Failed to write segment cache")
+
+
+def _serialize(row: ChildChunk | DocumentSegment, cached_at: float) -> str:
+    values: dict[str, Any] = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        values[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps({"cached_at": cached_at, "row": values})
+
+
+def _deserialize(model: type[_ModelT], value: bytes | str) -> tuple[float, _ModelT]:
+    data = json.loads(value)
+    values: dict[str, Optional[Any]] = data["row"]
+    for column in model.__table__.columns:
+        column_value = values.get(column.key)
+        if isinstance(column.type, DateTime) and isinstance(column_value, str):
+            values[column.key] = datetime.fromisoformat(column_value)
+    return data["cached_at"], model(**values)
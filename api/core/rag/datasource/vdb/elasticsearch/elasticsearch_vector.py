@@ -9,8 +9,10 @@ from elasticsearch import Elasticsearch
 from flask import current_app
 from pydantic import BaseModel, model_validator
 
+from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -42,9 +44,13 @@ class ElasticSearchConfig(BaseModel):
 
 
 class ElasticSearchVector(BaseVector):
+    _server_versions: dict[int, str] = {}
+
     def __init__(self, index_name: str, config: ElasticSearchConfig, attributes: list):
         super().__init__(index_name.lower())
-        self._client = self._init_client(config)
+        self._client = VectorClientRegistry.get_client(
+            VectorType.ELASTICSEARCH, config, lambda: self._init_client(config)
+        )
         self._version = self._get_version()
         self._check_version()
         self._attributes = attributes
@@ -62,6 +68,7 @@ class ElasticSearchVector(BaseVector):
                 request_timeout=100000,
                 retry_on_timeout=True,
                 max_retries=10000,
+                connections_per_node=dify_config.VECTOR_STORE_POOL_SIZE,
             )
         except requests.exceptions.ConnectionError:
             raise ConnectionError("Vector database connection error")
@@ -69,8 +76,13 @@ class ElasticSearchVector(BaseVector):
         return client
 
     def _get_version(self) -> str:
-        info = self._client.info()
-        return cast(str, info["version"]["number"])
+        # clients are shared, so the server version is only fetched once per client
+        version = self._server_versions.get(id(self._client))
+        if version is None:
+            info = self._client.info()
+            version = cast(str, info["version"]["number"])
+            self._server_versions[id(self._client)] = version
+        return version
 
     def _check_version(self):
         if self._version < "8.0.0":
@@ -0,0 +1,397 @@
+import json
+import os
+import shutil
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+# metadata fields that are indexed for filtering, other fields are matched by scanning
+INDEXED_FIELDS = ("group_id", "document_id")
+
+# compact a collection once this share of its rows are deleted
+_COMPACT_DELETED_RATIO = 0.5
+_COMPACT_MIN_DELETED = 1000
+
+# rebuild the ivf index once this share of the rows are not covered by it
+_IVF_REBUILD_RATIO = 0.1
+_IVF_KMEANS_ITERATIONS = 10
+_IVF_TRAINING_SAMPLES_PER_LIST = 64
+
+
+class IVFIndex:
+    """
+    Inverted file index over the normalized vectors of a collection.
+
+    Rows are clustered around `sqrt(n)` centroids with spherical k-means, and a search only scores the rows of
+    the `nprobe` lists whose centroids are closest to the query, plus the rows appended after the index was built.
+    """
+
+    def __init__(self, centroids: np.ndarray, lists: list[np.ndarray], indexed_count: int):
+        self.centroids = centroids
+        self.lists = lists
+        self.indexed_count = indexed_count
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, seed: int = 0) -> "IVFIndex":
+        count = len(vectors)
+        list_count = max(1, min(int(np.sqrt(count)), 4096))
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, list_count * _IVF_TRAINING_SAMPLES_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, size=sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, size=list_count, replace=False)].copy()
+        for _ in range(_IVF_KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(list_count):
+                members = sample[assignments == i]
+                if len(members):
+                    centroids[i] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+
+        assignments = np.concatenate(
+            [np.argmax(vectors[i : i + 65536] @ centroids.T, axis=1) for i in range(0, count, 65536)]
+        )
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(list_count + 1))
+        lists = [order[bounds[i] : bounds[i + 1]] for i in range(list_count)]
+        return cls(centroids, lists, count)
+
+    def candidates(self, query: np.ndarray, nprobe: int, count: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.lists))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[i] for i in probes] + [np.arange(self.indexed_count, count)])
+
+
+class EmbeddedCollection:
+    """
+    On-disk collection of the embedded vector store, shared by all vector instances of a process.
+
+    Normalized float32 vectors are appended to a raw file that is memory-mapped for search, while documents and
+    deleted row numbers are appended to JSON lines files. `manifest.json` is atomically replaced after each write
+    and records how much of each file is valid, so readers in other processes only ever see complete rows.
+    Compaction rewrites the live rows into files of a new generation.
+    """
+
+    _collections: dict[str, "EmbeddedCollection"] = {}
+    _collections_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._lock = threading.RLock()
+        self._reset()
+
+    @classmethod
+    def get(cls, directory: str) -> "EmbeddedCollection":
+        directory = os.path.abspath(directory)
+        with cls._collections_lock:
+            if directory not in cls._collections:
+                cls._collections[directory] = cls(directory)
+            return cls._collections[directory]
+
+    def _reset(self):
+        self._manifest_stat: Optional[tuple[int, int]] = None
+        self._manifest: dict[str, Any] = {
+            "generation": 0,
+            "dimension": 0,
+            "count": 0,
+            "deleted_count": 0,
+            "documents_size": 0,
+            "deleted_size": 0,
+        }
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows_by_id: dict[str, list[int]] = {}
+        self._rows_by_field: dict[str, dict[str, list[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._ivf: Optional[IVFIndex] = None
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            self.refresh()
+            return int(self._alive.sum())
+
+    def refresh(self) -> None:
+        """
+        Load the rows written since the last refresh, by this or by another process.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self._path(MANIFEST_FILE))
+            except FileNotFoundError:
+                if self._manifest_stat is not None:
+                    self._reset()
+                return
+            if self._manifest_stat == (stat.st_ino, stat.st_mtime_ns):
+                return
+
+            with open(self._path(MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            if manifest["generation"] != self._manifest["generation"] or manifest["count"] < len(self._ids):
+                self._reset()
+
+            generation = manifest["generation"]
+            documents = self._read_lines(
+                f"documents.{generation}.jsonl", self._manifest["documents_size"], manifest["documents_size"]
+            )
+            self._append_rows([json.loads(line) for line in documents])
+            deleted = self._read_lines(
+                f"deleted.{generation}.jsonl", self._manifest["deleted_size"], manifest["deleted_size"]
+            )
+            for line in deleted:
+                self._delete_row(int(line))
+
+            count, dimension = manifest["count"], manifest["dimension"]
+            if count:
+                self._vectors = np.memmap(
+                    self._path(f"vectors.{generation}.f32"),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(count, dimension),
+                )
+            self._manifest = manifest
+            self._manifest_stat = (stat.st_ino, stat.st_mtime_ns)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[dict],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """
+        Append rows, replacing the rows that have the same ids. Callers must hold the collection's write lock.
+        """
+        # only the last of duplicated ids is kept
+        positions = list({id: i for i, id in enumerate(ids)}.values())
+        if not positions:
+            return
+        ids = [ids[i] for i in positions]
+        texts = [texts[i] for i in positions]
+        metadatas = [metadatas[i] for i in positions]
+        matrix = _normalize(np.asarray([vectors[i] for i in positions], dtype=np.float32))
+        with self._lock:
+            self.refresh()
+            dimension = self._manifest["dimension"] or matrix.shape[1]
+            if matrix.shape[1] != dimension:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match collection dimension {dimension}")
+
+            os.makedirs(self._directory, exist_ok=True)
+            manifest = dict(self._manifest, dimension=dimension)
+            generation = manifest["generation"]
+            replaced_rows = [row for id in ids for row in self._rows_by_id.get(id, [])]
+
+            with open(self._path(f"vectors.{generation}.f32"), "ab") as f:
+                # drop the tail of an interrupted write before appending
+                f.truncate(manifest["count"] * dimension * 4)
+                f.write(matrix.tobytes())
+            with open(self._path(f"documents.{generation}.jsonl"), "ab") as f:
+                f.truncate(manifest["documents_size"])
+                for id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": id, "text": text, "metadata": metadata}).encode() + b"\n")
+                manifest["documents_size"] = f.tell()
+            manifest["count"] += len(ids)
+            if replaced_rows:
+                manifest.update(self._write_deleted(manifest, replaced_rows))
+            self._write_manifest(manifest)
+
+    def delete_rows(self, rows: Sequence[int]) -> None:
+        """
+        Delete rows by row number. Callers must hold the collection's write lock.
+        """
+        with self._lock:
+            self.refresh()
+            rows = [row for row in rows if row < len(self._alive) and self._alive[row]]
+            if not rows:
+                return
+            manifest = dict(self._manifest)
+            manifest.update(self._write_deleted(manifest, rows))
+            self._write_manifest(manifest)
+
+            if manifest["deleted_count"] >= max(_COMPACT_MIN_DELETED, manifest["count"] * _COMPACT_DELETED_RATIO):
+                self._compact()
+
+    def drop(self) -> None:
+        """
+        Delete the collection. Callers must hold the collection's write lock.
+        """
+        with self._lock:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._reset()
+
+    def rows_by_ids(self, ids: Sequence[str]) -> list[int]:
+        with self._lock:
+            self.refresh()
+            return [row for id in ids for row in self._rows_by_id.get(id, [])]
+
+    def rows_by_field(self, key: str, values: Sequence[Any]) -> list[int]:
+        with self._lock:
+            self.refresh()
+            if key in self._rows_by_field:
+                return [row for value in values for row in self._rows_by_field[key].get(str(value), [])]
+            return [int(row) for row in np.flatnonzero(self._alive) if self._metadatas[row].get(key) in values]
+
+    def get_id(self, row: int) -> str:
+        return self._ids[row]
+
+    def get_document(self, row: int) -> tuple[str, dict]:
+        return self._texts[row], self._metadatas[row]
+
+    def contains(self, id: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return id in self._rows_by_id
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        top_k: int,
+        score_threshold: float = 0.0,
+        filters: Optional[Mapping[str, Sequence[Any]]] = None,
+        ivf_threshold: int = 0,
+        ivf_nprobe: int = 1,
+    ) -> list[tuple[int, float]]:
+        """
+        Get the top k rows by cosine similarity.
+        :param query_vector: query vector
+        :param top_k: number of rows
+        :param score_threshold: minimum score
+        :param filters: allowed metadata values by field
+        :param ivf_threshold: minimum number of rows to search through the ivf index, 0 to always search exactly
+        :param ivf_nprobe: number of ivf lists to search
+        :return: row numbers and scores, best first
+        """
+        with self._lock:
+            self.refresh()
+            if not self._ids or top_k <= 0:
+                return []
+            mask = self._alive
+            for key, values in (filters or {}).items():
+                field_mask = np.zeros(len(self._ids), dtype=bool)
+                field_mask[self.rows_by_field(key, values)] = True
+                mask = mask & field_mask
+            vectors = self._vectors
+            ivf = self._get_ivf(ivf_threshold)
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if ivf:
+            rows = np.sort(ivf.candidates(query, ivf_nprobe, len(mask)))
+            rows = rows[mask[rows]]
+            scores = vectors[rows] @ query
+        else:
+            rows = np.flatnonzero(mask)
+            if len(rows) == len(mask):
+                scores = np.asarray(vectors @ query)
+            else:
+                scores = vectors[rows] @ query
+
+        if not len(rows):
+            return []
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(rows[i]), float(scores[i])) for i in top if scores[i] >= score_threshold]
+
+    def _get_ivf(self, ivf_threshold: int) -> Optional[IVFIndex]:
+        alive_count = int(self._alive.sum())
+        if not ivf_threshold or alive_count < ivf_threshold:
+            return None
+        count = len(self._ids)
+        if self._ivf is None or count - self._ivf.indexed_count > self._ivf.indexed_count * _IVF_REBUILD_RATIO:
+            self._ivf = IVFIndex.build(self._vectors)
+        return self._ivf
+
+    def _append_rows(self, documents: list[dict]) -> None:
+        if not documents:
+            return
+        self._alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+        for document in documents:
+            row = len(self._ids)
+            metadata = document["metadata"] or {}
+            self._ids.append(document["id"])
+            self._texts.append(document["text"])
+            self._metadatas.append(metadata)
+            self._rows_by_id.setdefault(document["id"], []).append(row)
+            for field in INDEXED_FIELDS:
+                if metadata.get(field) is not None:
+                    self._rows_by_field[field].setdefault(str(metadata[field]), []).append(row)
+
+    def _delete_row(self, row: int) -> None:
+        if not self._alive[row]:
+            return
+        self._alive[row] = False
+        _remove_row(self._rows_by_id, self._ids[row], row)
+        metadata = self._metadatas[row]
+        for field in INDEXED_FIELDS:
+            if metadata.get(field) is not None:
+                _remove_row(self._rows_by_field[field], str(metadata[field]), row)
+
+    def _write_deleted(self, manifest: dict, rows: Sequence[int]) -> dict:
+        with open(self._path(f"deleted.{manifest['generation']}.jsonl"), "ab") as f:
+            f.truncate(manifest["deleted_size"])
+            f.write(b"".join(b"%d\n" % row for row in rows))
+            return {"deleted_size": f.tell(), "deleted_count": manifest["deleted_count"] + len(rows)}
+
+    def _compact(self) -> None:
+        live_rows = np.flatnonzero(self._alive)
+        manifest = {
+            "generation": self._manifest["generation"] + 1,
+            "dimension": self._manifest["dimension"],
+            "count": len(live_rows),
+            "deleted_count": 0,
+            "deleted_size": 0,
+        }
+        generation = manifest["generation"]
+        with open(self._path(f"vectors.{generation}.f32"), "wb") as f:
+            for i in range(0, len(live_rows), 65536):
+                f.write(np.asarray(self._vectors[live_rows[i : i + 65536]]).tobytes())
+        with open(self._path(f"documents.{generation}.jsonl"), "wb") as f:
+            for row in live_rows:
+                document = {"id": self._ids[row], "text": self._texts[row], "metadata": self._metadatas[row]}
+                f.write(json.dumps(document).encode() + b"\n")
+            manifest["documents_size"] = f.tell()
+        open(self._path(f"deleted.{generation}.jsonl"), "wb").close()
+        self._write_manifest(manifest)
+
+        # readers still holding the previous generation keep their open memory maps
+        for name in ("vectors.{}.f32", "documents.{}.jsonl", "deleted.{}.jsonl"):
+            try:
+                os.remove(self._path(name.format(generation - 1)))
+            except FileNotFoundError:
+                pass
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self._path(f"{MANIFEST_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._path(MANIFEST_FILE))
+        self.refresh()
+
+    def _read_lines(self, name: str, start: int, end: int) -> list[bytes]:
+        if end <= start:
+            return []
+        with open(self._path(name), "rb") as f:
+            f.seek(start)
+            return f.read(end - start).splitlines()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._directory, name)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.asarray(vectors / np.where(norms == 0, 1, norms), dtype=np.float32)
+
+
+def _remove_row(rows_by_key: dict[str, list[int]], key: str, row: int) -> None:
+    rows = rows_by_key.get(key)
+    if rows and row in rows:
+        rows.remove(row)
+        if not rows:
+            del rows_by_key[key]
@@ -0,0 +1,124 @@
+import json
+import os
+from typing import Any
+from uuid import uuid4
+
+from pydantic import BaseModel, model_validator
+
+from configs import dify_config
+from core.rag.datasource.vdb.embedded.collection import EmbeddedCollection
+from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
+from core.rag.datasource.vdb.vector_type import VectorType
+from core.rag.embedding.embedding_base import Embeddings
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+from models.dataset import Dataset
+
+
+class EmbeddedVectorConfig(BaseModel):
+    path: str
+    ivf_threshold: int = 0
+    ivf_nprobe: int = 16
+
+    @model_validator(mode="before")
+    @classmethod
+    def validate_config(cls, values: dict) -> dict:
+        if not values["path"]:
+            raise ValueError("config EMBEDDED_VECTOR_STORE_PATH is required")
+        return values
+
+
+class EmbeddedVector(BaseVector):
+    def __init__(self, collection_name: str, group_id: str, config: EmbeddedVectorConfig):
+        super().__init__(collection_name)
+        self._group_id = group_id
+        self._config = config
+        self._collection = EmbeddedCollection.get(os.path.join(config.path, collection_name))
+
+    def get_type(self) -> str:
+        return VectorType.EMBEDDED
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        return self.add_texts(texts, embeddings, **kwargs)
+
+    def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        ids = []
+        metadatas = []
+        for document in documents:
+            metadata = dict(document.metadata or {})
+            ids.append(metadata.get("doc_id") or str(uuid4()))
+            metadata["group_id"] = self._group_id
+            metadatas.append(metadata)
+
+        with self._write_lock():
+            self._collection.upsert(ids, [document.page_content for document in documents], metadatas, embeddings)
+        return ids
+
+    def text_exists(self, id: str) -> bool:
+        return self._collection.contains(id)
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        with self._write_lock():
+            self._collection.delete_rows(self._collection.rows_by_ids(ids))
+
+    def get_ids_by_metadata_field(self, key: str, value: str):
+        rows = self._collection.rows_by_field(key, [value])
+        return [self._collection.get_id(row) for row in rows] or None
+
+    def delete_by_metadata_field(self, key: str, value: str) -> None:
+        with self._write_lock():
+            self._collection.delete_rows(self._collection.rows_by_field(key, [value]))
+
+    def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        filters = {key: values for key, values in (kwargs.get("filter") or {}).items() if values is not None}
+        results = self._collection.search(
+            query_vector,
+            top_k=kwargs.get("top_k", 4),
+            score_threshold=float(kwargs.get("score_threshold") or 0.0),
+            filters=filters,
+            ivf_threshold=self._config.ivf_threshold,
+            ivf_nprobe=self._config.ivf_nprobe,
+        )
+
+        docs = []
+        for row, score in results:
+            text, metadata = self._collection.get_document(row)
+            metadata = {key: value for key, value in metadata.items() if key != "group_id"}
+            metadata["score"] = score
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        # the embedded vector store only supports semantic search
+        return []
+
+    def delete(self) -> None:
+        with self._write_lock():
+            self._collection.drop()
+
+    def _write_lock(self):
+        return redis_client.lock(f"embedded_vector_lock_{self._collection_name}", timeout=600)
+
+
+class EmbeddedVectorFactory(AbstractVectorFactory):
+    def init_vector(self, dataset: Dataset, attributes: list, embeddings: Embeddings) -> EmbeddedVector:
+        if dataset.index_struct_dict:
+            class_prefix: str = dataset.index_struct_dict["vector_store"]["class_prefix"]
+            collection_name = class_prefix
+        else:
+            dataset_id = dataset.id
+            collection_name = Dataset.gen_collection_name_by_id(dataset_id)
+            dataset.index_struct = json.dumps(self.gen_index_struct_dict(VectorType.EMBEDDED, collection_name))
+
+        return EmbeddedVector(
+            collection_name=collection_name,
+            group_id=dataset.id,
+            config=EmbeddedVectorConfig(
+                path=dify_config.EMBEDDED_VECTOR_STORE_PATH,
+                ivf_threshold=dify_config.EMBEDDED_VECTOR_IVF_THRESHOLD,
+                ivf_nprobe=dify_config.EMBEDDED_VECTOR_IVF_NPROBE,
+            ),
+        )
@@ -1,3 +1,4 @@
+import copy
 import json
 import logging
 import math
@@ -5,11 +6,16 @@ from typing import Any
 
 from pydantic import BaseModel, model_validator
 from pyobvector import VECTOR, ObVecClient  # type: ignore
-from sqlalchemy import JSON, Column, String, func
+from sqlalchemy import JSON, Column, MetaData, String, func
 from sqlalchemy.dialects.mysql import LONGTEXT
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import (
+    VectorClientRegistry,
+    engine_pool_stats,
+    pooled_engine_options,
+)
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -51,11 +57,21 @@ class OceanBaseVector(BaseVector):
         super().__init__(collection_name)
         self._config = config
         self._hnsw_ef_search = -1
-        self._client = ObVecClient(
+        shared_client = VectorClientRegistry.get_client(
+            VectorType.OCEANBASE, config, self._create_client, stats=lambda client: engine_pool_stats(client.engine)
+        )
+        # only the engine is shared, tables are reflected on use into a metadata of this vector, so tables created
+        # or dropped by other vectors are not stale nor mutated concurrently
+        self._client = copy.copy(shared_client)
+        self._client.metadata_obj = MetaData()
+
+    def _create_client(self) -> ObVecClient:
+        return ObVecClient(
             uri=f"{self._config.host}:{self._config.port}",
             user=self._config.user,
             password=self._config.password,
             db_name=self._config.database,
+            **pooled_engine_options(),
         )
 
     def get_type(self) -> str:
@@ -1,7 +1,10 @@
 import json
+import threading
+import time
 import uuid
+from collections.abc import Hashable
 from contextlib import contextmanager
-from typing import Any
+from typing import Any, Optional
 
 import psycopg2.extras  # type: ignore
 import psycopg2.pool  # type: ignore
@@ -9,6 +12,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -63,19 +67,101 @@ USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 """
 
 
+class PGVectorConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe connection pool that health-checks connections which have been idle for too long before reuse.
+
+    Unlike the psycopg2 pools, which raise as soon as `maxconn` connections are in use, checkouts wait up to
+    `timeout` seconds for a connection to be returned.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, idle_check_interval: float, timeout: float = 30, **kwargs):
+        self._idle_check_interval = idle_check_interval
+        self._idle_since: dict[int, float] = {}
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self._checked_out = 0
+        self._checkouts = 0
+        self._replaced = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key: Optional[Hashable] = None) -> Any:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        try:
+            conn = self._checkout(key)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self._checked_out += 1
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn: Any = None, key: Optional[Hashable] = None, close: bool = False) -> None:
+        if conn is not None and not close:
+            self._idle_since[id(conn)] = time.monotonic()
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            with self._stats_lock:
+                self._checked_out -= 1
+            self._slots.release()
+
+    def _checkout(self, key=None):
+        conn = super().getconn(key)
+        idle_since = self._idle_since.pop(id(conn), None)
+        if idle_since is not None and time.monotonic() - idle_since >= self._idle_check_interval:
+            if not self._is_alive(conn):
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+                with self._stats_lock:
+                    self._replaced += 1
+        return conn
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "min_connections": self.minconn,
+                "max_connections": self.maxconn,
+                "checked_out_connections": self._checked_out,
+                "checkouts": self._checkouts,
+                "replaced_connections": self._replaced,
+            }
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = VectorClientRegistry.get_client(
+            VectorType.PGVECTOR,
+            config,
+            lambda: self._create_connection_pool(config),
+            stats=PGVectorConnectionPool.stats,
+        )
         self.table_name = f"embedding_{collection_name}"
 
     def get_type(self) -> str:
         return VectorType.PGVECTOR
 
     def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+        return PGVectorConnectionPool(
             config.min_connection,
             config.max_connection,
+            idle_check_interval=dify_config.VECTOR_STORE_POOL_IDLE_CHECK_INTERVAL,
             host=config.host,
             port=config.port,
             user=config.user,
@@ -86,12 +172,14 @@ class PGVector(BaseVector):
     @contextmanager
     def _get_cursor(self):
         conn = self.pool.getconn()
-        cur = conn.cursor()
         try:
-            yield cur
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+                conn.commit()
         finally:
-            cur.close()
-            conn.commit()
             self.pool.putconn(conn)
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
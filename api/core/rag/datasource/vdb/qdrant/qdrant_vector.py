@@ -5,6 +5,7 @@ from collections.abc import Generator, Iterable, Sequence
 from itertools import islice
 from typing import TYPE_CHECKING, Any, Optional, Union, cast
 
+import httpx
 import qdrant_client
 from flask import current_app
 from pydantic import BaseModel
@@ -22,6 +23,7 @@ from qdrant_client.local.qdrant_local import QdrantLocal
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -71,10 +73,20 @@ class QdrantVector(BaseVector):
     def __init__(self, collection_name: str, group_id: str, config: QdrantConfig, distance_func: str = "Cosine"):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = qdrant_client.QdrantClient(**self._client_config.to_qdrant_params())
+        self._client = VectorClientRegistry.get_client(VectorType.QDRANT, config, self._create_client)
         self._distance_func = distance_func.upper()
         self._group_id = group_id
 
+    def _create_client(self) -> qdrant_client.QdrantClient:
+        params = self._client_config.to_qdrant_params()
+        if "url" in params:
+            # keep connections alive between requests, the client closes them after each request by default
+            params["limits"] = httpx.Limits(
+                max_connections=dify_config.VECTOR_STORE_POOL_SIZE,
+                max_keepalive_connections=dify_config.VECTOR_STORE_POOL_SIZE,
+            )
+        return qdrant_client.QdrantClient(**params)
+
     def get_type(self) -> str:
         return VectorType.QDRANT
 
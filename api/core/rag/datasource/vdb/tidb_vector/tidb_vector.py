@@ -4,13 +4,18 @@ from typing import Any
 
 import sqlalchemy
 from pydantic import BaseModel, model_validator
-from sqlalchemy import JSON, TEXT, Column, DateTime, String, Table, create_engine, insert
+from sqlalchemy import JSON, TEXT, Column, DateTime, String, Table, insert
 from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session, declarative_base
 
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import (
+    VectorClientRegistry,
+    create_pooled_engine,
+    engine_pool_stats,
+)
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -78,7 +83,9 @@ class TiDBVector(BaseVector):
             f"ssl_verify_cert=true&ssl_verify_identity=true&program_name={config.program_name}"
         )
         self._distance_func = distance_func.lower()
-        self._engine = create_engine(self._url)
+        self._engine = VectorClientRegistry.get_client(
+            VectorType.TIDB_VECTOR, config, lambda: create_pooled_engine(self._url), stats=engine_pool_stats
+        )
         self._orm_base = declarative_base()
         self._dimension = 1536
 
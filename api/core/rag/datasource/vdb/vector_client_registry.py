@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypeVar, cast
+
+from pydantic import BaseModel
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.pool import QueuePool
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+_ClientT = TypeVar("_ClientT")
+
+
+@dataclass
+class _RegisteredClient:
+    vector_type: str
+    client: Any
+    stats: Optional[Callable[[Any], dict[str, Any]]]
+    created_at: float = field(default_factory=time.time)
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of vector database clients and connection pools.
+
+    Clients are keyed by vector type and connection config, so every `Vector` of the same backend shares one
+    client instead of opening new connections per dataset and retrieval thread.
+    """
+
+    _clients: dict[str, _RegisteredClient] = {}
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+    @classmethod
+    def get_client(
+        cls,
+        vector_type: str,
+        config: BaseModel,
+        factory: Callable[[], _ClientT],
+        stats: Optional[Callable[[_ClientT], dict[str, Any]]] = None,
+    ) -> _ClientT:
+        """
+        Get the shared client of a connection config, creating it on first use.
+        :param vector_type: vector type
+        :param config: connection config of the client
+        :param factory: creates the client
+        :param stats: reports the pool stats of the client
+        :return: shared client
+        """
+        key = cls._get_key(vector_type, config)
+        registered = cls._clients.get(key)
+        if registered and cls._pid == os.getpid():
+            return cast(_ClientT, registered.client)
+
+        with cls._lock:
+            if cls._pid != os.getpid():
+                # connections must not be shared with the parent process after a fork
+                cls._clients = {}
+                cls._pid = os.getpid()
+            registered = cls._clients.get(key)
+            if not registered:
+                registered = _RegisteredClient(vector_type=vector_type, client=factory(), stats=stats)
+                cls._clients[key] = registered
+            return cast(_ClientT, registered.client)
+
+    @classmethod
+    def get_stats(cls) -> list[dict[str, Any]]:
+        """
+        Get the pool stats of the registered clients.
+        :return: pool stats per client
+        """
+        if cls._pid != os.getpid():
+            return []
+
+        stats = []
+        for registered in list(cls._clients.values()):
+            client_stats: dict[str, Any] = {
+                "vector_type": registered.vector_type,
+                "client": type(registered.client).__name__,
+                "created_at": registered.created_at,
+            }
+            if registered.stats:
+                try:
+                    client_stats.update(registered.stats(registered.client))
+                except Exception:
+                    logger.exception("Failed to get pool stats of %s client", registered.vector_type)
+            stats.append(client_stats)
+        return stats
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Drop all registered clients.
+        """
+        with cls._lock:
+            cls._clients = {}
+
+    @staticmethod
+    def _get_key(vector_type: str, config: BaseModel) -> str:
+        config_hash = hashlib.sha256(config.model_dump_json().encode()).hexdigest()
+        return f"{vector_type}:{config_hash}"
+
+
+class VectorStoreConnectionPool(QueuePool):
+    """
+    Queue pool that pings connections on checkout when they have been idle for longer than
+    `VECTOR_STORE_POOL_IDLE_CHECK_INTERVAL` seconds, so that a connection dropped by the server is replaced
+    instead of failing the query.
+    """
+
+    def __init__(self, creator, **kwargs):
+        super().__init__(creator, **kwargs)
+        # recreated pools inherit the listeners of the pool they replace
+        if not event.contains(self, "checkin", _on_checkin):
+            event.listen(self, "checkin", _on_checkin)
+        if not event.contains(self, "checkout", _on_checkout):
+            event.listen(self, "checkout", _on_checkout)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    connection_record.info["idle_since"] = time.monotonic()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    idle_since = connection_record.info.pop("idle_since", None)
+    if idle_since is None or time.monotonic() - idle_since < dify_config.VECTOR_STORE_POOL_IDLE_CHECK_INTERVAL:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+    except Exception as e:
+        # the pool discards the connection and retries the checkout with a new one
+        raise exc.DisconnectionError() from e
+
+
+def pooled_engine_options() -> dict[str, Any]:
+    """
+    Get the engine options that cap the pool at `VECTOR_STORE_POOL_SIZE` connections.
+    :return: keyword arguments of `create_engine`
+    """
+    return {
+        "poolclass": VectorStoreConnectionPool,
+        "pool_size": dify_config.VECTOR_STORE_POOL_SIZE,
+        "max_overflow": 0,
+    }
+
+
+def create_pooled_engine(url: str) -> Engine:
+    """
+    Create an engine whose pool is capped and health-checks idle connections.
+    :param url: database url
+    :return: engine
+    """
+    return create_engine(url, **pooled_engine_options())
+
+
+def engine_pool_stats(engine: Engine) -> dict[str, Any]:
+    """
+    Get the pool stats of an engine.
+    :param engine: engine
+    :return: pool stats
+    """
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),  # type: ignore
+        "checked_in_connections": pool.checkedin(),  # type: ignore
+        "checked_out_connections": pool.checkedout(),  # type: ignore
+        "overflow_connections": pool.overflow(),  # type: ignore
+    }
@@ -148,6 +148,10 @@ class Vector:
                 from core.rag.datasource.vdb.oceanbase.oceanbase_vector import OceanBaseVectorFactory
 
                 return OceanBaseVectorFactory
+            case VectorType.EMBEDDED:
+                from core.rag.datasource.vdb.embedded.embedded_vector import EmbeddedVectorFactory
+
+                return EmbeddedVectorFactory
             case _:
                 raise ValueError(f"Vector store {vector_type} is not supported.")
 
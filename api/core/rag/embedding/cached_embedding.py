@@ -1,12 +1,14 @@
 import base64
 import logging
+import threading
 from typing import Any, Optional, cast
 
 import numpy as np
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 
 from configs import dify_config
 from core.entities.embedding_type import EmbeddingInputType
+from core.helper.lru_cache import LRUCache
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
@@ -18,6 +20,13 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# maximum number of hashes per cache lookup or insert statement
+_CACHE_QUERY_BATCH_SIZE = 1000
+
+# optional in-process tier in front of the embeddings table, holding encoded vectors
+_embedding_lru = LRUCache(dify_config.EMBEDDING_CACHE_LRU_SIZE) if dify_config.EMBEDDING_CACHE_LRU_SIZE else None
+_embedding_lru_lock = threading.Lock()
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
@@ -28,23 +37,16 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
+        hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(set(hashes))
         embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        for i, hash in enumerate(hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
                 embedding_queue_indices.append(i)
         if embedding_queue_indices:
-            embedding_queue_texts = [texts[i] for i in embedding_queue_indices]
-            embedding_queue_embeddings = []
+            new_embeddings: dict[str, list[float]] = {}
             try:
                 model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
                 model_schema = model_type_instance.get_model_schema(
@@ -55,14 +57,15 @@ class CacheEmbedding(Embeddings):
                     if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties
                     else 1
                 )
-                for i in range(0, len(embedding_queue_texts), max_chunks):
-                    batch_texts = embedding_queue_texts[i : i + max_chunks]
+                for i in range(0, len(embedding_queue_indices), max_chunks):
+                    batch_indices = embedding_queue_indices[i : i + max_chunks]
+                    batch_texts = [texts[index] for index in batch_indices]
 
                     embedding_result = self._model_instance.invoke_text_embedding(
                         texts=batch_texts, user=self._user, input_type=EmbeddingInputType.DOCUMENT
                     )
 
-                    for vector in embedding_result.embeddings:
+                    for index, vector in zip(batch_indices, embedding_result.embeddings):
                         try:
                             # FIXME: type ignore for numpy here
                             normalized_embedding = (vector / np.linalg.norm(vector)).tolist()  # type: ignore
@@ -71,28 +74,11 @@ class CacheEmbedding(Embeddings):
                                 # for issue #11827  float values are not json compliant
                                 logger.warning(f"Normalized embedding is nan: {normalized_embedding}")
                                 continue
-                            embedding_queue_embeddings.append(normalized_embedding)
-                        except IntegrityError:
-                            db.session.rollback()
+                            text_embeddings[index] = normalized_embedding
+                            new_embeddings[hashes[index]] = normalized_embedding
                         except Exception:
                             logging.exception("Failed transform embedding")
-                cache_embeddings = []
-                try:
-                    for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
-                        text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                self._store_embeddings(new_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.exception("Failed to embed documents: %s")
@@ -100,6 +86,75 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _cache_key(self, hash: str) -> tuple[str, str, str]:
+        return self._model_instance.provider, self._model_instance.model, hash
+
+    def _get_cached_embeddings(self, hashes: set[str]) -> dict[str, list[float]]:
+        """
+        Look up cached embeddings, first in the in-process LRU and then with one IN query per batch.
+        :param hashes: text hashes
+        :return: embeddings by text hash
+        """
+        cached_embeddings: dict[str, list[float]] = {}
+        missing_hashes = []
+        for hash in hashes:
+            data = None
+            if _embedding_lru is not None:
+                with _embedding_lru_lock:
+                    data = _embedding_lru.get(self._cache_key(hash))
+            if data is not None:
+                cached_embeddings[hash] = Embedding.decode_embedding(data)
+            else:
+                missing_hashes.append(hash)
+
+        for i in range(0, len(missing_hashes), _CACHE_QUERY_BATCH_SIZE):
+            rows = (
+                db.session.query(Embedding.hash, Embedding.embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(missing_hashes[i : i + _CACHE_QUERY_BATCH_SIZE]),
+                )
+                .all()
+            )
+            for hash, data in rows:
+                cached_embeddings[hash] = Embedding.decode_embedding(data)
+                self._put_lru(hash, data)
+
+        return cached_embeddings
+
+    def _store_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        Store new embeddings with one bulk insert per batch, rows cached concurrently by others are kept.
+        :param embeddings: embeddings by text hash
+        :return:
+        """
+        if not embeddings:
+            return
+
+        rows = [
+            {
+                "model_name": self._model_instance.model,
+                "hash": hash,
+                "provider_name": self._model_instance.provider,
+                "embedding": Embedding.encode_embedding(embedding),
+            }
+            for hash, embedding in embeddings.items()
+        ]
+        for i in range(0, len(rows), _CACHE_QUERY_BATCH_SIZE):
+            stmt = insert(Embedding).values(rows[i : i + _CACHE_QUERY_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+            db.session.execute(stmt)
+        db.session.commit()
+
+        for row in rows:
+            self._put_lru(cast(str, row["hash"]), cast(bytes, row["embedding"]))
+
+    def _put_lru(self, hash: str, data: bytes) -> None:
+        if _embedding_lru is not None:
+            with _embedding_lru_lock:
+                _embedding_lru.put(self._cache_key(hash), bytes(data))
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
@@ -1,12 +1,11 @@
-import math
-from collections import Counter
-from typing import Optional
+from typing import Optional, cast
 
 import numpy as np
 
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
@@ -65,80 +64,73 @@ class WeightRerankRunner(BaseRerankRunner):
 
     def _calculate_keyword_score(self, query: str, documents: list[Document]) -> list[float]:
         """
-        Calculate BM25 scores
+        Calculate TF-IDF cosine scores
         :param query: search query
         :param documents: documents for reranking
 
         :return:
         """
+        if not documents:
+            return []
+
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
+        documents_keywords = self._get_documents_keywords(keyword_table_handler, documents)
+
+        # build the document-term incidence matrix from the coordinates of every (document, keyword) pair
+        vocabulary: dict[str, int] = {}
+        rows: list[int] = []
+        columns: list[int] = []
+        for row, document_keywords in enumerate(documents_keywords):
+            for keyword in document_keywords:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(keyword, len(vocabulary)))
+        term_matrix = np.zeros((len(documents), len(vocabulary)))
+        term_matrix[rows, columns] = 1.0
+
+        # IDF of all documents' keywords, query keywords unknown to the documents weigh nothing
+        doc_count_containing_keyword = term_matrix.sum(axis=0)
+        keyword_idf = np.log((1 + len(documents)) / (1 + doc_count_containing_keyword)) + 1
+
+        query_tfidf = np.zeros(len(vocabulary))
+        query_columns = [vocabulary[keyword] for keyword in query_keywords if keyword in vocabulary]
+        query_tfidf[query_columns] = keyword_idf[query_columns]
+
+        documents_tfidf = term_matrix * keyword_idf
+        numerators = documents_tfidf @ query_tfidf
+        denominators = np.linalg.norm(documents_tfidf, axis=1) * np.linalg.norm(query_tfidf)
+        similarities = np.divide(numerators, denominators, out=np.zeros(len(documents)), where=denominators > 0)
+
+        return cast(list[float], similarities.tolist())
+
+    @staticmethod
+    def _get_documents_keywords(
+        keyword_table_handler: JiebaKeywordTableHandler, documents: list[Document]
+    ) -> list[set[str]]:
+        """
+        Get the keywords of every document, reusing the keywords stored on its segment when there are any
+        :param keyword_table_handler: keyword table handler
+        :param documents: documents for reranking
+
+        :return:
+        """
+        index_node_ids: dict[str, set[str]] = {}
+        for document in documents:
+            if document.metadata and document.metadata.get("dataset_id") and document.metadata.get("doc_id"):
+                index_node_ids.setdefault(document.metadata["dataset_id"], set()).add(document.metadata["doc_id"])
+        segments = SegmentHydrator.get_segments(index_node_ids, {})[0] if index_node_ids else {}
+
         documents_keywords = []
         for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
+            segment = segments.get(document.metadata["doc_id"]) if document.metadata else None
+            if segment and segment.keywords:
+                document_keywords = set(segment.keywords)
+            else:
+                document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
             if document.metadata is not None:
                 document.metadata["keywords"] = document_keywords
-                documents_keywords.append(document_keywords)
-
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
-        total_documents = len(documents)
-
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
-
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
-
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
-
-        return similarities
+            documents_keywords.append(document_keywords)
+        return documents_keywords
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -150,7 +142,17 @@ class WeightRerankRunner(BaseRerankRunner):
 
         :return:
         """
-        query_vector_scores = []
+        query_vector_scores = [
+            document.metadata["score"] if document.metadata and "score" in document.metadata else 0.0
+            for document in documents
+        ]
+        unscored = [
+            index
+            for index, document in enumerate(documents)
+            if not (document.metadata and "score" in document.metadata) and document.vector
+        ]
+        if not unscored:
+            return query_vector_scores
 
         model_manager = ModelManager()
 
@@ -161,25 +163,14 @@ class WeightRerankRunner(BaseRerankRunner):
             model=vector_setting.embedding_model_name,
         )
         cache_embedding = CacheEmbedding(embedding_model)
-        query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
-            if document.metadata and "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
-            else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
+        query_vector = np.array(cache_embedding.embed_query(query))
+        document_vectors = np.array([documents[index].vector for index in unscored])
 
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
-
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+        # calculate cosine similarity of all unscored documents at once
+        cosine_sims = (document_vectors @ query_vector) / (
+            np.linalg.norm(document_vectors, axis=1) * np.linalg.norm(query_vector)
+        )
+        for index, cosine_sim in zip(unscored, cosine_sims.tolist()):
+            query_vector_scores[index] = cosine_sim
 
         return query_vector_scores
@@ -1,9 +1,9 @@
 import re
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from typing import Any, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.file import File, FileAttribute, file_manager
 from core.variables import Segment, SegmentGroup, Variable
@@ -43,6 +43,11 @@ class VariablePool(BaseModel):
         description="Conversation variables.",
         default_factory=list,
     )
+    # A child pool sees its parent pool read-only and only holds its own writes. Variables and nodes removed in a
+    # child pool are recorded to hide them in the parent pool.
+    _parent: Optional["VariablePool"] = PrivateAttr(default=None)
+    _removed_node_ids: set[str] = PrivateAttr(default_factory=set)
+    _removed_keys: set[tuple[str, int]] = PrivateAttr(default_factory=set)
 
     def __init__(
         self,
@@ -105,6 +110,7 @@ class VariablePool(BaseModel):
 
         hash_key = hash(tuple(selector[1:]))
         self.variable_dictionary[selector[0]][hash_key] = variable
+        self._removed_keys.discard((selector[0], hash_key))
 
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
@@ -123,7 +129,7 @@ class VariablePool(BaseModel):
             return None
 
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self._lookup(selector[0], hash_key)
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
@@ -153,9 +159,67 @@ class VariablePool(BaseModel):
             return
         if len(selector) == 1:
             self.variable_dictionary[selector[0]] = {}
+            if self._parent is not None:
+                self._removed_node_ids.add(selector[0])
             return
         hash_key = hash(tuple(selector[1:]))
         self.variable_dictionary[selector[0]].pop(hash_key, None)
+        if self._parent is not None:
+            self._removed_keys.add((selector[0], hash_key))
+
+    def create_child(self) -> "VariablePool":
+        """
+        Create a child pool that reads through to this pool and keeps its own writes and removals.
+
+        Writes of the child pool are not visible in this pool until `merge_into_parent` is called,
+        so a child costs memory for its writes only instead of a full copy of this pool.
+
+        Returns:
+            VariablePool: The child pool.
+        """
+        child = VariablePool.model_construct(
+            variable_dictionary=defaultdict(dict),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+        )
+        child._parent = self
+        return child
+
+    def merge_into_parent(self) -> None:
+        """
+        Apply the writes and removals of this child pool to its parent pool.
+
+        Raises:
+            ValueError: If the pool has no parent.
+        """
+        parent = self._parent
+        if parent is None:
+            raise ValueError("Variable pool has no parent")
+
+        for node_id in self._removed_node_ids:
+            parent.remove([node_id])
+        for node_id, hash_key in self._removed_keys:
+            parent.variable_dictionary[node_id].pop(hash_key, None)
+            if parent._parent is not None:
+                parent._removed_keys.add((node_id, hash_key))
+        for node_id, variables in self.variable_dictionary.items():
+            for hash_key, variable in variables.items():
+                parent.variable_dictionary[node_id][hash_key] = variable
+                parent._removed_keys.discard((node_id, hash_key))
+
+    def _lookup(self, node_id: str, hash_key: int) -> Segment | None:
+        pool: Optional[VariablePool] = self
+        while pool is not None:
+            # avoid creating entries in the defaultdict of parent pools, which may be read concurrently
+            variables = pool.variable_dictionary.get(node_id)
+            if variables and hash_key in variables:
+                return variables[hash_key]
+            if node_id in pool._removed_node_ids or (node_id, hash_key) in pool._removed_keys:
+                return None
+            pool = pool._parent
+        return None
 
     def convert_template(self, template: str, /):
         parts = VARIABLE_PATTERN.split(template)
@@ -3,7 +3,7 @@ from collections import defaultdict
 from collections.abc import Mapping
 from typing import Any, Optional, cast
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from configs import dify_config
 from core.workflow.graph_engine.entities.run_condition import RunCondition
@@ -33,6 +33,9 @@ class GraphParallel(BaseModel):
 
 
 class Graph(BaseModel):
+    # compiled graphs are shared between runs through GraphCache
+    model_config = ConfigDict(frozen=True)
+
     root_node_id: str = Field(..., description="root node id of the graph")
     node_ids: list[str] = Field(default_factory=list, description="graph node ids")
     node_id_config_mapping: dict[str, dict] = Field(
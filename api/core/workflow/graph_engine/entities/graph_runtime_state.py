@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 from typing import Any
 
 from pydantic import BaseModel, Field
@@ -25,3 +26,6 @@ class GraphRuntimeState(BaseModel):
 
     node_run_state: RuntimeRouteState = RuntimeRouteState()
     """node run state"""
+
+    code_node_results: dict[str, tuple[str, Mapping[str, Any] | str]] = {}
+    """inputs key and result, or error message, of code nodes executed in batch ahead of their next run, by node id"""
@@ -0,0 +1,61 @@
+import json
+import threading
+from collections.abc import Mapping
+from typing import Any, Optional, cast
+
+from configs import dify_config
+from core.helper.lru_cache import LRUCache
+from core.workflow.graph_engine.entities.graph import Graph
+from libs import helper
+
+
+class GraphCache:
+    """
+    In-process LRU cache of compiled graphs keyed by graph hash and root node id.
+
+    Compiling a graph walks all of its edges to find parallels and stream routes, so runs of the same workflow
+    share one immutable `Graph` instead of compiling it again. The graph hash is `Workflow.unique_hash` when the
+    workflow is at hand and a hash of the graph config otherwise, so an edited workflow never hits a stale graph.
+    """
+
+    _cache: Optional[LRUCache] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(
+        cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None, graph_hash: Optional[str] = None
+    ) -> Graph:
+        """
+        Get the compiled graph of a graph config, compiling it on a cache miss
+        :param graph_config: graph config
+        :param root_node_id: root node id
+        :param graph_hash: hash identifying the graph config, computed from the config if not given
+        :return: graph
+        """
+        if not dify_config.WORKFLOW_GRAPH_CACHE_SIZE:
+            return Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+
+        if graph_hash is None:
+            graph_hash = helper.generate_text_hash(json.dumps(graph_config, sort_keys=True))
+        key = (graph_hash, root_node_id)
+
+        with cls._lock:
+            if cls._cache is None or cls._cache.capacity != dify_config.WORKFLOW_GRAPH_CACHE_SIZE:
+                cls._cache = LRUCache(dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
+            graph = cast(Optional[Graph], cls._cache.get(key))
+        if graph is not None:
+            return graph
+
+        graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        with cls._lock:
+            if cls._cache is not None:
+                cls._cache.put(key, graph)
+        return graph
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Drop all cached graphs
+        """
+        with cls._lock:
+            cls._cache = None
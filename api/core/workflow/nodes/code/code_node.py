@@ -1,3 +1,4 @@
+import json
 from collections.abc import Mapping, Sequence
 from typing import Any, Optional
 
@@ -50,13 +51,22 @@ class CodeNode(BaseNode[CodeNodeData]):
             variable_name = variable_selector.variable
             variable = self.graph_runtime_state.variable_pool.get(variable_selector.value_selector)
             variables[variable_name] = variable.to_object() if variable else None
-        # Run code
+        # Run code, unless it already ran with these inputs in a batch
         try:
-            result = CodeExecutor.execute_workflow_code_template(
-                language=code_language,
-                code=code,
-                inputs=variables,
-            )
+            # a batch result is used once, retries execute the code again
+            batch_entry = self.graph_runtime_state.code_node_results.pop(self.node_id, None)
+            result = None
+            if batch_entry is not None and batch_entry[0] == self.get_inputs_key(variables):
+                batch_result = batch_entry[1]
+                if isinstance(batch_result, str):
+                    raise CodeExecutionError(batch_result)
+                result = batch_result
+            if result is None:
+                result = CodeExecutor.execute_workflow_code_template(
+                    language=code_language,
+                    code=code,
+                    inputs=variables,
+                )
 
             # Transform result
             result = self._transform_result(result=result, output_schema=self.node_data.outputs)
@@ -67,6 +77,42 @@ class CodeNode(BaseNode[CodeNodeData]):
 
         return NodeRunResult(status=WorkflowNodeExecutionStatus.SUCCEEDED, inputs=variables, outputs=result)
 
+    @staticmethod
+    def get_inputs_key(inputs: Mapping[str, Any]) -> Optional[str]:
+        """
+        Get the key of inputs of a code node run in `GraphRuntimeState.code_node_results`
+        :param inputs: inputs
+        :return: key, None if the inputs can not be serialized
+        """
+        try:
+            return json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def execute_in_batch(
+        cls, node_data: CodeNodeData, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> dict[int, tuple[str, Mapping[str, Any] | str]]:
+        """
+        Execute the code of a node once with each of the inputs in batch
+        :param node_data: node data
+        :param inputs_list: inputs of each run
+        :return: inputs key and result, or error message, of each run done, by index of its inputs
+        """
+        keys = {
+            index: key for index, inputs in enumerate(inputs_list) if (key := cls.get_inputs_key(inputs)) is not None
+        }
+        results = CodeExecutor.execute_workflow_code_template_batch(
+            language=node_data.code_language,
+            code=node_data.code,
+            inputs_list=[inputs_list[index] for index in keys],
+        )
+        return {
+            index: (key, str(result) if isinstance(result, CodeExecutionError) else result)
+            for (index, key), result in zip(keys.items(), results)
+            if result is not None
+        }
+
     def _check_string(self, value: str | None, variable: str) -> str | None:
         """
         Check string
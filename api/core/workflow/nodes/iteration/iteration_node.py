@@ -5,12 +5,13 @@ from collections.abc import Generator, Mapping, Sequence
 from concurrent.futures import Future, wait
 from datetime import UTC, datetime
 from queue import Empty, Queue
-from typing import TYPE_CHECKING, Any, Optional, cast
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, cast
 
 from flask import Flask, current_app
 
 from configs import dify_config
 from core.variables import ArrayVariable, IntegerVariable, NoneVariable
+from core.workflow.constants import CONVERSATION_VARIABLE_NODE_ID
 from core.workflow.entities.node_entities import (
     NodeRunMetadataKey,
     NodeRunResult,
@@ -33,10 +34,12 @@ from core.workflow.graph_engine.entities.event import (
     NodeRunSucceededEvent,
 )
 from core.workflow.graph_engine.entities.graph import Graph
+from core.workflow.graph_engine.graph_cache import GraphCache
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode, IterationNodeData
+from factories import variable_factory
 from models.workflow import WorkflowNodeExecutionStatus
 
 from .exc import (
@@ -50,6 +53,7 @@ from .exc import (
 
 if TYPE_CHECKING:
     from core.workflow.graph_engine.graph_engine import GraphEngine
+    from core.workflow.nodes.code.entities import CodeNodeData
 logger = logging.getLogger(__name__)
 
 
@@ -108,7 +112,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = GraphCache.get(graph_config=graph_config, root_node_id=root_node_id)
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -214,7 +218,23 @@ class IterationNode(BaseNode[IterationNodeData]):
                 # wait all threads
                 wait(futures)
             else:
-                for _ in range(len(iterator_list_value)):
+                # parallel iterations already run their code nodes concurrently, and iterations terminated by an
+                # error may never reach the items after it
+                batch_code_nodes: list[_BatchCodeNode] = []
+                if (
+                    dify_config.CODE_EXECUTION_BATCH_SIZE > 1
+                    and len(iterator_list_value) > 1
+                    and self.node_data.error_handle_mode != ErrorHandleMode.TERMINATED
+                ):
+                    batch_code_nodes = self._get_batch_code_nodes(iteration_graph, variable_pool)
+                batch_results: dict[str, dict[int, tuple[str, Mapping[str, Any] | str]]] = {}
+                for index in range(len(iterator_list_value)):
+                    graph_engine.graph_runtime_state.code_node_results = self._execute_code_nodes_in_batch(
+                        batch_code_nodes=batch_code_nodes,
+                        iterator_list_value=iterator_list_value,
+                        index=index,
+                        batch_results=batch_results,
+                    )
                     yield from self._run_single_iter(
                         iterator_list_value=iterator_list_value,
                         variable_pool=variable_pool,
@@ -281,6 +301,96 @@ class IterationNode(BaseNode[IterationNodeData]):
             variable_pool.remove([self.node_id, "index"])
             variable_pool.remove([self.node_id, "item"])
 
+    def _get_batch_code_nodes(self, iteration_graph: Graph, variable_pool: VariablePool) -> list["_BatchCodeNode"]:
+        """
+        Get the code nodes that every iteration runs first, which can be executed in batch.
+
+        Only code nodes run unconditionally from the start of the iteration, with variables of the item, the index
+        or nodes outside the iteration that already ran, have inputs known before the iteration runs.
+        :return: code nodes with their variables the same in every iteration
+        """
+        from core.helper.code_executor.code_executor import CodeExecutor
+        from core.workflow.nodes.code.entities import CodeNodeData
+
+        root_node_id = iteration_graph.root_node_id
+        node_ids = [root_node_id] + [
+            edge.target_node_id
+            for edge in iteration_graph.edge_mapping.get(root_node_id, [])
+            if edge.run_condition is None
+        ]
+
+        batch_code_nodes = []
+        for node_id in node_ids:
+            node_config = iteration_graph.node_id_config_mapping.get(node_id, {})
+            if node_config.get("data", {}).get("type") != NodeType.CODE.value:
+                continue
+            node_data = CodeNodeData(**node_config["data"])
+            if not CodeExecutor.supports_batch(node_data.code_language):
+                continue
+
+            # variables the same in every iteration
+            shared_variables: dict[str, Any] = {}
+            item_variables: dict[str, str] = {}
+            for variable_selector in node_data.variables:
+                selector = variable_selector.value_selector
+                if list(selector) in ([self.node_id, "item"], [self.node_id, "index"]):
+                    item_variables[variable_selector.variable] = selector[1]
+                    continue
+                if selector[0] in {self.node_id, CONVERSATION_VARIABLE_NODE_ID, *iteration_graph.node_ids}:
+                    break
+                variable = variable_pool.get(selector)
+                if variable is None:
+                    break
+                shared_variables[variable_selector.variable] = variable.to_object()
+            else:
+                batch_code_nodes.append(_BatchCodeNode(node_id, node_data, shared_variables, item_variables))
+
+        return batch_code_nodes
+
+    def _execute_code_nodes_in_batch(
+        self,
+        *,
+        batch_code_nodes: Sequence["_BatchCodeNode"],
+        iterator_list_value: Sequence[Any],
+        index: int,
+        batch_results: dict[str, dict[int, tuple[str, Mapping[str, Any] | str]]],
+    ) -> dict[str, tuple[str, Mapping[str, Any] | str]]:
+        """
+        Get the batch results of the code nodes for the iteration of an item, executing the code nodes without one
+        with the inputs of the next CODE_EXECUTION_BATCH_SIZE items, so no more than a batch of items runs ahead of
+        the iteration.
+        :param batch_code_nodes: code nodes executed in batch
+        :param iterator_list_value: items
+        :param index: index of the item
+        :param batch_results: inputs key and result, or error message, of the items executed ahead, by node id and
+            index, the ones of the item are taken out
+        :return: inputs key and result, or error message, of the item by node id
+        """
+        from core.workflow.nodes.code.code_node import CodeNode
+
+        code_node_results: dict[str, tuple[str, Mapping[str, Any] | str]] = {}
+        for batch_code_node in batch_code_nodes:
+            node_results = batch_results.setdefault(batch_code_node.node_id, {})
+            # items after the last one executed ahead have not been executed yet
+            if index not in node_results and not any(result_index > index for result_index in node_results):
+                inputs_list = []
+                for item_index, item in enumerate(
+                    iterator_list_value[index : index + dify_config.CODE_EXECUTION_BATCH_SIZE], start=index
+                ):
+                    values = {"item": variable_factory.build_segment(item).to_object(), "index": item_index}
+                    inputs_list.append(
+                        {
+                            **batch_code_node.shared_variables,
+                            **{name: values[key] for name, key in batch_code_node.item_variables.items()},
+                        }
+                    )
+                for offset, result in CodeNode.execute_in_batch(batch_code_node.node_data, inputs_list).items():
+                    node_results[index + offset] = result
+            if index in node_results:
+                code_node_results[batch_code_node.node_id] = node_results.pop(index)
+
+        return code_node_results
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
         cls,
@@ -301,7 +411,7 @@ class IterationNode(BaseNode[IterationNodeData]):
         }
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=node_data.start_node_id)
+        iteration_graph = GraphCache.get(graph_config=graph_config, root_node_id=node_data.start_node_id)
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -606,3 +716,16 @@ class IterationNode(BaseNode[IterationNodeData]):
             ):
                 q.put(event)
             graph_engine.graph_runtime_state.total_tokens += graph_engine_copy.graph_runtime_state.total_tokens
+
+
+class _BatchCodeNode(NamedTuple):
+    """
+    Code node executed in batch ahead of the iterations running it
+    """
+
+    node_id: str
+    node_data: "CodeNodeData"
+    # variables the same in every iteration
+    shared_variables: dict[str, Any]
+    # variables of the item, by the name of the iteration variable, "item" or "index"
+    item_variables: dict[str, str]
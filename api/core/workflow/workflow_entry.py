@@ -15,6 +15,7 @@ from core.workflow.graph_engine.entities.event import GraphEngineEvent, GraphRun
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.graph_init_params import GraphInitParams
 from core.workflow.graph_engine.entities.graph_runtime_state import GraphRuntimeState
+from core.workflow.graph_engine.graph_cache import GraphCache
 from core.workflow.graph_engine.graph_engine import GraphEngine
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.base import BaseNode
@@ -152,7 +153,7 @@ class WorkflowEntry:
         variable_pool = VariablePool(environment_variables=workflow.environment_variables)
 
         # init graph
-        graph = Graph.init(graph_config=workflow.graph_dict)
+        graph = GraphCache.get(graph_config=workflow_graph, graph_hash=workflow.unique_hash)
 
         # init workflow run state
         node_instance = node_cls(
@@ -1,9 +1,9 @@
 from configs import dify_config
 from core.app.entities.app_invoke_entities import AgentChatAppGenerateEntity, ChatAppGenerateEntity
 from core.entities.provider_entities import QuotaUnit
+from core.helper.provider_usage_buffer import ProviderUsageBuffer
 from events.message_event import message_was_created
-from extensions.ext_database import db
-from models.provider import Provider, ProviderType
+from models.provider import ProviderType
 
 
 @message_was_created.connect
@@ -46,11 +46,9 @@ def handle(sender, **kwargs):
             used_quota = 1
 
     if used_quota is not None and system_configuration.current_quota_type is not None:
-        db.session.query(Provider).filter(
-            Provider.tenant_id == application_generate_entity.app_config.tenant_id,
-            Provider.provider_name == model_config.provider,
-            Provider.provider_type == ProviderType.SYSTEM.value,
-            Provider.quota_type == system_configuration.current_quota_type.value,
-            Provider.quota_limit > Provider.quota_used,
-        ).update({"quota_used": Provider.quota_used + used_quota})
-        db.session.commit()
+        ProviderUsageBuffer.add_quota_used(
+            tenant_id=application_generate_entity.app_config.tenant_id,
+            provider_name=model_config.provider,
+            quota_type=system_configuration.current_quota_type.value,
+            used_quota=used_quota,
+        )
@@ -51,6 +51,7 @@ def init_app(app: DifyApp):
 
     @app.route("/db-pool-stat")
     def pool_stat():
+        from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
         from extensions.ext_database import db
 
         engine = db.engine
@@ -64,4 +65,16 @@ def init_app(app: DifyApp):
             "overflow_connections": engine.pool.overflow(),  # type: ignore
             "connection_timeout": engine.pool.timeout(),  # type: ignore
             "recycle_time": db.engine.pool._recycle,  # type: ignore
+            "vector_store_pools": VectorClientRegistry.get_stats(),
+        }
+
+    @app.route("/plugin-daemon-stat")
+    def plugin_daemon_stat():
+        from core.plugin.manager.http_client import LATENCY_BUCKETS, plugin_daemon_request_stats
+
+        return {
+            "pid": os.getpid(),
+            "pool_maxsize": dify_config.PLUGIN_DAEMON_POOL_MAXSIZE,
+            "latency_buckets": list(LATENCY_BUCKETS),
+            "plugins": plugin_daemon_request_stats.snapshot(),
         }
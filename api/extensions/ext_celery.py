@@ -70,6 +70,9 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.update_tidb_serverless_status_task",
         "schedule.clean_messages",
         "schedule.mail_clean_document_notify_task",
+        "schedule.app_statistic_rollup_task",
+        "tasks.flush_provider_usage_task",
+        "tasks.roll_up_app_statistics_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -98,6 +101,16 @@ def init_app(app: DifyApp) -> Celery:
             "task": "schedule.mail_clean_document_notify_task.mail_clean_document_notify_task",
             "schedule": crontab(minute="0", hour="10", day_of_week="1"),
         },
+        # every hour, each timezone is rolled up once its day is over
+        "app_statistic_rollup_task": {
+            "task": "schedule.app_statistic_rollup_task.app_statistic_rollup_task",
+            "schedule": crontab(minute="5", hour="*"),
+        },
+        # flushes are scheduled by the usages themselves, this picks up usages left by a failed flush
+        "flush_provider_usage_task": {
+            "task": "tasks.flush_provider_usage_task.flush_provider_usage_task",
+            "schedule": timedelta(minutes=10),
+        },
     }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
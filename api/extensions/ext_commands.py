@@ -11,6 +11,7 @@ def init_app(app: DifyApp):
         fix_app_site_missing,
         install_plugins,
         migrate_data_for_plugin,
+        migrate_keyword_index,
         reset_email,
         reset_encrypt_key_pair,
         reset_password,
@@ -32,6 +33,7 @@ def init_app(app: DifyApp):
         extract_plugins,
         extract_unique_plugins,
         install_plugins,
+        migrate_keyword_index,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
@@ -22,3 +22,9 @@ workflow_app_log_pagination_fields = {
     "has_more": fields.Boolean(attribute="has_next"),
     "data": fields.List(fields.Nested(workflow_app_log_partial_fields), attribute="items"),
 }
+
+workflow_app_log_infinite_scroll_pagination_fields = {
+    "limit": fields.Integer,
+    "has_more": fields.Boolean,
+    "data": fields.List(fields.Nested(workflow_app_log_partial_fields)),
+}
@@ -1,5 +1,52 @@
+from typing import Any, Optional
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Session, scoped_session
+
+
 class InfiniteScrollPagination:
     def __init__(self, data, limit, has_more):
         self.data = data
         self.limit = limit
         self.has_more = has_more
+
+
+def paginate_by_keyset(
+    session: Session | scoped_session,
+    stmt: Select,
+    *,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    limit: int,
+    last: Optional[Any] = None,
+    descending: bool = True,
+) -> InfiniteScrollPagination:
+    """
+    Paginate a select of rows by their (sort column, id) keys, one page after the last row of the previous page.
+
+    Rows are ordered by the sort column then by id, so rows sharing a sort value are neither skipped nor repeated,
+    and one more row than the limit is fetched to tell if there are more rows instead of counting them. A composite
+    index ending with the sort column and id serves the page from an index range scan.
+
+    :param session: session
+    :param stmt: select of the rows, with its filters
+    :param sort_column: column the rows are ordered by
+    :param id_column: unique column breaking ties of the sort column
+    :param limit: page size
+    :param last: last row of the previous page, None for the first page
+    :param descending: order the rows in descending order
+    :return: pagination of the rows
+    """
+    keys = tuple_(sort_column, id_column)
+    if last is not None:
+        last_keys = (getattr(last, sort_column.key), getattr(last, id_column.key))
+        stmt = stmt.where(keys < last_keys if descending else keys > last_keys)
+
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), id_column.asc())
+
+    rows = list(session.scalars(stmt.limit(limit + 1)).all())
+    has_more = len(rows) > limit
+    return InfiniteScrollPagination(data=rows[:limit], limit=limit, has_more=has_more)
@@ -14,6 +14,7 @@ from .dataset import (
     AppDatasetJoin,
     Dataset,
     DatasetCollectionBinding,
+    DatasetKeywordIndex,
     DatasetKeywordTable,
     DatasetPermission,
     DatasetPermissionEnum,
@@ -35,8 +36,10 @@ from .model import (
     App,
     AppAnnotationHitHistory,
     AppAnnotationSetting,
+    AppDailyStatistic,
     AppMode,
     AppModelConfig,
+    AppStatisticRollup,
     Conversation,
     DatasetRetrieverResource,
     DifySetup,
@@ -105,9 +108,11 @@ __all__ = [
     "App",
     "AppAnnotationHitHistory",
     "AppAnnotationSetting",
+    "AppDailyStatistic",
     "AppDatasetJoin",
     "AppMode",
     "AppModelConfig",
+    "AppStatisticRollup",
     "BuiltinToolProvider",  # Added
     "CeleryTask",
     "CeleryTaskSet",
@@ -118,6 +123,7 @@ __all__ = [
     "DataSourceOauthBinding",
     "Dataset",
     "DatasetCollectionBinding",
+    "DatasetKeywordIndex",
     "DatasetKeywordTable",
     "DatasetPermission",
     "DatasetPermissionEnum",
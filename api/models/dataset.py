@@ -11,6 +11,7 @@ import time
 from json import JSONDecodeError
 from typing import Any, cast
 
+import numpy as np
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped
@@ -753,6 +754,23 @@ class DatasetKeywordTable(db.Model):  # type: ignore[name-defined]
                 return None
 
 
+class DatasetKeywordIndex(db.Model):  # type: ignore[name-defined]
+    """
+    Inverted keyword index of a dataset, one posting per (keyword, index node) pair.
+    """
+
+    __tablename__ = "dataset_keyword_indexes"
+    __table_args__ = (
+        db.PrimaryKeyConstraint("dataset_id", "keyword", "index_node_id", name="dataset_keyword_index_pkey"),
+        db.Index("dataset_keyword_index_node_idx", "dataset_id", "index_node_id"),
+    )
+
+    dataset_id = db.Column(StringUUID, nullable=False)
+    keyword = db.Column(db.Text, nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
 class Embedding(db.Model):  # type: ignore[name-defined]
     __tablename__ = "embeddings"
     __table_args__ = (
@@ -770,11 +788,24 @@ class Embedding(db.Model):  # type: ignore[name-defined]
     created_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
     provider_name = db.Column(db.String(255), nullable=False, server_default=db.text("''::character varying"))
 
+    # marks raw little-endian float32 payloads, legacy rows hold a pickled list instead
+    FLOAT32_PREFIX = b"f32:"
+
     def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.embedding = self.encode_embedding(embedding_data)
 
     def get_embedding(self) -> list[float]:
-        return cast(list[float], pickle.loads(self.embedding))
+        return self.decode_embedding(self.embedding)
+
+    @classmethod
+    def encode_embedding(cls, embedding_data: list[float]) -> bytes:
+        return cls.FLOAT32_PREFIX + np.asarray(embedding_data, dtype="<f4").tobytes()
+
+    @classmethod
+    def decode_embedding(cls, data: bytes) -> list[float]:
+        if data[: len(cls.FLOAT32_PREFIX)] == cls.FLOAT32_PREFIX:
+            return cast(list[float], np.frombuffer(data, dtype="<f4", offset=len(cls.FLOAT32_PREFIX)).tolist())
+        return cast(list[float], pickle.loads(data))
 
 
 class DatasetCollectionBinding(db.Model):  # type: ignore[name-defined]
@@ -608,7 +608,10 @@ class Conversation(Base):
     __tablename__ = "conversations"
     __table_args__ = (
         db.PrimaryKeyConstraint("id", name="conversation_pkey"),
-        db.Index("conversation_app_from_user_idx", "app_id", "from_source", "from_end_user_id"),
+        db.Index(
+            "conversation_app_from_user_updated_at_idx", "app_id", "from_source", "from_end_user_id", "updated_at", "id"
+        ),
+        db.Index("conversation_app_created_at_idx", "app_id", "created_at"),
     )
 
     id: Mapped[str] = mapped_column(StringUUID, server_default=db.text("uuid_generate_v4()"))
@@ -844,7 +847,7 @@ class Message(Base):
     __table_args__ = (
         PrimaryKeyConstraint("id", name="message_pkey"),
         Index("message_app_id_idx", "app_id", "created_at"),
-        Index("message_conversation_id_idx", "conversation_id"),
+        Index("message_conversation_created_at_idx", "conversation_id", "created_at", "id"),
         Index("message_end_user_idx", "app_id", "from_source", "from_end_user_id"),
         Index("message_account_idx", "app_id", "from_source", "from_account_id"),
         Index("message_workflow_run_id_idx", "conversation_id", "workflow_run_id"),
@@ -1799,3 +1802,43 @@ class TraceAppConfig(Base):
             "created_at": str(self.created_at) if self.created_at else None,
             "updated_at": str(self.updated_at) if self.updated_at else None,
         }
+
+
+class AppDailyStatistic(Base):
+    """
+    Message and conversation statistics of an app for a day in a timezone, rolled up for the statistic charts.
+    """
+
+    __tablename__ = "app_daily_statistics"
+    __table_args__ = (db.PrimaryKeyConstraint("app_id", "timezone", "date", name="app_daily_statistic_pkey"),)
+
+    app_id = db.Column(StringUUID, nullable=False)
+    timezone = db.Column(db.String(255), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    # messages created on the day
+    message_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    conversation_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    terminal_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    message_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text("0"))
+    answer_tokens = db.Column(db.BigInteger, nullable=False, server_default=db.text("0"))
+    total_price = db.Column(db.Numeric(20, 7))
+    provider_response_latency = db.Column(db.Float, nullable=False, server_default=db.text("0"))
+    like_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    # conversations created on the day and their messages
+    interaction_conversation_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    interaction_message_count = db.Column(db.Integer, nullable=False, server_default=db.text("0"))
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+class AppStatisticRollup(Base):
+    """
+    Days of an app in a timezone rolled up into app daily statistics, every day before `rolled_up_until`.
+    """
+
+    __tablename__ = "app_statistic_rollups"
+    __table_args__ = (db.PrimaryKeyConstraint("app_id", "timezone", name="app_statistic_rollup_pkey"),)
+
+    app_id = db.Column(StringUUID, nullable=False)
+    timezone = db.Column(db.String(255), nullable=False)
+    rolled_up_until = db.Column(db.Date, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=func.current_timestamp())
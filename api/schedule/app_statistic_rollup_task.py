@@ -0,0 +1,37 @@
+import logging
+import time
+from datetime import datetime
+
+import click
+import pytz
+
+import app
+from configs import dify_config
+from extensions.ext_database import db
+from models.model import AppStatisticRollup
+from services.app_statistic_service import AppStatisticService
+
+
+@app.celery.task(queue="dataset")
+def app_statistic_rollup_task():
+    click.echo(click.style("Start roll up app statistics.", fg="green"))
+    start_at = time.perf_counter()
+
+    rollups = db.session.query(
+        AppStatisticRollup.app_id, AppStatisticRollup.timezone, AppStatisticRollup.rolled_up_until
+    ).all()
+    rolled_up = 0
+    for app_id, timezone, rolled_up_until in rollups:
+        # roll up the apps in a timezone once a day, after the previous day is over in the timezone
+        today = datetime.now(pytz.timezone(timezone)).date()
+        if rolled_up_until >= today:
+            continue
+        try:
+            AppStatisticService.roll_up(app_id, timezone, today, dify_config.APP_STATISTIC_ROLLUP_REFRESH_DAYS)
+            rolled_up += 1
+        except Exception:
+            db.session.rollback()
+            logging.exception(f"Roll up statistics of app {app_id} in timezone {timezone} failed")
+
+    end_at = time.perf_counter()
+    click.echo(click.style(f"Rolled up statistics of {rolled_up} apps, latency: {end_at - start_at}", fg="green"))
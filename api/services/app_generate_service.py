@@ -1,20 +1,30 @@
+import logging
 from collections.abc import Generator, Mapping
-from typing import Any, Union
+from typing import Any, Optional, Union
 
+from flask import g, has_app_context
 from openai._exceptions import RateLimitError
 
 from configs import dify_config
 from core.app.apps.advanced_chat.app_generator import AdvancedChatAppGenerator
 from core.app.apps.agent_chat.app_generator import AgentChatAppGenerator
+from core.app.apps.app_generate_stream import AppGenerateStream
+from core.app.apps.base_app_generate_response_converter import AppGenerateResponseConverter
 from core.app.apps.chat.app_generator import ChatAppGenerator
 from core.app.apps.completion.app_generator import CompletionAppGenerator
 from core.app.apps.workflow.app_generator import WorkflowAppGenerator
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.features.rate_limiting import RateLimit
+from core.app.features.rate_limiting.rate_limit import RequestRateBucket
+from extensions.ext_database import db
 from models.model import Account, App, AppMode, EndUser
 from models.workflow import Workflow
+from services.errors.app import GenerateStreamNotFoundError
 from services.errors.llm import InvokeRateLimitError
 from services.workflow_service import WorkflowService
+from tasks.app_generate_task import app_generate_task
+
+logger = logging.getLogger(__name__)
 
 
 class AppGenerateService:
@@ -40,8 +50,18 @@ class AppGenerateService:
         rate_limit = RateLimit(app_model.id, max_active_request)
         request_id = RateLimit.gen_request_key()
         try:
-            request_id = rate_limit.enter(request_id)
-            if app_model.mode == AppMode.COMPLETION.value:
+            request_id = rate_limit.enter(request_id, cls._get_request_rate_buckets(rate_limit, user))
+            if (
+                streaming
+                and dify_config.APP_GENERATE_EXECUTOR == "celery"
+                and app_model.mode in {AppMode.ADVANCED_CHAT.value, AppMode.WORKFLOW.value}
+            ):
+                stream = AppGenerateStream.create(app_model.id, user.id)
+                app_generate_task.delay(
+                    stream.stream_id, app_model.id, user.id, isinstance(user, Account), dict(args), invoke_from.value
+                )
+                return rate_limit.generate(stream.to_event_stream(), request_id=request_id)
+            elif app_model.mode == AppMode.COMPLETION.value:
                 return rate_limit.generate(
                     CompletionAppGenerator.convert_to_event_stream(
                         CompletionAppGenerator().generate(
@@ -111,6 +131,99 @@ class AppGenerateService:
             if not streaming:
                 rate_limit.exit(request_id)
 
+    @staticmethod
+    def _get_request_rate_buckets(rate_limit: RateLimit, user: Union[Account, EndUser]) -> list[RequestRateBucket]:
+        end_user_id = user.id if isinstance(user, EndUser) else None
+        api_token_id = getattr(g, "api_token_id", None) if has_app_context() else None
+        return rate_limit.get_request_rate_buckets(end_user_id=end_user_id, api_token_id=api_token_id)
+
+    @classmethod
+    def generate_to_stream(
+        cls,
+        stream_id: str,
+        app_id: str,
+        user_id: str,
+        user_is_account: bool,
+        args: Mapping[str, Any],
+        invoke_from: InvokeFrom,
+    ) -> None:
+        """
+        Run a streaming chatflow or workflow generation and publish its responses to a generate stream
+        :param stream_id: generate stream id
+        :param app_id: app id
+        :param user_id: account id or end user id
+        :param user_is_account: whether the user is an account
+        :param args: args
+        :param invoke_from: invoke from
+        :return:
+        """
+        stream = AppGenerateStream(stream_id)
+        try:
+            app_model = db.session.query(App).filter(App.id == app_id).first()
+            if not app_model:
+                raise ValueError("App not found")
+
+            user: Optional[Union[Account, EndUser]]
+            if user_is_account:
+                user = db.session.query(Account).filter(Account.id == user_id).first()
+                if user:
+                    user.current_tenant_id = app_model.tenant_id
+            else:
+                user = db.session.query(EndUser).filter(EndUser.id == user_id).first()
+            if not user:
+                raise ValueError("User not found")
+
+            workflow = cls._get_workflow(app_model, invoke_from)
+            response: Union[Mapping[str, Any], Generator[Union[Mapping[str, Any], str], None, None]]
+            if app_model.mode == AppMode.ADVANCED_CHAT.value:
+                response = AdvancedChatAppGenerator().generate(
+                    app_model=app_model,
+                    workflow=workflow,
+                    user=user,
+                    args=args,
+                    invoke_from=invoke_from,
+                    streaming=True,
+                )
+            elif app_model.mode == AppMode.WORKFLOW.value:
+                response = WorkflowAppGenerator().generate(
+                    app_model=app_model,
+                    workflow=workflow,
+                    user=user,
+                    args=args,
+                    invoke_from=invoke_from,
+                    streaming=True,
+                    call_depth=0,
+                    workflow_thread_pool_id=None,
+                )
+            else:
+                raise ValueError(f"Invalid app mode {app_model.mode}")
+
+            for message in response:
+                stream.publish(message)
+        except Exception as e:
+            logger.exception("Failed to generate to stream %s", stream_id)
+            stream.publish({"event": "error", **AppGenerateResponseConverter._error_to_stream_response(e)})
+        finally:
+            stream.end()
+
+    @classmethod
+    def resume_stream(
+        cls, app_model: App, user: Union[Account, EndUser], last_event_id: str
+    ) -> Generator[str, None, None]:
+        """
+        Resume the responses of a generation run on celery after the last event received by the client
+        :param app_model: app model
+        :param user: user
+        :param last_event_id: id of the last event received
+        :return:
+        """
+        result = AppGenerateStream.get_by_event_id(last_event_id, app_model.id, user.id)
+        if not result:
+            raise GenerateStreamNotFoundError()
+
+        stream, last_entry_id = result
+        return stream.to_event_stream(last_entry_id)
+
     @staticmethod
     def _get_max_active_requests(app_model: App) -> int:
         max_active_requests = app_model.max_active_requests
@@ -0,0 +1,271 @@
+import logging
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Optional, cast
+
+import pytz
+from redis.exceptions import LockNotOwnedError
+from sqlalchemy.dialects.postgresql import insert
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import AppDailyStatistic, AppStatisticRollup
+
+logger = logging.getLogger(__name__)
+
+# statistics of the messages created on each day
+MESSAGE_STATISTICS_SQL = """SELECT
+    DATE(DATE_TRUNC('day', m.created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(*) AS message_count,
+    COUNT(DISTINCT m.conversation_id) AS conversation_count,
+    COUNT(DISTINCT m.from_end_user_id) AS terminal_count,
+    SUM(m.message_tokens) AS message_tokens,
+    SUM(m.answer_tokens) AS answer_tokens,
+    SUM(m.total_price) AS total_price,
+    SUM(m.provider_response_latency) AS provider_response_latency,
+    COALESCE(SUM(mf.like_count), 0) AS like_count
+FROM
+    messages m
+LEFT JOIN
+    (
+        SELECT
+            message_id,
+            COUNT(*) AS like_count
+        FROM
+            message_feedbacks
+        WHERE
+            app_id = :app_id AND rating = 'like'
+        GROUP BY message_id
+    ) mf
+    ON mf.message_id = m.id
+WHERE
+    m.app_id = :app_id"""
+
+# statistics of the conversations created on each day with their messages
+CONVERSATION_STATISTICS_SQL = """SELECT
+    DATE(DATE_TRUNC('day', c.created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(DISTINCT c.id) AS interaction_conversation_count,
+    COUNT(m.id) AS interaction_message_count
+FROM
+    conversations c
+JOIN
+    messages m
+    ON c.id = m.conversation_id
+WHERE
+    c.app_id = :app_id"""
+
+ROLLUP_LOCK_TIMEOUT = 600
+# seconds a rollup waits for a running rollup of the same app and timezone, before leaving the days to it
+ROLLUP_LOCK_BLOCKING_TIMEOUT = 10
+
+
+class AppStatisticService:
+    """
+    Daily statistics of apps for the statistic charts of the console.
+
+    The days of an app are rolled up per timezone into app daily statistics by a task started the first time its
+    charts are read in the timezone, then by the scheduled task once each day is over. Reading a range computes the
+    days not rolled up yet, the current day and the partial days at the bounds of the range from the messages and
+    conversations.
+    """
+
+    @classmethod
+    def get_daily_statistics(
+        cls, app_id: str, timezone: str, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> list[AppDailyStatistic]:
+        """
+        Get the daily statistics of an app, days without messages nor conversations are left out
+        :param app_id: app id
+        :param timezone: timezone of the days and of the range
+        :param start: start of the range, inclusive
+        :param end: end of the range, exclusive
+        :return: statistics ordered by date
+        """
+        tz = pytz.timezone(timezone)
+        today = datetime.now(tz).date()
+        rolled_up_until = cls._get_rolled_up_until(app_id, timezone)
+        if rolled_up_until is None:
+            cls._schedule_roll_up(app_id, timezone)
+
+        # the days entirely in the range that are rolled up are read from the rollups
+        first_day = None
+        if start is not None:
+            first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+        last_day = today if end is None else min(end.date(), today)
+        if rolled_up_until is not None:
+            last_day = min(last_day, rolled_up_until)
+
+        start_utc = cls._to_utc(tz, start) if start is not None else None
+        end_utc = cls._to_utc(tz, end) if end is not None else None
+        if rolled_up_until is None or (first_day is not None and first_day >= last_day):
+            statistics = cls._compute(app_id, timezone, start_utc, end_utc)
+        else:
+            statistics = {}
+            if start is not None and first_day is not None and start.time() != time.min:
+                statistics.update(cls._compute(app_id, timezone, start_utc, cls._day_start(tz, first_day)))
+
+            statistics.update(cls._get_rolled_up_statistics(app_id, timezone, first_day, last_day))
+            statistics.update(cls._compute(app_id, timezone, cls._day_start(tz, last_day), end_utc))
+
+        return [statistics[day] for day in sorted(statistics)]
+
+    @classmethod
+    def roll_up(cls, app_id: str, timezone: str, today: Optional[date] = None, refresh_days: int = 0) -> None:
+        """
+        Roll up the days of an app in a timezone before today
+        :param app_id: app id
+        :param timezone: timezone
+        :param today: current day in the timezone
+        :param refresh_days: number of days before today rolled up again if they are already rolled up
+        """
+        tz = pytz.timezone(timezone)
+        today = today or datetime.now(tz).date()
+        rolled_up_until = cls._get_rolled_up_until(app_id, timezone)
+        if rolled_up_until is not None and rolled_up_until >= today and not refresh_days:
+            return
+
+        lock = redis_client.lock(
+            f"app_statistic_rollup:{app_id}:{timezone}",
+            timeout=ROLLUP_LOCK_TIMEOUT,
+            blocking_timeout=ROLLUP_LOCK_BLOCKING_TIMEOUT,
+        )
+        if not lock.acquire():
+            logger.info(f"Statistics of app {app_id} in timezone {timezone} are being rolled up, skip")
+            return
+        try:
+            # the days may have been rolled up while waiting for the lock
+            rolled_up_until = cls._get_rolled_up_until(app_id, timezone)
+            first_day = None
+            if rolled_up_until is not None:
+                first_day = min(rolled_up_until, today - timedelta(days=refresh_days))
+                if first_day >= today:
+                    return
+
+            statistics = cls._compute(
+                app_id,
+                timezone,
+                cls._day_start(tz, first_day) if first_day is not None else None,
+                cls._day_start(tz, today),
+            )
+
+            query = db.session.query(AppDailyStatistic).filter(
+                AppDailyStatistic.app_id == app_id,
+                AppDailyStatistic.timezone == timezone,
+                AppDailyStatistic.date < today,
+            )
+            if first_day is not None:
+                query = query.filter(AppDailyStatistic.date >= first_day)
+            query.delete(synchronize_session=False)
+            db.session.add_all(statistics.values())
+
+            now = datetime.now(UTC).replace(tzinfo=None)
+            stmt = insert(AppStatisticRollup).values(
+                app_id=app_id, timezone=timezone, rolled_up_until=today, updated_at=now
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["app_id", "timezone"],
+                set_={"rolled_up_until": stmt.excluded.rolled_up_until, "updated_at": stmt.excluded.updated_at},
+            )
+            db.session.execute(stmt)
+            db.session.commit()
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                logger.warning(f"Roll up statistics of app {app_id} in timezone {timezone} outlasted its lock")
+
+    @staticmethod
+    def _schedule_roll_up(app_id: str, timezone: str) -> None:
+        # the charts of a page are read together, the first of them starts the rollup
+        if redis_client.set(f"app_statistic_rollup_scheduled:{app_id}:{timezone}", 1, nx=True, ex=ROLLUP_LOCK_TIMEOUT):
+            from tasks.roll_up_app_statistics_task import roll_up_app_statistics_task
+
+            roll_up_app_statistics_task.delay(app_id, timezone)
+
+    @staticmethod
+    def _get_rolled_up_statistics(
+        app_id: str, timezone: str, first_day: Optional[date], last_day: date
+    ) -> dict[date, AppDailyStatistic]:
+        query = db.session.query(AppDailyStatistic).filter(
+            AppDailyStatistic.app_id == app_id,
+            AppDailyStatistic.timezone == timezone,
+            AppDailyStatistic.date < last_day,
+        )
+        if first_day is not None:
+            query = query.filter(AppDailyStatistic.date >= first_day)
+        return {statistic.date: statistic for statistic in query.all()}
+
+    @staticmethod
+    def _get_rolled_up_until(app_id: str, timezone: str) -> Optional[date]:
+        return cast(
+            Optional[date],
+            db.session.query(AppStatisticRollup.rolled_up_until)
+            .filter(AppStatisticRollup.app_id == app_id, AppStatisticRollup.timezone == timezone)
+            .scalar(),
+        )
+
+    @staticmethod
+    def _compute(
+        app_id: str, timezone: str, start_utc: Optional[datetime], end_utc: Optional[datetime]
+    ) -> dict[date, AppDailyStatistic]:
+        """
+        Compute the daily statistics of an app from its messages and conversations created in a range
+        """
+        if start_utc is not None and end_utc is not None and start_utc >= end_utc:
+            return {}
+
+        arg_dict = {"tz": timezone, "app_id": app_id, "start": start_utc, "end": end_utc}
+        range_sql = ""
+        if start_utc is not None:
+            range_sql += " AND {table}.created_at >= :start"
+        if end_utc is not None:
+            range_sql += " AND {table}.created_at < :end"
+        range_sql += " GROUP BY date"
+
+        statistics: dict[date, AppDailyStatistic] = {}
+
+        def get_statistic(day: date) -> AppDailyStatistic:
+            if day not in statistics:
+                statistics[day] = AppDailyStatistic(
+                    app_id=app_id,
+                    timezone=timezone,
+                    date=day,
+                    message_count=0,
+                    conversation_count=0,
+                    terminal_count=0,
+                    message_tokens=0,
+                    answer_tokens=0,
+                    provider_response_latency=0,
+                    like_count=0,
+                    interaction_conversation_count=0,
+                    interaction_message_count=0,
+                )
+            return statistics[day]
+
+        with db.engine.begin() as conn:
+            rs = conn.execute(db.text(MESSAGE_STATISTICS_SQL + range_sql.format(table="m")), arg_dict)
+            for i in rs:
+                statistic = get_statistic(i.date)
+                statistic.message_count = i.message_count
+                statistic.conversation_count = i.conversation_count
+                statistic.terminal_count = i.terminal_count
+                statistic.message_tokens = i.message_tokens
+                statistic.answer_tokens = i.answer_tokens
+                statistic.total_price = i.total_price
+                statistic.provider_response_latency = i.provider_response_latency
+                statistic.like_count = i.like_count
+
+            rs = conn.execute(db.text(CONVERSATION_STATISTICS_SQL + range_sql.format(table="c")), arg_dict)
+            for i in rs:
+                statistic = get_statistic(i.date)
+                statistic.interaction_conversation_count = i.interaction_conversation_count
+                statistic.interaction_message_count = i.interaction_message_count
+
+        return statistics
+
+    @staticmethod
+    def _to_utc(tz: pytz.BaseTzInfo, value: datetime) -> datetime:
+        return tz.localize(value).astimezone(pytz.utc)
+
+    @classmethod
+    def _day_start(cls, tz: pytz.BaseTzInfo, day: date) -> datetime:
+        return cls._to_utc(tz, datetime.combine(day, time.min))
@@ -17,6 +17,7 @@ from core.entities import DEFAULT_PLUGIN_ID
 from core.errors.error import LLMBadRequestError, ProviderTokenNotInitError
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 from events.dataset_event import dataset_was_deleted
@@ -1786,6 +1787,7 @@ class SegmentService:
             segment.status = "error"
             segment.error = str(e)
             db.session.commit()
+        SegmentHydrator.invalidate(dataset.id)
         new_segment = db.session.query(DocumentSegment).filter(DocumentSegment.id == segment.id).first()
         return new_segment
 
@@ -2004,6 +2006,7 @@ class SegmentService:
                     new_child_chunks.append(child_chunk)
             VectorService.update_child_chunk_vector(new_child_chunks, update_child_chunks, delete_child_chunks, dataset)
             db.session.commit()
+            SegmentHydrator.invalidate(dataset.id)
         except Exception as e:
             logging.exception("update child chunk index failed")
             db.session.rollback()
@@ -2028,6 +2031,7 @@ class SegmentService:
             db.session.add(child_chunk)
             VectorService.update_child_chunk_vector([], [child_chunk], [], dataset)
             db.session.commit()
+            SegmentHydrator.invalidate(dataset.id)
         except Exception as e:
             logging.exception("update child chunk index failed")
             db.session.rollback()
@@ -1,9 +1,10 @@
 import uuid
 
 from flask_sqlalchemy.pagination import Pagination
-from sqlalchemy import and_, or_
+from sqlalchemy import Select, and_, or_, select
 
 from extensions.ext_database import db
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
 from models import App, EndUser, WorkflowAppLog, WorkflowRun
 from models.enums import CreatedByRole
 from models.workflow import WorkflowRunStatus
@@ -17,7 +18,43 @@ class WorkflowAppService:
         :param args: request args
         :return:
         """
-        query = db.select(WorkflowAppLog).where(
+        query = self._build_workflow_app_logs_query(app_model, args)
+        query = query.order_by(WorkflowAppLog.created_at.desc(), WorkflowAppLog.id.desc())
+
+        pagination = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
+
+        return pagination
+
+    def get_infinite_scroll_workflow_app_logs(self, app_model: App, args: dict) -> InfiniteScrollPagination:
+        """
+        Get workflow app logs after the last log of the previous page, without counting them
+        :param app_model: app model
+        :param args: request args
+        :return:
+        """
+        last_log = None
+        if args.get("last_id"):
+            last_log = db.session.scalar(
+                db.select(WorkflowAppLog).where(
+                    WorkflowAppLog.tenant_id == app_model.tenant_id,
+                    WorkflowAppLog.app_id == app_model.id,
+                    WorkflowAppLog.id == args["last_id"],
+                )
+            )
+            if not last_log:
+                raise ValueError("Last workflow app log not exists")
+
+        return paginate_by_keyset(
+            db.session,
+            self._build_workflow_app_logs_query(app_model, args),
+            sort_column=WorkflowAppLog.created_at,
+            id_column=WorkflowAppLog.id,
+            limit=args["limit"],
+            last=last_log,
+        )
+
+    def _build_workflow_app_logs_query(self, app_model: App, args: dict) -> Select[tuple[WorkflowAppLog]]:
+        query = select(WorkflowAppLog).where(
             WorkflowAppLog.tenant_id == app_model.tenant_id, WorkflowAppLog.app_id == app_model.id
         )
 
@@ -49,11 +86,7 @@ class WorkflowAppService:
             # join with workflow_run and filter by status
             query = query.filter(WorkflowRun.status == status.value)
 
-        query = query.order_by(WorkflowAppLog.created_at.desc())
-
-        pagination = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
-
-        return pagination
+        return query
 
     @staticmethod
     def _safe_parse_uuid(value: str):
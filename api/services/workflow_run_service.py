@@ -1,9 +1,11 @@
 import threading
 from typing import Optional
 
+from sqlalchemy import select
+
 import contexts
 from extensions.ext_database import db
-from libs.infinite_scroll_pagination import InfiniteScrollPagination
+from libs.infinite_scroll_pagination import InfiniteScrollPagination, paginate_by_keyset
 from models.enums import WorkflowRunTriggeredFrom
 from models.model import App
 from models.workflow import (
@@ -58,43 +60,26 @@ class WorkflowRunService:
         """
         limit = int(args.get("limit", 20))
 
-        base_query = db.session.query(WorkflowRun).filter(
+        stmt = select(WorkflowRun).where(
             WorkflowRun.tenant_id == app_model.tenant_id,
             WorkflowRun.app_id == app_model.id,
             WorkflowRun.triggered_from == WorkflowRunTriggeredFrom.DEBUGGING.value,
         )
 
+        last_workflow_run = None
         if args.get("last_id"):
-            last_workflow_run = base_query.filter(
-                WorkflowRun.id == args.get("last_id"),
-            ).first()
-
+            last_workflow_run = db.session.scalar(stmt.where(WorkflowRun.id == args.get("last_id")))
             if not last_workflow_run:
                 raise ValueError("Last workflow run not exists")
 
-            workflow_runs = (
-                base_query.filter(
-                    WorkflowRun.created_at < last_workflow_run.created_at, WorkflowRun.id != last_workflow_run.id
-                )
-                .order_by(WorkflowRun.created_at.desc())
-                .limit(limit)
-                .all()
-            )
-        else:
-            workflow_runs = base_query.order_by(WorkflowRun.created_at.desc()).limit(limit).all()
-
-        has_more = False
-        if len(workflow_runs) == limit:
-            current_page_first_workflow_run = workflow_runs[-1]
-            rest_count = base_query.filter(
-                WorkflowRun.created_at < current_page_first_workflow_run.created_at,
-                WorkflowRun.id != current_page_first_workflow_run.id,
-            ).count()
-
-            if rest_count > 0:
-                has_more = True
-
-        return InfiniteScrollPagination(data=workflow_runs, limit=limit, has_more=has_more)
+        return paginate_by_keyset(
+            db.session,
+            stmt,
+            sort_column=WorkflowRun.created_at,
+            id_column=WorkflowRun.id,
+            limit=limit,
+            last=last_workflow_run,
+        )
 
     def get_workflow_run(self, app_model: App, run_id: str) -> Optional[WorkflowRun]:
         """
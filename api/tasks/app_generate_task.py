@@ -0,0 +1,42 @@
+import logging
+import time
+
+import click
+from celery import shared_task  # type: ignore
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from extensions.ext_database import db
+
+
+@shared_task(queue="generation")
+def app_generate_task(stream_id: str, app_id: str, user_id: str, user_is_account: bool, args: dict, invoke_from: str):
+    """
+    Async run a streaming chatflow or workflow generation and publish its responses to a generate stream
+    :param stream_id: generate stream id
+    :param app_id: app id
+    :param user_id: account id or end user id
+    :param user_is_account: whether the user is an account
+    :param args: generate args
+    :param invoke_from: invoke from
+
+    Usage: app_generate_task.delay(stream_id, app_id, user_id, user_is_account, args, invoke_from)
+    """
+    from services.app_generate_service import AppGenerateService
+
+    logging.info(click.style("Start generate to stream: {}".format(stream_id), fg="green"))
+    start_at = time.perf_counter()
+
+    try:
+        AppGenerateService.generate_to_stream(
+            stream_id=stream_id,
+            app_id=app_id,
+            user_id=user_id,
+            user_is_account=user_is_account,
+            args=args,
+            invoke_from=InvokeFrom(invoke_from),
+        )
+    finally:
+        db.session.close()
+
+    end_at = time.perf_counter()
+    logging.info(click.style("Generated to stream: {} latency: {}".format(stream_id, end_at - start_at), fg="green"))
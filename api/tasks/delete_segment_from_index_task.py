@@ -4,6 +4,7 @@ import time
 import click
 from celery import shared_task  # type: ignore
 
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, Document
@@ -41,3 +42,5 @@ def delete_segment_from_index_task(index_node_ids: list, dataset_id: str, docume
         logging.info(click.style("Segment deleted from index latency: {}".format(end_at - start_at), fg="green"))
     except Exception:
         logging.exception("delete segment from index failed")
+    finally:
+        SegmentHydrator.invalidate(dataset_id)
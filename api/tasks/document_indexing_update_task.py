@@ -7,6 +7,7 @@ from celery import shared_task  # type: ignore
 from werkzeug.exceptions import NotFound
 
 from core.indexing_runner import DocumentIsPausedError, IndexingRunner
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, Document, DocumentSegment
@@ -52,6 +53,7 @@ def document_indexing_update_task(dataset_id: str, document_id: str):
             for segment in segments:
                 db.session.delete(segment)
             db.session.commit()
+            SegmentHydrator.invalidate(dataset_id)
         end_at = time.perf_counter()
         logging.info(
             click.style(
@@ -5,6 +5,7 @@ import time
 import click
 from celery import shared_task  # type: ignore
 
+from core.rag.datasource.segment_hydrator import SegmentHydrator
 from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.models.document import ChildDocument, Document
@@ -106,3 +107,4 @@ def enable_segments_to_index_task(segment_ids: list, dataset_id: str, document_i
         for segment in segments:
             indexing_cache_key = "segment_{}_indexing".format(segment.id)
             redis_client.delete(indexing_cache_key)
+        SegmentHydrator.invalidate(dataset_id)
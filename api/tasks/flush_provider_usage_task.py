@@ -0,0 +1,23 @@
+import logging
+import time
+
+import click
+from celery import shared_task  # type: ignore
+
+from core.helper.provider_usage_buffer import ProviderUsageBuffer
+
+
+@shared_task(queue="dataset")
+def flush_provider_usage_task():
+    """
+    Async write the quota used and last used time of providers buffered in Redis to the database
+
+    Usage: flush_provider_usage_task.apply_async(countdown=interval)
+    """
+    start_at = time.perf_counter()
+    flushed = ProviderUsageBuffer.flush()
+    if flushed:
+        end_at = time.perf_counter()
+        logging.info(
+            click.style(f"Flushed provider usages of {flushed} workspaces, latency: {end_at - start_at}", fg="green")
+        )
@@ -1,5 +1,9 @@
+import base64
 import json
 import logging
+import zlib
+from collections import defaultdict
+from typing import Any
 
 from celery import shared_task  # type: ignore
 from flask import current_app
@@ -27,24 +31,13 @@ def process_trace_tasks(file_info):
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
     file_data = json.loads(storage.load(file_path))
-    trace_info = file_data.get("trace_info")
-    trace_info_type = file_data.get("trace_info_type")
     trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
-    if trace_info.get("message_data"):
-        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
-    if trace_info.get("workflow_data"):
-        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
-    if trace_info.get("documents"):
-        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
-
     try:
         if trace_instance:
             with current_app.app_context():
-                trace_type = trace_info_info_map.get(trace_info_type)
-                if trace_type:
-                    trace_info = trace_type(**trace_info)
-                trace_instance.trace(trace_info)
+                trace_instance.trace(_load_trace_info(file_data))
+                trace_instance.flush()
         logging.info(f"Processing trace tasks success, app_id: {app_id}")
     except Exception:
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
@@ -52,3 +45,77 @@ def process_trace_tasks(file_info):
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
     finally:
         storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_tasks_batch(batch_info):
+    """
+    Async process a batch of trace tasks, the traces of each app go through one trace instance flushed once
+    :param batch_info: {"payload": base64 of the zlib compressed list of task data}
+        or {"file_path": storage path of the zlib compressed list of task data}
+
+    Usage: process_trace_tasks_batch.delay(batch_info)
+    """
+    file_path = batch_info.get("file_path")
+    try:
+        payload = storage.load(file_path) if file_path else base64.b64decode(batch_info["payload"])
+        tasks_data = json.loads(zlib.decompress(payload))
+    except Exception:
+        logging.exception("Loading trace tasks batch failed")
+        if file_path:
+            storage.delete(file_path)
+        return
+
+    tasks_data_by_app: dict[str, list[dict]] = defaultdict(list)
+    for task_data in tasks_data:
+        tasks_data_by_app[task_data["app_id"]].append(task_data)
+
+    try:
+        for app_id, app_tasks_data in tasks_data_by_app.items():
+            _process_app_trace_tasks(app_id, app_tasks_data)
+    finally:
+        if file_path:
+            storage.delete(file_path)
+
+
+def _process_app_trace_tasks(app_id: str, tasks_data: list[dict]):
+    from core.ops.ops_trace_manager import OpsTraceManager
+
+    failed = 0
+    try:
+        trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+        if trace_instance:
+            with current_app.app_context():
+                for task_data in tasks_data:
+                    try:
+                        trace_instance.trace(_load_trace_info(task_data))
+                    except Exception:
+                        logging.exception(f"Processing trace task failed, app_id: {app_id}")
+                        failed += 1
+                trace_instance.flush()
+    except Exception:
+        logging.exception(f"Processing trace tasks batch failed, app_id: {app_id}")
+        failed = len(tasks_data)
+
+    if failed:
+        redis_client.incrby(f"{OPS_TRACE_FAILED_KEY}_{app_id}", failed)
+        logging.info(f"Processing trace tasks failed, app_id: {app_id}, failed: {failed}/{len(tasks_data)}")
+    else:
+        logging.info(f"Processing trace tasks success, app_id: {app_id}, count: {len(tasks_data)}")
+
+
+def _load_trace_info(task_data: dict[str, Any]):
+    trace_info = task_data["trace_info"]
+    trace_info_type = task_data["trace_info_type"]
+
+    if trace_info.get("message_data"):
+        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
+    if trace_info.get("workflow_data"):
+        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
+    if trace_info.get("documents"):
+        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+
+    trace_type = trace_info_info_map.get(trace_info_type)
+    if trace_type:
+        trace_info = trace_type(**trace_info)
+    return trace_info
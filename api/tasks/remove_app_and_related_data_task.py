@@ -13,7 +13,9 @@ from models.model import (
     ApiToken,
     AppAnnotationHitHistory,
     AppAnnotationSetting,
+    AppDailyStatistic,
     AppModelConfig,
+    AppStatisticRollup,
     Conversation,
     EndUser,
     InstalledApp,
@@ -57,6 +59,7 @@ def remove_app_and_related_data_task(self, tenant_id: str, app_id: str):
         _delete_end_users(tenant_id, app_id)
         _delete_trace_app_configs(tenant_id, app_id)
         _delete_conversation_variables(app_id=app_id)
+        _delete_app_statistics(app_id=app_id)
 
         end_at = time.perf_counter()
         logging.info(click.style(f"App and related data deleted: {app_id} latency: {end_at - start_at}", fg="green"))
@@ -237,6 +240,14 @@ def _delete_conversation_variables(*, app_id: str):
         logging.info(click.style(f"Deleted conversation variables for app {app_id}", fg="green"))
 
 
+def _delete_app_statistics(*, app_id: str):
+    with db.engine.connect() as conn:
+        conn.execute(delete(AppStatisticRollup).where(AppStatisticRollup.app_id == app_id))
+        conn.execute(delete(AppDailyStatistic).where(AppDailyStatistic.app_id == app_id))
+        conn.commit()
+        logging.info(click.style(f"Deleted statistics for app {app_id}", fg="green"))
+
+
 def _delete_app_messages(tenant_id: str, app_id: str):
     def del_message(message_id: str):
         db.session.query(MessageFeedback).filter(MessageFeedback.message_id == message_id).delete(
@@ -5,6 +5,7 @@ import time
 import click
 from celery import shared_task  # type: ignore
 
+from configs import dify_config
 from core.indexing_runner import IndexingRunner
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
@@ -62,6 +63,17 @@ def retry_document_indexing_task(dataset_id: str, document_ids: list[str]):
             logging.info(click.style("Document not found: {}".format(document_id), fg="yellow"))
             return
         try:
+            if dify_config.INDEXING_PIPELINE_BATCH_SIZE:
+                # keep the batches completed before the failure, the runner cleans the rest and resumes after them
+                document.indexing_status = "splitting"
+                document.processing_started_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                db.session.add(document)
+                db.session.commit()
+
+                IndexingRunner().run_in_splitting_status(document)
+                redis_client.delete(retry_indexing_cache_key)
+                continue
+
             # clean old data
             index_processor = IndexProcessorFactory(document.doc_form).init_index_processor()
 
@@ -0,0 +1,36 @@
+import logging
+import time
+
+import click
+from celery import shared_task  # type: ignore
+
+from extensions.ext_database import db
+from services.app_statistic_service import AppStatisticService
+
+
+@shared_task(queue="dataset")
+def roll_up_app_statistics_task(app_id: str, timezone: str):
+    """
+    Async roll up the days of an app in a timezone its statistic charts are first read in
+
+    :param app_id: app id
+    :param timezone: timezone
+
+    Usage: roll_up_app_statistics_task.delay(app_id, timezone)
+    """
+    logging.info(click.style(f"Start roll up statistics of app {app_id} in timezone {timezone}", fg="green"))
+    start_at = time.perf_counter()
+    try:
+        AppStatisticService.roll_up(app_id, timezone)
+        end_at = time.perf_counter()
+        logging.info(
+            click.style(
+                f"Rolled up statistics of app {app_id} in timezone {timezone}, latency: {end_at - start_at}",
+                fg="green",
+            )
+        )
+    except Exception:
+        db.session.rollback()
+        logging.exception(f"Roll up statistics of app {app_id} in timezone {timezone} failed")
+    finally:
+        db.session.close()
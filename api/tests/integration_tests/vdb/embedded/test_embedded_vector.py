@@ -0,0 +1,29 @@
+from core.rag.datasource.vdb.embedded.embedded_vector import EmbeddedVector, EmbeddedVectorConfig
+from core.rag.models.document import Document
+from tests.integration_tests.vdb.test_vector_store import (
+    AbstractVectorTest,
+    get_example_text,
+    setup_mock_redis,
+)
+
+
+class EmbeddedVectorTest(AbstractVectorTest):
+    def __init__(self, path: str):
+        super().__init__()
+        self.vector = EmbeddedVector(
+            collection_name=self.collection_name,
+            group_id=self.dataset_id,
+            config=EmbeddedVectorConfig(path=path),
+        )
+
+    def search_by_full_text(self):
+        hits_by_full_text: list[Document] = self.vector.search_by_full_text(query=get_example_text())
+        assert len(hits_by_full_text) == 0
+
+    def get_ids_by_metadata_field(self):
+        ids = self.vector.get_ids_by_metadata_field(key="document_id", value=self.example_doc_id)
+        assert ids == [self.example_doc_id]
+
+
+def test_embedded_vector(setup_mock_redis, tmp_path):
+    EmbeddedVectorTest(str(tmp_path)).run_all_tests()
@@ -0,0 +1,90 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.agent import fc_agent_runner
+from core.agent.fc_agent_runner import FunctionCallAgentRunner
+from core.tools.entities.tool_entities import ToolInvokeMeta
+
+
+@pytest.fixture
+def runner():
+    runner = FunctionCallAgentRunner.__new__(FunctionCallAgentRunner)
+    runner.app_config = SimpleNamespace(agent=SimpleNamespace(max_parallel_tool_calls=None))
+    runner.user_id = "user"
+    runner.tenant_id = "tenant"
+    runner.message = SimpleNamespace(id="message")
+    runner.conversation = SimpleNamespace(id="conversation")
+    runner.agent_callback = MagicMock()
+    runner.application_generate_entity = SimpleNamespace(
+        invoke_from="debugger", app_config=SimpleNamespace(app_id="app")
+    )
+    return runner
+
+
+@pytest.fixture
+def agent_invoke(monkeypatch):
+    state = {"running": 0, "max_running": 0}
+    lock = threading.Lock()
+
+    def invoke(tool, tool_parameters, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        # later tool calls finish first
+        time.sleep(tool_parameters["delay"])
+        with lock:
+            state["running"] -= 1
+        return f"{tool.name} done", [f"file-of-{tool.name}"], ToolInvokeMeta.empty()
+
+    monkeypatch.setattr(fc_agent_runner.ToolEngine, "agent_invoke", invoke)
+    return state
+
+
+def _tool_calls(count: int):
+    return [(f"call-{i}", f"tool_{i}", {"delay": 0.05 * (count - i)}) for i in range(count)]
+
+
+def _tool_instances(count: int):
+    return {f"tool_{i}": SimpleNamespace(name=f"tool_{i}") for i in range(count)}
+
+
+def test_invokes_tool_calls_concurrently_in_order(runner, agent_invoke, monkeypatch):
+    monkeypatch.setattr(fc_agent_runner.dify_config, "AGENT_MAX_PARALLEL_TOOL_CALLS", 3)
+
+    with Flask(__name__).app_context():
+        results = runner._invoke_tool_calls(_tool_calls(5), _tool_instances(5), None)
+
+    assert agent_invoke["max_running"] == 3
+    assert [(tool_call_id, tool_call_name) for tool_call_id, tool_call_name, _, _ in results] == [
+        (f"call-{i}", f"tool_{i}") for i in range(5)
+    ]
+    assert [tool_response["tool_response"] for _, _, tool_response, _ in results] == [
+        f"tool_{i} done" for i in range(5)
+    ]
+    assert [message_files for _, _, _, message_files in results] == [[f"file-of-tool_{i}"] for i in range(5)]
+
+
+def test_agent_limits_parallel_tool_calls(runner, agent_invoke, monkeypatch):
+    monkeypatch.setattr(fc_agent_runner.dify_config, "AGENT_MAX_PARALLEL_TOOL_CALLS", 4)
+    runner.app_config.agent.max_parallel_tool_calls = 1
+
+    results = runner._invoke_tool_calls(_tool_calls(3), _tool_instances(3), None)
+
+    assert agent_invoke["max_running"] == 1
+    assert [tool_call_id for tool_call_id, _, _, _ in results] == ["call-0", "call-1", "call-2"]
+
+
+def test_unknown_tool_does_not_affect_other_tool_calls(runner, agent_invoke):
+    tool_calls = [("call-0", "tool_0", {"delay": 0}), ("call-1", "missing", {})]
+
+    with Flask(__name__).app_context():
+        results = runner._invoke_tool_calls(tool_calls, _tool_instances(1), None)
+
+    assert results[0][2]["tool_response"] == "tool_0 done"
+    assert results[1][2]["tool_response"] == "there is not a tool named missing"
+    assert results[1][3] == []
@@ -0,0 +1,107 @@
+import pytest
+
+from core.app.apps import app_generate_stream
+from core.app.apps.app_generate_stream import AppGenerateStream
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.streams: dict[str, list[tuple[bytes, dict[bytes, bytes]]]] = {}
+
+    def setex(self, key, ttl, value):
+        self.values[key] = str(value).encode()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def xadd(self, key, fields):
+        entries = self.streams.setdefault(key, [])
+        entry_id = f"{len(entries) + 1}-0".encode()
+        entries.append((entry_id, {k if isinstance(k, bytes) else k.encode(): _to_bytes(v) for k, v in fields.items()}))
+        return entry_id
+
+    def xread(self, streams, count=None, block=None):
+        result = []
+        for key, last_id in streams.items():
+            entries = [
+                (entry_id, fields)
+                for entry_id, fields in self.streams.get(key, [])
+                if _parse_id(entry_id.decode()) > _parse_id(last_id)
+            ][:count]
+            if entries:
+                result.append((key.encode(), entries))
+        return result
+
+
+class _FakePipeline:
+    def __init__(self, client: _FakeRedis):
+        self._client = client
+        self._commands: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def xadd(self, key, fields):
+        self._commands.append(lambda: self._client.xadd(key, fields))
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        return [command() for command in self._commands]
+
+
+def _to_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+def _parse_id(entry_id: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in entry_id.split("-"))
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(app_generate_stream, "redis_client", client)
+    return client
+
+
+def test_stream_relays_responses_as_server_sent_events(redis_client):
+    stream = AppGenerateStream.create("app-id", "user-id")
+    stream.publish({"event": "message", "answer": "hello"})
+    stream.publish("ping")
+    stream.end()
+
+    events = list(stream.to_event_stream())
+
+    assert events == [
+        f'id: {stream.stream_id}:1-0\ndata: {{"event": "message", "answer": "hello"}}\n\n',
+        f"id: {stream.stream_id}:2-0\nevent: ping\n\n",
+    ]
+
+
+def test_stream_resumes_after_last_event_id(redis_client):
+    stream = AppGenerateStream.create("app-id", "user-id")
+    for answer in ["a", "b", "c"]:
+        stream.publish({"event": "message", "answer": answer})
+    stream.end()
+
+    resumed, last_entry_id = AppGenerateStream.get_by_event_id(f"{stream.stream_id}:1-0", "app-id", "user-id")
+
+    assert resumed.stream_id == stream.stream_id
+    assert [message["answer"] for _, message in resumed.listen(last_entry_id)] == ["b", "c"]
+
+
+def test_stream_is_only_resumable_by_its_owner(redis_client):
+    stream = AppGenerateStream.create("app-id", "user-id")
+
+    assert AppGenerateStream.get_by_event_id(f"{stream.stream_id}:1-0", "app-id", "other-user-id") is None
+    assert AppGenerateStream.get_by_event_id(f"{stream.stream_id}:1-0", "other-app-id", "user-id") is None
+    assert AppGenerateStream.get_by_event_id("unknown:1-0", "app-id", "user-id") is None
@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.apps import base_app_queue_manager
+from core.app.apps.base_app_queue_manager import GenerateTaskStoppedError, PublishFrom
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueErrorEvent,
+    QueueLLMChunkEvent,
+    QueueNodeSucceededEvent,
+    QueueTextChunkEvent,
+)
+from models.model import App
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = MagicMock()
+    client.get.return_value = None
+    monkeypatch.setattr(base_app_queue_manager, "redis_client", client)
+    return client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(base_app_queue_manager.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _queue_manager() -> WorkflowAppQueueManager:
+    return WorkflowAppQueueManager("task-id", "user-id", InvokeFrom.WEB_APP, "workflow")
+
+
+def test_stop_flag_is_polled_once_per_interval(redis_client, clock, monkeypatch):
+    monkeypatch.setattr(base_app_queue_manager.dify_config, "APP_STOP_FLAG_CHECK_INTERVAL", 0.5)
+    queue_manager = _queue_manager()
+
+    for _ in range(100):
+        queue_manager.publish(QueueTextChunkEvent(text="token"), PublishFrom.APPLICATION_MANAGER)
+    assert redis_client.get.call_count == 1
+
+    redis_client.get.return_value = b"1"
+    clock[0] += 0.4
+    queue_manager.publish(QueueTextChunkEvent(text="token"), PublishFrom.APPLICATION_MANAGER)
+    clock[0] += 0.1
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueueTextChunkEvent(text="token"), PublishFrom.APPLICATION_MANAGER)
+    assert redis_client.get.call_count == 2
+
+    # a stopped task stays stopped without reading the flag again
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueueTextChunkEvent(text="token"), PublishFrom.APPLICATION_MANAGER)
+    assert redis_client.get.call_count == 2
+
+
+def test_stop_flag_is_read_on_every_check_without_interval(redis_client, clock, monkeypatch):
+    monkeypatch.setattr(base_app_queue_manager.dify_config, "APP_STOP_FLAG_CHECK_INTERVAL", 0)
+    queue_manager = _queue_manager()
+
+    for _ in range(3):
+        queue_manager.publish(QueueTextChunkEvent(text="token"), PublishFrom.APPLICATION_MANAGER)
+
+    assert redis_client.get.call_count == 3
+
+
+def test_sqlalchemy_models_check_depends_on_event_fields():
+    assert not base_app_queue_manager._may_hold_sqlalchemy_models(QueueTextChunkEvent)
+    assert not base_app_queue_manager._may_hold_sqlalchemy_models(QueueLLMChunkEvent)
+    assert base_app_queue_manager._may_hold_sqlalchemy_models(QueueNodeSucceededEvent)
+    assert base_app_queue_manager._may_hold_sqlalchemy_models(QueueErrorEvent)
+
+
+def test_publish_rejects_sqlalchemy_models(redis_client):
+    queue_manager = _queue_manager()
+
+    with pytest.raises(TypeError):
+        queue_manager.publish(QueueErrorEvent(error=App()), PublishFrom.TASK_PIPELINE)
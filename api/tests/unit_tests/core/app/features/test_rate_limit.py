@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.features.rate_limiting import rate_limit as rate_limit_module
+from core.app.features.rate_limiting.rate_limit import RateLimit, RequestRateBucket
+from core.errors.error import AppInvokeQuotaExceededError
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis_mock = MagicMock()
+    redis_mock.exists.return_value = False
+    redis_mock.register_script.return_value = MagicMock(return_value=0)
+    monkeypatch.setattr(rate_limit_module, "redis_client", redis_mock)
+    monkeypatch.setattr(RateLimit, "_enter_script", None)
+    monkeypatch.setattr(RateLimit, "_instance_dict", {})
+    return redis_mock
+
+
+def test_enter_unlimited_without_redis(redis):
+    rate_limit = RateLimit("app", 0)
+
+    assert rate_limit.enter() == RateLimit._UNLIMITED_REQUEST_ID
+    rate_limit.exit(RateLimit._UNLIMITED_REQUEST_ID)
+
+    redis.register_script.assert_not_called()
+    redis.zrem.assert_not_called()
+
+
+def test_enter_and_exit_active_request(redis):
+    rate_limit = RateLimit("app", 2)
+    buckets = [RequestRateBucket("bucket", 60)]
+
+    assert rate_limit.enter("request", buckets) == "request"
+    redis.register_script.return_value.assert_called_once_with(
+        keys=["dify:rate_limit:{app}:active_request_set", "bucket"],
+        args=[2, "request", RateLimit._REQUEST_MAX_ALIVE_TIME, 60],
+    )
+
+    rate_limit.exit("request")
+    redis.zrem.assert_called_once_with("dify:rate_limit:{app}:active_request_set", "request")
+
+
+def test_enter_rate_limited_only_is_not_tracked(redis):
+    rate_limit = RateLimit("app", 0)
+
+    assert rate_limit.enter("request", [RequestRateBucket("bucket", 60)]) == RateLimit._UNLIMITED_REQUEST_ID
+    assert redis.register_script.return_value.call_args.kwargs["args"][0] == 0
+
+
+@pytest.mark.parametrize(
+    ("result", "message"), [(-1, "concurrent requests allowed is 2"), (2, "per minute allowed is 5")]
+)
+def test_enter_refused(redis, result, message):
+    redis.register_script.return_value.return_value = result
+    rate_limit = RateLimit("app", 2)
+
+    with pytest.raises(AppInvokeQuotaExceededError, match=message):
+        rate_limit.enter("request", [RequestRateBucket("app", 60), RequestRateBucket("end_user", 5)])
+
+
+def test_get_request_rate_buckets(redis, monkeypatch):
+    monkeypatch.setattr(rate_limit_module.dify_config, "APP_MAX_REQUESTS_PER_MINUTE", 100)
+    monkeypatch.setattr(rate_limit_module.dify_config, "APP_MAX_REQUESTS_PER_MINUTE_PER_END_USER", 10)
+    monkeypatch.setattr(rate_limit_module.dify_config, "APP_MAX_REQUESTS_PER_MINUTE_PER_API_KEY", 0)
+    rate_limit = RateLimit("app", 0)
+
+    assert rate_limit.get_request_rate_buckets(end_user_id="user", api_token_id="token") == [
+        RequestRateBucket("dify:rate_limit:{app}:request_rate:client", 100),
+        RequestRateBucket("dify:rate_limit:{app}:request_rate:end_user:user", 10),
+    ]
+    assert rate_limit.get_request_rate_buckets() == [
+        RequestRateBucket("dify:rate_limit:{app}:request_rate:client", 100)
+    ]
+
+
+@pytest.fixture
+def lua_redis(monkeypatch):
+    # run the enter script itself, in a Redis emulator able to run Lua scripts
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis_client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    monkeypatch.setattr(rate_limit_module, "redis_client", redis_client)
+    monkeypatch.setattr(RateLimit, "_enter_script", None)
+    monkeypatch.setattr(RateLimit, "_instance_dict", {})
+    return redis_client
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # the script reads the time from the Redis TIME command, which the emulator answers with time.time()
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_enter_script_limits_concurrent_requests(lua_redis):
+    rate_limit = RateLimit("app", 5)
+
+    def enter(index: int) -> bool:
+        try:
+            rate_limit.enter(f"request-{index}")
+            return True
+        except AppInvokeQuotaExceededError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        admitted = list(executor.map(enter, range(20)))
+
+    assert admitted.count(True) == 5
+    assert lua_redis.zcard("dify:rate_limit:{app}:active_request_set") == 5
+
+    rate_limit.exit(f"request-{admitted.index(True)}")
+    assert rate_limit.enter("request") == "request"
+    with pytest.raises(AppInvokeQuotaExceededError, match="concurrent requests allowed is 5"):
+        rate_limit.enter("another-request")
+
+
+def test_enter_script_trims_stale_requests(lua_redis, clock):
+    rate_limit = RateLimit("app", 1)
+    rate_limit.enter("request")
+
+    clock[0] += RateLimit._REQUEST_MAX_ALIVE_TIME + 1
+
+    assert rate_limit.enter("another-request") == "another-request"
+    assert lua_redis.zrange("dify:rate_limit:{app}:active_request_set", 0, -1) == [b"another-request"]
+
+
+def test_enter_script_refills_request_rate_buckets(lua_redis, clock):
+    rate_limit = RateLimit("app", 0)
+    buckets = [RequestRateBucket("dify:rate_limit:{app}:request_rate:client", 2)]
+
+    rate_limit.enter(request_rate_buckets=buckets)
+    rate_limit.enter(request_rate_buckets=buckets)
+    with pytest.raises(AppInvokeQuotaExceededError, match="per minute allowed is 2"):
+        rate_limit.enter(request_rate_buckets=buckets)
+
+    # a token every 30 seconds
+    clock[0] += 30
+    rate_limit.enter(request_rate_buckets=buckets)
+    with pytest.raises(AppInvokeQuotaExceededError):
+        rate_limit.enter(request_rate_buckets=buckets)
+
+    # full again after a minute
+    clock[0] += 60
+    rate_limit.enter(request_rate_buckets=buckets)
+    rate_limit.enter(request_rate_buckets=buckets)
+    with pytest.raises(AppInvokeQuotaExceededError):
+        rate_limit.enter(request_rate_buckets=buckets)
+
+
+def test_enter_script_refuses_with_the_first_empty_bucket(lua_redis):
+    rate_limit = RateLimit("app", 3)
+    client_bucket = RequestRateBucket("dify:rate_limit:{app}:request_rate:client", 10)
+    end_user_bucket = RequestRateBucket("dify:rate_limit:{app}:request_rate:end_user:user", 1)
+
+    rate_limit.enter("request", [client_bucket, end_user_bucket])
+    with pytest.raises(AppInvokeQuotaExceededError, match="per minute allowed is 1"):
+        rate_limit.enter("another-request", [client_bucket, end_user_bucket])
+
+    # a refused request neither takes tokens nor becomes active
+    assert float(lua_redis.hget(client_bucket.key, "tokens")) == pytest.approx(9, abs=0.01)
+    assert lua_redis.zcard("dify:rate_limit:{app}:active_request_set") == 1
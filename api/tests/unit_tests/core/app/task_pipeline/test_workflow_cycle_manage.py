@@ -0,0 +1,141 @@
+import threading
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from core.app.task_pipeline.workflow_cycle_manage import WorkflowCycleManage
+from models.workflow import WorkflowNodeExecution, WorkflowNodeExecutionStatus, WorkflowRun
+
+
+def _create_manager(write_behind: bool) -> WorkflowCycleManage:
+    return WorkflowCycleManage(
+        application_generate_entity=MagicMock(),
+        workflow_system_variables={},
+        write_behind=write_behind,
+    )
+
+
+def _create_node_execution() -> WorkflowNodeExecution:
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.id = str(uuid4())
+    workflow_node_execution.node_execution_id = str(uuid4())
+    workflow_node_execution.status = WorkflowNodeExecutionStatus.RUNNING.value
+    workflow_node_execution.created_at = datetime.now(UTC).replace(tzinfo=None)
+    return workflow_node_execution
+
+
+def test_flush_node_executions_upserts_in_one_statement():
+    manager = _create_manager(write_behind=True)
+    first, second = _create_node_execution(), _create_node_execution()
+    manager._buffer_node_execution(first)
+    manager._buffer_node_execution(second)
+    # updating an already buffered record must not add a second row
+    manager._buffer_node_execution(first)
+
+    session = MagicMock()
+    manager._flush_node_executions(session=session)
+
+    session.execute.assert_called_once()
+    stmt = session.execute.call_args.args[0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (id) DO UPDATE" in str(compiled)
+    assert {compiled.params["id_m0"], compiled.params["id_m1"]} == {first.id, second.id}
+    assert "id_m2" not in compiled.params
+    assert manager._pending_node_executions == {}
+
+
+def test_flush_node_executions_without_pending_records():
+    manager = _create_manager(write_behind=True)
+    session = MagicMock()
+
+    manager._flush_node_executions(session=session)
+
+    session.execute.assert_not_called()
+
+
+def test_write_behind_listen_flushes_on_batch_size(monkeypatch):
+    monkeypatch.setattr(
+        "core.app.task_pipeline.workflow_cycle_manage.dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE", 2
+    )
+    monkeypatch.setattr(
+        "core.app.task_pipeline.workflow_cycle_manage.dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 3600
+    )
+    manager = _create_manager(write_behind=True)
+    flushed_sizes = []
+
+    def fake_flush(*, session=None):
+        flushed_sizes.append(len(manager._pending_node_executions))
+        manager._pending_node_executions.clear()
+
+    manager._flush_node_executions = fake_flush  # type: ignore[method-assign]
+
+    for _ in manager.write_behind_listen(range(3)):
+        manager._buffer_node_execution(_create_node_execution())
+
+    # one flush when the batch is full, one final flush for the remainder
+    assert flushed_sizes == [2, 1]
+
+
+def test_write_behind_listen_flushes_when_closed():
+    manager = _create_manager(write_behind=True)
+    manager._flush_node_executions = MagicMock()  # type: ignore[method-assign]
+
+    listener = manager.write_behind_listen(range(10))
+    next(listener)
+    listener.close()
+
+    manager._flush_node_executions.assert_called_once_with()
+
+
+def test_write_behind_disabled_passes_messages_through():
+    manager = _create_manager(write_behind=False)
+    manager._flush_node_executions = MagicMock()  # type: ignore[method-assign]
+
+    assert list(manager.write_behind_listen(range(3))) == [0, 1, 2]
+    manager._flush_node_executions.assert_not_called()
+
+
+def test_write_behind_listen_flushes_on_interval_without_messages(monkeypatch):
+    monkeypatch.setattr(
+        "core.app.task_pipeline.workflow_cycle_manage.dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 0.05
+    )
+    manager = _create_manager(write_behind=True)
+    flushed = threading.Event()
+
+    def fake_flush(*, session=None):
+        if manager._pending_node_executions:
+            manager._pending_node_executions.clear()
+            flushed.set()
+
+    manager._flush_node_executions = fake_flush  # type: ignore[method-assign]
+
+    def messages():
+        yield 0
+        # a long node run sending no message
+        assert flushed.wait(timeout=5)
+        yield 1
+
+    for message in manager.write_behind_listen(messages()):
+        if message == 0:
+            manager._buffer_node_execution(_create_node_execution())
+
+    assert flushed.is_set()
+
+
+def test_get_workflow_run_keeps_merged_run():
+    manager = _create_manager(write_behind=True)
+    workflow_run = WorkflowRun()
+    workflow_run.id = str(uuid4())
+    manager._workflow_run = workflow_run
+    merged_workflow_run = WorkflowRun()
+    merged_workflow_run.id = workflow_run.id
+    session = MagicMock()
+    session.merge.return_value = merged_workflow_run
+
+    assert manager._get_workflow_run(session=session, workflow_run_id=workflow_run.id) is merged_workflow_run
+    manager._get_workflow_run(session=MagicMock(), workflow_run_id=workflow_run.id)
+
+    session.merge.assert_called_once_with(workflow_run, load=False)
+    assert manager._workflow_run is not workflow_run
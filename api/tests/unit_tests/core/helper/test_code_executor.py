@@ -0,0 +1,85 @@
+import subprocess
+import sys
+
+import pytest
+
+from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+
+CODE = """
+def main(a: int) -> dict:
+    if a == 3:
+        raise ValueError("no three")
+    if a == 4:
+        import os
+        os._exit(1)
+    return {"b": a * 2}
+"""
+
+
+@pytest.fixture
+def sandbox_runs(monkeypatch):
+    runs = []
+
+    def execute_code(language, preload, code):
+        # run scripts the way the sandbox does, in a python process of their own
+        runs.append(code)
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if process.returncode != 0:
+            raise CodeExecutionError(process.stderr or "exit", stdout=process.stdout)
+        return process.stdout
+
+    monkeypatch.setattr(CodeExecutor, "execute_code", execute_code)
+    return runs
+
+
+def test_execute_in_batches(sandbox_runs, monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 2)
+
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"a": 0}, {"a": 1}, {"a": 2}, {"a": 3}]
+    )
+
+    assert len(sandbox_runs) == 2
+    assert results[:3] == [{"b": 0}, {"b": 2}, {"b": 4}]
+    assert isinstance(results[3], CodeExecutionError)
+    assert str(results[3]) == "ValueError: no three"
+
+
+def test_fail_only_execution_running_when_batch_fails(sandbox_runs, monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 16)
+
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"a": 1}, {"a": 4}, {"a": 2}]
+    )
+
+    # the execution done before the run exited is kept, the one after it is not done nor run again
+    assert len(sandbox_runs) == 1
+    assert results[0] == {"b": 2}
+    assert isinstance(results[1], CodeExecutionError)
+    assert results[2] is None
+
+
+def test_stop_starting_executions_after_max_duration(sandbox_runs, monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 16)
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_MAX_DURATION", 0.1)
+
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3,
+        code="def main(a: int) -> dict:\n    import time\n    time.sleep(0.2)\n    return {'b': a}\n",
+        inputs_list=[{"a": 1}, {"a": 2}, {"a": 3}],
+    )
+
+    assert len(sandbox_runs) == 1
+    assert results == [{"b": 1}, None, None]
+
+
+def test_execute_each_input_without_batch_size(sandbox_runs, monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 0)
+
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"a": 1}, {"a": 2}]
+    )
+
+    assert len(sandbox_runs) == 2
+    assert results == [{"b": 2}, {"b": 4}]
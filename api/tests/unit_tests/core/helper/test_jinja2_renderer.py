@@ -0,0 +1,123 @@
+import time
+
+import pytest
+from jinja2 import TemplateSyntaxError
+
+from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_renderer import Jinja2Renderer
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    Jinja2Renderer.clear()
+    yield
+    Jinja2Renderer.clear()
+
+
+def test_render_like_sandbox_runner():
+    assert Jinja2Renderer.render("Hello {{ name }}!\n", {"name": "Dify"}) == "Hello Dify!"
+    # the runner reads the template as a Python string literal
+    assert Jinja2Renderer.render("a\\nb", {}) == "a\nb"
+    # and the inputs as JSON
+    assert Jinja2Renderer.render("{{ items[0] }}", {"items": (1, 2)}) == "1"
+
+
+def test_reuse_compiled_templates():
+    Jinja2Renderer.render("{{ a }}", {"a": 1})
+    template = Jinja2Renderer._get_template("{{ a }}")
+
+    assert Jinja2Renderer.render("{{ a }}", {"a": 2}) == "2"
+    assert Jinja2Renderer._get_template("{{ a }}") is template
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{% for i in range(100000) %}{% for j in range(100000) %}{% endfor %}{% endfor %}",
+        "{{ 'a' * 100000000 }}",
+        "{{ 2 ** 100000000 }}",
+        "{% macro f(n) %}{{ f(n + 1) }}{% endmacro %}{{ f(0) }}",
+        "{% for i in range(100000) %}{{ 'a' * 1000 }}{% endfor %}",
+        "{{ ''.__class__.__mro__ }}",
+        "'''",
+    ],
+)
+def test_templates_needing_sandbox(template, monkeypatch):
+    monkeypatch.setattr(dify_config, "JINJA2_RENDER_TIMEOUT", 0.2)
+
+    assert Jinja2Renderer.render(template, {}) is None
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        # loops without calls nor lookups in their body
+        "{% for a in text %}{% for b in text %}{% for c in text %}{% endfor %}{% endfor %}{% endfor %}",
+        "{% for a in text %}{% for b in text %}{{ a }}{% endfor %}{% endfor %}",
+        # filters and string methods amplifying their input
+        "{{ ('a' * 1000)|replace('a', 'b' * 100000) }}",
+        "{{ ''|center(50000000) }}",
+        "{{ ''|center(10 ** 12) }}",
+        "{{ text|indent(10 ** 9) }}",
+        "{{ text|wordwrap(1, wrapstring='x' * 100000) }}",
+        "{{ range(1000)|join('x' * 100000) }}",
+        "{{ '%*s'|format(10 ** 9, '') }}",
+        "{{ '{:>1000000000}'.format(1) }}",
+        "{{ text.center(10 ** 12) }}",
+        "{{ text.expandtabs(10 ** 9) }}",
+        "{{ [1]|batch(10 ** 9, 0)|list }}",
+        "{{ []|slice(10 ** 9)|list }}",
+        # values doubling on every iteration
+        "{% set ns = namespace(s='ab') %}{% for i in range(64) %}{% set ns.s = ns.s ~ ns.s %}{% endfor %}",
+        "{% set ns = namespace(s='ab') %}{% for i in range(64) %}{% set ns.s = ns.s + ns.s %}{% endfor %}",
+        "{% set l = [1] %}{% for i in range(64) %}{% set _ = l.extend(l) %}{% endfor %}",
+    ],
+)
+def test_templates_exceeding_limits(template):
+    start_at = time.perf_counter()
+
+    assert Jinja2Renderer.render(template, {"text": "\t a" * 200}) is None
+    assert time.perf_counter() - start_at < dify_config.JINJA2_RENDER_TIMEOUT + 0.5
+
+
+def test_templates_within_limits():
+    inputs = {"text": "a b", "items": ["x", "y"]}
+
+    assert Jinja2Renderer.render("{% for i in items %}{{ loop.index }}{{ i }}{% endfor %}", inputs) == "1x2y"
+    assert Jinja2Renderer.render("{{ text|replace('a', 'c')|center(5) }}", inputs) == " c b "
+    assert Jinja2Renderer.render("{{ items|join(', ') }} {{ '%05d'|format(7) }}", inputs) == "x, y 00007"
+    assert Jinja2Renderer.render("{{ '{:>4}'.format(text) }}{{ text ~ '!' }}", inputs) == " a ba b!"
+
+
+def test_invalid_template():
+    with pytest.raises(TemplateSyntaxError):
+        Jinja2Renderer.render("{% if %}", {})
+
+
+def test_code_executor_renders_in_process(monkeypatch):
+    monkeypatch.setattr(dify_config, "JINJA2_IN_PROCESS_RENDER_ENABLED", True)
+
+    def execute_code(*args, **kwargs):
+        raise AssertionError("template rendered in the sandbox")
+
+    monkeypatch.setattr(CodeExecutor, "execute_code", execute_code)
+
+    result = CodeExecutor.execute_workflow_code_template(
+        language=CodeLanguage.JINJA2, code="{{ a }} + {{ b }}", inputs={"a": 1, "b": 2}
+    )
+
+    assert result == {"result": "1 + 2"}
+    with pytest.raises(CodeExecutionError):
+        CodeExecutor.execute_workflow_code_template(language=CodeLanguage.JINJA2, code="{{ a.b() }}", inputs={})
+
+
+def test_code_executor_falls_back_to_sandbox(monkeypatch):
+    monkeypatch.setattr(dify_config, "JINJA2_IN_PROCESS_RENDER_ENABLED", True)
+    monkeypatch.setattr(CodeExecutor, "execute_code", lambda *args, **kwargs: "<<RESULT>>sandbox<<RESULT>>")
+
+    result = CodeExecutor.execute_workflow_code_template(
+        language=CodeLanguage.JINJA2, code="{{ ''.__class__ }}", inputs={}
+    )
+
+    assert result == {"result": "sandbox"}
@@ -0,0 +1,137 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.helper import model_provider_cache
+from core.helper.model_provider_cache import PluginModelCache
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.model_entities import AIModelEntity, FetchFrom, ModelType
+from core.model_runtime.entities.provider_entities import ConfigurateMethod, ProviderEntity
+from core.plugin.entities.plugin_daemon import PluginModelProviderEntity
+from core.plugin.manager.model import PluginModelManager
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._redis, name)
+
+    def execute(self):
+        pass
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(model_provider_cache, "redis_client", redis)
+    monkeypatch.setattr(PluginModelCache, "_local", None)
+    return redis
+
+
+def _model_schema(model: str) -> AIModelEntity:
+    return AIModelEntity(
+        model=model,
+        label=I18nObject(en_US=model),
+        model_type=ModelType.LLM,
+        fetch_from=FetchFrom.CUSTOMIZABLE_MODEL,
+        model_properties={},
+    )
+
+
+def _model_provider() -> PluginModelProviderEntity:
+    return PluginModelProviderEntity(
+        id="id",
+        created_at=datetime.datetime(2025, 1, 1),
+        updated_at=datetime.datetime(2025, 1, 1),
+        provider="openai",
+        tenant_id="tenant",
+        plugin_unique_identifier="langgenius/openai:0.0.1",
+        plugin_id="langgenius/openai",
+        declaration=ProviderEntity(
+            provider="openai",
+            label=I18nObject(en_US="OpenAI"),
+            supported_model_types=[ModelType.LLM],
+            configurate_methods=[ConfigurateMethod.PREDEFINED_MODEL],
+            models=[_model_schema("gpt-4o")],
+        ),
+    )
+
+
+def test_get_model_schema_is_cached_per_credentials(redis, monkeypatch):
+    fetch_model_schema = MagicMock(side_effect=lambda *args: _model_schema(args[5]))
+    monkeypatch.setattr(PluginModelManager, "_fetch_model_schema", lambda self, *args: fetch_model_schema(*args))
+    manager = PluginModelManager()
+
+    def get_model_schema(credentials):
+        return manager.get_model_schema("tenant", "user", "plugin", "provider", "llm", "model", credentials)
+
+    assert get_model_schema({"api_key": "a"}) == _model_schema("model")
+    assert get_model_schema({"api_key": "a"}) == _model_schema("model")
+    assert fetch_model_schema.call_count == 1
+
+    get_model_schema({"api_key": "b"})
+    assert fetch_model_schema.call_count == 2
+
+    PluginModelCache.invalidate("tenant")
+    get_model_schema({"api_key": "a"})
+    assert fetch_model_schema.call_count == 3
+
+
+def test_fetch_model_providers_returns_copies(redis, monkeypatch):
+    request = MagicMock(return_value=[_model_provider()])
+    monkeypatch.setattr(PluginModelManager, "_request_with_plugin_daemon_response", request)
+    manager = PluginModelManager()
+
+    providers = manager.fetch_model_providers("tenant")
+    providers[0].declaration.provider = "langgenius/openai/openai"
+    cached_providers = manager.fetch_model_providers("tenant")
+
+    assert request.call_count == 1
+    assert cached_providers == [_model_provider()]
+
+
+def test_local_entries_are_read_before_redis(redis, monkeypatch):
+    PluginModelCache.set("tenant", "field", b"data")
+    redis.hashes.clear()
+    assert PluginModelCache.get("tenant", "field") == b"data"
+
+    monkeypatch.setattr(dify_config, "PLUGIN_MODEL_CACHE_LOCAL_TTL", 0)
+    assert PluginModelCache.get("tenant", "field") is None
+
+
+def test_disabled_cache(redis, monkeypatch):
+    monkeypatch.setattr(dify_config, "PLUGIN_MODEL_CACHE_TTL", 0)
+    PluginModelCache.set("tenant", "field", b"data")
+
+    assert PluginModelCache.get("tenant", "field") is None
+    assert redis.hashes == {}
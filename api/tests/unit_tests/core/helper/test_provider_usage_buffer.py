@@ -0,0 +1,208 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.helper import provider_usage_buffer
+from core.helper.provider_usage_buffer import ProviderUsageBuffer
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.sets: dict[str, set[bytes]] = {}
+        self.strings: dict[str, bytes] = {}
+        self.sorted_sets: dict[str, dict[bytes, float]] = {}
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        field = field if isinstance(field, bytes) else field.encode()
+        value = int(fields.get(field, b"0")) + amount
+        fields[field] = str(value).encode()
+        return value
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, value)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def exists(self, key):
+        return int(key in self.hashes)
+
+    def rename(self, src, dst):
+        self.hashes[dst] = self.hashes.pop(src)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def spop(self, key, count):
+        members = self.sets.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value.encode()
+        return True
+
+    def zadd(self, key, mapping):
+        members = self.sorted_sets.setdefault(key, {})
+        members.update({member.encode(): score for member, score in mapping.items()})
+
+    def zrangebyscore(self, key, min, max):
+        members = self.sorted_sets.get(key, {})
+        return sorted((member for member, score in members.items() if score <= max), key=members.__getitem__)
+
+    def zrem(self, key, member):
+        return int(self.sorted_sets.get(key, {}).pop(member.encode(), None) is not None)
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+
+        return queue
+
+    def execute(self):
+        results = [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(provider_usage_buffer, "redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def flush_task(monkeypatch):
+    from tasks import flush_provider_usage_task
+
+    task = MagicMock()
+    monkeypatch.setattr(flush_provider_usage_task, "flush_provider_usage_task", task)
+    return task
+
+
+def test_add_quota_used_accumulates_and_schedules_one_flush(redis, flush_task):
+    ProviderUsageBuffer.add_quota_used("tenant", "openai", "trial", 10)
+    ProviderUsageBuffer.add_quota_used("tenant", "openai", "trial", 5)
+    ProviderUsageBuffer.add_quota_used("tenant", "anthropic", "paid", 1)
+    ProviderUsageBuffer.add_last_used("tenant", "cohere")
+
+    assert ProviderUsageBuffer.get_quota_used("tenant") == {("openai", "trial"): 15, ("anthropic", "paid"): 1}
+    assert set(redis.hashes["provider_usage:last_used:tenant"]) == {b"openai", b"anthropic", b"cohere"}
+    assert redis.sets["provider_usage:dirty_tenants"] == {b"tenant"}
+    flush_task.apply_async.assert_called_once()
+
+
+def test_flush_writes_usages_of_dirty_tenants(redis, flush_task, monkeypatch):
+    ProviderUsageBuffer.add_quota_used("tenant-1", "openai", "trial", 10)
+    ProviderUsageBuffer.add_quota_used("tenant-2", "openai", "paid", 3)
+
+    written = {}
+
+    def write(tenant_id, quota_used, last_used):
+        written[tenant_id] = (dict(quota_used), set(last_used))
+
+    monkeypatch.setattr(ProviderUsageBuffer, "_write", write)
+
+    assert ProviderUsageBuffer.flush() == 2
+    assert written == {
+        "tenant-1": ({b"openai:trial": b"10"}, {b"openai"}),
+        "tenant-2": ({b"openai:paid": b"3"}, {b"openai"}),
+    }
+    assert ProviderUsageBuffer.get_quota_used("tenant-1") == {}
+    assert not redis.sets["provider_usage:dirty_tenants"]
+    # staged usages are deleted once written
+    assert not redis.sorted_sets["provider_usage:staged"]
+    assert not [key for key in redis.hashes if key.startswith("provider_usage:staged:")]
+
+
+def test_flush_puts_usages_back_when_writing_fails(redis, flush_task, monkeypatch):
+    ProviderUsageBuffer.add_quota_used("tenant", "openai", "trial", 10)
+    ProviderUsageBuffer.add_quota_used("other-tenant", "openai", "trial", 3)
+
+    written = []
+
+    def write(tenant_id, quota_used, last_used):
+        if tenant_id == "tenant":
+            # usages added while the flush writes are kept along with the ones put back
+            ProviderUsageBuffer.add_quota_used("tenant", "openai", "trial", 2)
+            raise RuntimeError("database is down")
+        written.append(tenant_id)
+
+    monkeypatch.setattr(ProviderUsageBuffer, "_write", write)
+    monkeypatch.setattr(provider_usage_buffer, "db", MagicMock())
+
+    with pytest.raises(RuntimeError):
+        ProviderUsageBuffer.flush()
+
+    # the other workspace of the round is still flushed
+    assert written == ["other-tenant"]
+    assert ProviderUsageBuffer.get_quota_used("other-tenant") == {}
+    assert ProviderUsageBuffer.get_quota_used("tenant") == {("openai", "trial"): 12}
+    assert redis.sets["provider_usage:dirty_tenants"] == {b"tenant"}
+    assert b"openai" in redis.hashes["provider_usage:last_used:tenant"]
+
+
+def test_flush_puts_back_usages_left_staged_by_a_dead_flush(redis, flush_task, monkeypatch):
+    ProviderUsageBuffer.add_quota_used("tenant", "openai", "trial", 10)
+
+    def die(tenant_id, quota_used, last_used):
+        raise SystemExit()
+
+    monkeypatch.setattr(ProviderUsageBuffer, "_write", die)
+    with pytest.raises(SystemExit):
+        ProviderUsageBuffer.flush()
+
+    written = []
+
+    def write(tenant_id, quota_used, last_used):
+        written.append((tenant_id, dict(quota_used)))
+
+    monkeypatch.setattr(ProviderUsageBuffer, "_write", write)
+
+    # the dying flush may still be writing
+    assert ProviderUsageBuffer.flush() == 0
+    assert written == []
+
+    monkeypatch.setattr(provider_usage_buffer, "STAGED_USAGE_TIMEOUT", 0)
+    assert ProviderUsageBuffer.flush() == 1
+    assert written == [("tenant", {b"openai:trial": b"10"})]
+    assert not redis.sorted_sets["provider_usage:staged"]
+    assert not [key for key in redis.hashes if key.startswith("provider_usage:staged:")]
+
+    # usages put back once only
+    assert ProviderUsageBuffer.flush() == 0
+    assert len(written) == 1
+
+
+def test_get_quota_used_ignores_redis_errors(monkeypatch):
+    redis = MagicMock()
+    redis.hgetall.side_effect = ConnectionError()
+    monkeypatch.setattr(provider_usage_buffer, "redis_client", redis)
+
+    assert ProviderUsageBuffer.get_quota_used("tenant") == {}
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.memory import token_buffer_memory
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+from models.model import AppMode, MessageFile
+
+
+def _messages(count: int) -> list[SimpleNamespace]:
+    # newest first, as queried
+    return [
+        SimpleNamespace(
+            id=f"message-{i}",
+            query=f"query {i}",
+            answer=f"answer {i}",
+            created_at=i,
+            workflow_run_id=None,
+            parent_message_id=f"message-{i - 1}" if i > 0 else None,
+        )
+        for i in reversed(range(count))
+    ]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    store: dict[str, int] = {}
+    redis_mock = MagicMock()
+    redis_mock.hmget.side_effect = lambda key, fields: [store.get(field) for field in fields]
+    pipe = redis_mock.pipeline.return_value.__enter__.return_value
+    pipe.hset.side_effect = lambda key, mapping: store.update(mapping)
+    monkeypatch.setattr(token_buffer_memory, "redis_client", redis_mock)
+    return store
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    def setup(messages: list[SimpleNamespace]) -> tuple[TokenBufferMemory, MagicMock, MagicMock]:
+        session = MagicMock()
+
+        def query(*entities):
+            result = MagicMock()
+            if entities[0] is MessageFile:
+                result.filter.return_value.all.return_value = []
+            else:
+                result.filter.return_value.order_by.return_value.limit.return_value.all.return_value = messages
+            return result
+
+        session.query.side_effect = query
+        monkeypatch.setattr(token_buffer_memory, "db", SimpleNamespace(session=session))
+
+        model_instance = MagicMock()
+        model_instance.provider = "openai"
+        model_instance.model = "gpt-4o"
+        # every prompt message counts as many tokens as the words of its content
+        model_instance.get_llm_num_tokens.side_effect = lambda prompt_messages: sum(
+            len(prompt_message.content.split()) for prompt_message in prompt_messages
+        )
+        conversation = SimpleNamespace(id="conversation", mode=AppMode.CHAT.value, app=None)
+        return TokenBufferMemory(conversation=conversation, model_instance=model_instance), model_instance, session
+
+    return setup
+
+
+def test_keeps_newest_messages_within_token_limit(memory, redis):
+    token_buffer, model_instance, session = memory(_messages(100))
+
+    prompt_messages = token_buffer.get_history_prompt_messages(max_token_limit=10)
+
+    assert prompt_messages == [
+        AssistantPromptMessage(content="answer 97"),
+        UserPromptMessage(content="query 98"),
+        AssistantPromptMessage(content="answer 98"),
+        UserPromptMessage(content="query 99"),
+        AssistantPromptMessage(content="answer 99"),
+    ]
+    # files of the thread are loaded in one query and only the window and its boundary are counted
+    assert [call.args[0] for call in session.query.call_args_list].count(MessageFile) == 1
+    assert model_instance.get_llm_num_tokens.call_count == 6
+
+
+def test_reuses_cached_token_counts(memory, redis):
+    messages = _messages(10)
+    token_buffer, model_instance, _ = memory(messages)
+    token_buffer.get_history_prompt_messages(max_token_limit=1000)
+    assert model_instance.get_llm_num_tokens.call_count == 20
+
+    token_buffer, model_instance, _ = memory(_messages(11))
+    prompt_messages = token_buffer.get_history_prompt_messages(max_token_limit=1000)
+
+    assert len(prompt_messages) == 22
+    assert model_instance.get_llm_num_tokens.call_count == 2
+
+
+def test_keeps_newest_message_exceeding_token_limit(memory, redis):
+    token_buffer, _, _ = memory(_messages(3))
+
+    assert token_buffer.get_history_prompt_messages(max_token_limit=1) == [AssistantPromptMessage(content="answer 2")]
+
+
+def test_skips_newly_created_message(memory, redis):
+    messages = _messages(2)
+    messages[0].answer = ""
+    token_buffer, _, _ = memory(messages)
+
+    assert token_buffer.get_history_prompt_messages() == [
+        UserPromptMessage(content="query 0"),
+        AssistantPromptMessage(content="answer 0"),
+    ]
@@ -0,0 +1,123 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.model_runtime.entities.common_entities import I18nObject
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    ImagePromptMessageContent,
+    PromptMessageTool,
+    SystemPromptMessage,
+    TextPromptMessageContent,
+    UserPromptMessage,
+)
+from core.model_runtime.entities.model_entities import AIModelEntity, FetchFrom, ModelPropertyKey, ModelType
+from core.model_runtime.model_providers.__base.tokenizers import local_tokenizer
+from core.model_runtime.model_providers.__base.tokenizers.local_tokenizer import LocalTokenizer
+from libs.helper import generate_text_hash
+
+
+class _WhitespaceEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return text.split()
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    encoder = _WhitespaceEncoder()
+    monkeypatch.setattr(local_tokenizer, "_encoders", {"gpt2": encoder, "cl100k_base": encoder, "o200k_base": None})
+    monkeypatch.setattr(local_tokenizer, "_counts", None)
+    return encoder
+
+
+def _model_schema(tokenizer=None):
+    return AIModelEntity(
+        model="model",
+        label=I18nObject(en_US="model"),
+        model_type=ModelType.LLM,
+        fetch_from=FetchFrom.PREDEFINED_MODEL,
+        model_properties={ModelPropertyKey.TOKENIZER: tokenizer} if tokenizer else {},
+    )
+
+
+def test_get_encoding_name(encoder):
+    assert LocalTokenizer.get_encoding_name("model", _model_schema("cl100k_base")) == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("gpt-4", None) == "cl100k_base"
+    assert LocalTokenizer.get_encoding_name("model", _model_schema()) == "gpt2"
+    # models that opt out and models whose tokenizer can not be loaded count with the plugin
+    assert LocalTokenizer.get_encoding_name("model", _model_schema("plugin")) is None
+    assert LocalTokenizer.get_encoding_name("gpt-4o", None) is None
+
+
+def test_get_num_tokens(encoder):
+    prompt_messages = [
+        SystemPromptMessage(content="you are helpful"),
+        UserPromptMessage(
+            content=[
+                TextPromptMessageContent(data="describe this image"),
+                ImagePromptMessageContent(format="png", base64_data="", mime_type="image/png"),
+            ],
+            name="alice",
+        ),
+        AssistantPromptMessage(
+            content="",
+            tool_calls=[
+                AssistantPromptMessage.ToolCall(
+                    id="1",
+                    type="function",
+                    function=AssistantPromptMessage.ToolCall.ToolCallFunction(name="search", arguments='{"q": "x"}'),
+                )
+            ],
+        ),
+    ]
+    tools = [PromptMessageTool(name="search", description="web search", parameters={})]
+
+    num_tokens = LocalTokenizer.get_num_tokens("gpt2", prompt_messages, tools)
+
+    # 3 per message, 3 for the reply, 1 per name
+    assert num_tokens == (3 + 3) + (3 + 3 + 1 + 1) + (3 + 1 + 2) + 3 + 7
+
+
+def test_counts_are_memoized(encoder):
+    prompt_messages = [UserPromptMessage(content="hello world"), AssistantPromptMessage(content="hi there")]
+
+    LocalTokenizer.get_num_tokens("gpt2", prompt_messages)
+    calls = encoder.calls
+    LocalTokenizer.get_num_tokens("gpt2", prompt_messages[1:])
+
+    assert encoder.calls == calls
+
+
+def test_large_language_model_falls_back_to_plugin(encoder, monkeypatch):
+    from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+
+    get_llm_num_tokens = MagicMock(return_value=42)
+    monkeypatch.setattr(
+        "core.model_runtime.model_providers.__base.large_language_model.PluginModelManager",
+        lambda: MagicMock(get_llm_num_tokens=get_llm_num_tokens),
+    )
+    llm = LargeLanguageModel.model_construct(tenant_id="tenant", plugin_id="plugin", provider_name="provider")
+    prompt_messages = [UserPromptMessage(content="hello world")]
+
+    monkeypatch.setattr(LargeLanguageModel, "get_model_schema", lambda *args: _model_schema())
+    assert llm.get_num_tokens("model", {}, prompt_messages) == 3 + 2 + 3
+    get_llm_num_tokens.assert_not_called()
+
+    monkeypatch.setattr(
+        LargeLanguageModel, "get_model_schema", lambda self, model, credentials: _model_schema("plugin")
+    )
+    assert llm.get_num_tokens("model", {}, prompt_messages) == 42
+
+
+def test_memo_does_not_keep_texts(encoder):
+    text = "a long document " * 100
+
+    LocalTokenizer.get_text_num_tokens("gpt2", text)
+
+    assert local_tokenizer._counts is not None
+    assert local_tokenizer._counts.get(("gpt2", text)) is None
+    assert local_tokenizer._counts.get(("gpt2", generate_text_hash(text))) is not None
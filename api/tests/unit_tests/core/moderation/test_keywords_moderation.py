@@ -0,0 +1,65 @@
+import pytest
+
+from core.moderation.keywords.keyword_matcher import KeywordMatcher
+from core.moderation.keywords.keywords import KeywordsModeration
+
+
+@pytest.mark.parametrize(
+    ("keywords", "text", "matched"),
+    [
+        (["bad"], "this is BAD", True),
+        (["he", "she", "his", "hers"], "ushers", True),
+        (["abcd", "bce"], "abce", True),
+        (["abcd", "bcx"], "abcx", True),
+        (["abcd"], "abc abd bcd", False),
+        (["", "x"], "", False),
+        ([], "anything", False),
+    ],
+)
+def test_search(keywords, text, matched):
+    assert KeywordMatcher(keywords).search(text) is matched
+    assert KeywordMatcher(keywords).search(text) is any(k and k.lower() in text.lower() for k in keywords)
+
+
+def test_stream_matches_keywords_across_chunks():
+    stream = KeywordMatcher(["forbidden"]).stream()
+
+    assert not stream.feed("this is forb")
+    assert not stream.feed("")
+    assert stream.feed("IDDEN text")
+    assert stream.feed("clean")
+
+
+def test_get_reuses_compiled_matcher():
+    assert KeywordMatcher.get(["a", "b"]) is KeywordMatcher.get(["a", "b"])
+    assert KeywordMatcher.get(["a", "b"]) is not KeywordMatcher.get(["a", "c"])
+
+
+def _moderation() -> KeywordsModeration:
+    return KeywordsModeration(
+        app_id="app",
+        tenant_id="tenant",
+        config={
+            "keywords": "forbidden\nsecret",
+            "inputs_config": {"enabled": True, "preset_response": "input blocked"},
+            "outputs_config": {"enabled": True, "preset_response": "output blocked"},
+        },
+    )
+
+
+def test_moderation_for_inputs_and_outputs():
+    moderation = _moderation()
+
+    assert moderation.moderation_for_inputs({"a": "fine"}, query="a SECRET").flagged
+    assert not moderation.moderation_for_inputs({"a": "fine"}, query="fine").flagged
+    assert moderation.moderation_for_outputs("forbidden").preset_response == "output blocked"
+    assert not moderation.moderation_for_outputs("fine").flagged
+
+
+def test_moderation_for_outputs_chunk():
+    moderation = _moderation()
+
+    assert not moderation.moderation_for_outputs_chunk("a sec").flagged
+    result = moderation.moderation_for_outputs_chunk("ret")
+    assert result.flagged
+    assert result.preset_response == "output blocked"
@@ -0,0 +1,150 @@
+import base64
+import json
+import zlib
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from core.ops import ops_trace_manager
+from core.ops.base_trace_instance import BaseTraceInstance
+from core.ops.entities.trace_entity import GenerateNameTraceInfo
+from core.ops.ops_trace_manager import OpsTraceManager, TraceQueueManager
+from tasks import ops_trace_task
+
+
+class FakeTraceInstance(BaseTraceInstance):
+    def __init__(self, trace_config=None):
+        super().__init__(trace_config)
+        self.traced: list = []
+        self.flushes = 0
+
+    def trace(self, trace_info):
+        if trace_info.tenant_id == "broken":
+            raise ValueError("failed to trace")
+        self.traced.append(trace_info)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class FakeTraceTask:
+    def __init__(self, app_id, tenant_id="tenant"):
+        self.app_id = app_id
+        self.trace_type = "generate_conversation_name"
+        self.tenant_id = tenant_id
+
+    def execute(self):
+        return GenerateNameTraceInfo(
+            conversation_id="conversation",
+            tenant_id=self.tenant_id,
+            inputs="query",
+            outputs="name",
+            start_time=datetime(2024, 1, 1),
+            end_time=datetime(2024, 1, 1),
+            metadata={},
+        )
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    with app.app_context():
+        yield app
+
+
+def _queue_manager(app: Flask) -> TraceQueueManager:
+    manager = TraceQueueManager.__new__(TraceQueueManager)
+    manager.flask_app = app
+    return manager
+
+
+def _send(monkeypatch, app, tasks) -> list[dict]:
+    sent: list[dict] = []
+    monkeypatch.setattr(ops_trace_manager.process_trace_tasks_batch, "delay", sent.append)
+    _queue_manager(app).send_to_celery(tasks)
+    return sent
+
+
+def test_send_to_celery_sends_one_inline_batch(monkeypatch, app):
+    saved: list = []
+    monkeypatch.setattr(ops_trace_manager.storage, "save", lambda *args: saved.append(args))
+
+    sent = _send(monkeypatch, app, [FakeTraceTask("app-1"), FakeTraceTask(None), FakeTraceTask("app-2")])
+
+    assert not saved
+    assert len(sent) == 1
+    tasks_data = json.loads(zlib.decompress(base64.b64decode(sent[0]["payload"])))
+    assert [task_data["app_id"] for task_data in tasks_data] == ["app-1", "app-2"]
+    assert tasks_data[0]["trace_info_type"] == "GenerateNameTraceInfo"
+
+
+def test_send_to_celery_saves_large_batch_to_storage(monkeypatch, app):
+    saved: dict[str, bytes] = {}
+    monkeypatch.setattr(ops_trace_manager.dify_config, "OPS_TRACE_BATCH_INLINE_MAX_SIZE", 16)
+    monkeypatch.setattr(ops_trace_manager.storage, "save", lambda path, data: saved.update({path: data}))
+
+    sent = _send(monkeypatch, app, [FakeTraceTask("app-1")])
+
+    assert len(sent) == 1
+    assert "payload" not in sent[0]
+    assert len(json.loads(zlib.decompress(saved[sent[0]["file_path"]]))) == 1
+
+
+def test_process_trace_tasks_batch_traces_per_app_and_flushes_once(monkeypatch, app):
+    sent = _send(
+        monkeypatch,
+        app,
+        [FakeTraceTask("app-1"), FakeTraceTask("app-2"), FakeTraceTask("app-1", "broken"), FakeTraceTask("app-1")],
+    )
+    instances = {"app-1": FakeTraceInstance(), "app-2": FakeTraceInstance()}
+    monkeypatch.setattr(OpsTraceManager, "get_ops_trace_instance", lambda app_id: instances[app_id])
+    failed: dict[str, int] = {}
+    monkeypatch.setattr(
+        ops_trace_task, "redis_client", SimpleNamespace(incrby=lambda key, amount: failed.update({key: amount}))
+    )
+
+    ops_trace_task.process_trace_tasks_batch(sent[0])
+
+    assert [len(instance.traced) for instance in instances.values()] == [2, 1]
+    assert isinstance(instances["app-1"].traced[0], GenerateNameTraceInfo)
+    assert [instance.flushes for instance in instances.values()] == [1, 1]
+    assert failed == {"FAILED_OPS_TRACE_app-1": 1}
+
+
+def test_get_ops_trace_instance_is_cached_per_tracing_config(monkeypatch):
+    tracing_config = {"public_key": "encrypted-public", "secret_key": "encrypted-secret", "host": ""}
+    app_model = SimpleNamespace(
+        id="app", tenant_id="tenant", tracing=json.dumps({"enabled": True, "tracing_provider": "langfuse"})
+    )
+    trace_app_config = SimpleNamespace(tracing_config=tracing_config)
+
+    class FakeQuery:
+        def __init__(self, model):
+            self.model = model
+
+        def filter(self, *args):
+            return self
+
+        def first(self):
+            return app_model if self.model is ops_trace_manager.App else trace_app_config
+
+    monkeypatch.setattr(ops_trace_manager.db, "session", SimpleNamespace(query=FakeQuery), raising=False)
+    monkeypatch.setitem(ops_trace_manager.provider_config_map["langfuse"], "trace_instance", FakeTraceInstance)
+    decrypted: list[dict] = []
+
+    def decrypt_tracing_config(tenant_id, tracing_provider, config):
+        decrypted.append(config)
+        return {"public_key": "public", "secret_key": "secret"}
+
+    monkeypatch.setattr(OpsTraceManager, "decrypt_tracing_config", decrypt_tracing_config)
+    monkeypatch.setattr(OpsTraceManager, "_trace_instance_cache", None)
+
+    trace_instance = OpsTraceManager.get_ops_trace_instance("app")
+    assert OpsTraceManager.get_ops_trace_instance("app") is trace_instance
+    assert len(decrypted) == 1
+
+    trace_app_config.tracing_config = {**tracing_config, "secret_key": "encrypted-rotated"}
+    assert OpsTraceManager.get_ops_trace_instance("app") is not trace_instance
+    assert len(decrypted) == 2
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from configs import dify_config
+from core.plugin.entities.plugin_daemon import PluginDaemonInnerError
+from core.plugin.manager import http_client
+from core.plugin.manager.base import BasePluginManager
+from core.plugin.manager.debugging import PluginDebuggingManager
+from core.plugin.manager.http_client import LATENCY_BUCKETS, PluginDaemonRequestStats, get_session
+
+
+def test_get_session_is_shared_per_process(monkeypatch):
+    session = get_session()
+
+    assert get_session() is session
+    adapter = session.get_adapter("http://localhost:5002")
+    assert adapter.max_retries.connect == dify_config.PLUGIN_DAEMON_MAX_RETRIES
+    assert adapter._pool_maxsize == dify_config.PLUGIN_DAEMON_POOL_MAXSIZE
+
+    monkeypatch.setattr(http_client.os, "getpid", lambda: -1)
+    assert get_session() is not session
+
+
+def test_request_stats(monkeypatch):
+    monkeypatch.setattr(dify_config, "PLUGIN_DAEMON_POOL_MAXSIZE", 1)
+    stats = PluginDaemonRequestStats()
+
+    stats.start("plugin")
+    stats.start("plugin")
+    assert stats.snapshot()["plugin"]["in_flight"] == 2
+    stats.finish("plugin", 0.001, failed=False)
+    stats.finish("plugin", 100, failed=True)
+
+    snapshot = stats.snapshot()["plugin"]
+    assert snapshot["in_flight"] == 0
+    assert snapshot["requests"] == 2
+    assert snapshot["errors"] == 1
+    assert snapshot["pool_overflows"] == 1
+    assert snapshot["latency_buckets"][0] == 1
+    assert snapshot["latency_buckets"][len(LATENCY_BUCKETS)] == 1
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr("core.plugin.manager.base.get_session", lambda: session)
+    stats = PluginDaemonRequestStats()
+    monkeypatch.setattr("core.plugin.manager.base.plugin_daemon_request_stats", stats)
+    return session, stats
+
+
+def test_request_uses_pooled_session(session):
+    session, stats = session
+
+    BasePluginManager()._request("POST", "plugin/tenant/dispatch/llm/invoke", headers={"X-Plugin-ID": "author/llm"})
+
+    kwargs = session.request.call_args.kwargs
+    assert kwargs["timeout"] == (dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT, dify_config.PLUGIN_DAEMON_READ_TIMEOUT)
+    assert kwargs["headers"]["X-Api-Key"] == dify_config.PLUGIN_DAEMON_KEY
+    assert stats.snapshot()["author/llm"]["requests"] == 1
+
+
+def test_management_request_uses_management_timeout(session):
+    session, _ = session
+    session.request.return_value.json.return_value = {"code": 0, "message": "", "data": {"key": "debugging-key"}}
+
+    assert PluginDebuggingManager().get_debugging_key("tenant") == "debugging-key"
+
+    kwargs = session.request.call_args.kwargs
+    assert kwargs["timeout"] == (
+        dify_config.PLUGIN_DAEMON_CONNECT_TIMEOUT,
+        dify_config.PLUGIN_DAEMON_MANAGEMENT_READ_TIMEOUT,
+    )
+
+
+def test_request_connection_error(session):
+    session, stats = session
+    session.request.side_effect = requests.exceptions.ConnectionError()
+
+    with pytest.raises(PluginDaemonInnerError):
+        BasePluginManager()._request("GET", "plugin/tenant/management/list")
+
+    assert stats.snapshot()[""]["errors"] == 1
@@ -0,0 +1,103 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from core.rag.datasource.keyword.jieba import jieba_inverted_index
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from core.rag.models.document import Document
+from models.dataset import DatasetKeywordIndex
+
+
+def _create_index(monkeypatch) -> tuple[JiebaInvertedIndex, MagicMock]:
+    session = MagicMock()
+    monkeypatch.setattr(jieba_inverted_index, "db", MagicMock(session=session))
+    dataset = MagicMock(id="dataset-1")
+    return JiebaInvertedIndex(dataset), session
+
+
+def test_import_keyword_table_writes_one_posting_per_pair(monkeypatch):
+    index, session = _create_index(monkeypatch)
+
+    postings_count = index.import_keyword_table({"apple": {"node-1", "node-2"}, "pear": {"node-1"}})
+
+    assert postings_count == 3
+    session.execute.assert_called_once()
+    compiled = session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (dataset_id, keyword, index_node_id) DO NOTHING" in str(compiled)
+    postings = {
+        (compiled.params[f"keyword_m{i}"], compiled.params[f"index_node_id_m{i}"]) for i in range(postings_count)
+    }
+    assert postings == {("apple", "node-1"), ("apple", "node-2"), ("pear", "node-1")}
+    session.commit.assert_called_once()
+
+
+def test_add_postings_deduplicates_keywords(monkeypatch):
+    index, session = _create_index(monkeypatch)
+
+    assert index._add_postings({"node-1": ["apple", "apple", "pear"]}) == 2
+
+
+def test_delete_by_ids_without_ids_is_a_noop(monkeypatch):
+    index, session = _create_index(monkeypatch)
+
+    index.delete_by_ids([])
+
+    session.query.assert_not_called()
+
+
+class _KeywordTableHandler:
+    def extract_keywords(self, text, max_keywords_per_chunk=10):
+        return set(text.split())
+
+
+@pytest.fixture
+def sqlite_session(monkeypatch):
+    engine = create_engine("sqlite://")
+    DatasetKeywordIndex.__table__.create(engine)
+    with Session(engine) as session:
+        monkeypatch.setattr(jieba_inverted_index, "db", MagicMock(session=session))
+        monkeypatch.setattr(jieba_inverted_index, "insert", sqlite.insert)
+        monkeypatch.setattr(jieba_inverted_index, "JiebaKeywordTableHandler", _KeywordTableHandler)
+        monkeypatch.setattr(Jieba, "_update_segment_keywords", lambda self, dataset_id, node_id, keywords: None)
+        monkeypatch.setattr(
+            JiebaInvertedIndex,
+            "_get_documents_by_chunk_indices",
+            lambda self, ids: [Document(page_content="", metadata={"doc_id": node_id}) for node_id in ids],
+        )
+        yield session
+
+
+def _index_segments(segments: dict[str, str]) -> JiebaInvertedIndex:
+    index = JiebaInvertedIndex(MagicMock(id=uuid.uuid4()))
+    index.add_texts(
+        [Document(page_content=content, metadata={"doc_id": node_id}) for node_id, content in segments.items()]
+    )
+    return index
+
+
+def test_search_ranks_segments_by_matched_keywords(sqlite_session):
+    index = _index_segments(
+        {
+            "node-1": "apple banana cherry",
+            "node-2": "apple",
+            "node-3": "banana cherry",
+            "node-4": "durian",
+            "node-0": "apple durian",
+        }
+    )
+    # postings of other datasets are not searched
+    _index_segments({"node-5": "apple banana cherry"})
+
+    def search(query, **kwargs):
+        return [document.metadata["doc_id"] for document in index.search(query, **kwargs)]
+
+    # segments matching as many keywords are ordered by id
+    assert search("apple banana cherry") == ["node-1", "node-3", "node-0", "node-2"]
+    assert search("apple banana cherry", top_k=2) == ["node-1", "node-3"]
+    assert search("durian") == ["node-0", "node-4"]
+    assert search("grape") == []
@@ -0,0 +1,122 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource import segment_hydrator
+from core.rag.datasource.segment_hydrator import SegmentHydrator
+from models.dataset import ChildChunk, DocumentSegment
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self._commands: list = []
+
+    def pipeline(self, transaction=True):
+        self._commands = []
+        return self
+
+    def hmget(self, name, keys):
+        self._commands.append(lambda: [self.hashes.get(name, {}).get(key) for key in keys])
+
+    def hset(self, name, mapping):
+        self._commands.append(lambda: self.hashes.setdefault(name, {}).update(mapping))
+
+    def expire(self, name, time):
+        self._commands.append(lambda: True)
+
+    def execute(self):
+        return [command() for command in self._commands]
+
+    def delete(self, name):
+        self.hashes.pop(name, None)
+
+
+def _create_segment(**kwargs) -> DocumentSegment:
+    return DocumentSegment(
+        id=kwargs.get("id", "segment-1"),
+        dataset_id="dataset-1",
+        document_id="document-1",
+        index_node_id=kwargs.get("index_node_id", "node-1"),
+        content="content",
+        keywords=["content"],
+        enabled=True,
+        status="completed",
+        created_at=datetime(2025, 1, 1, 12, 0, 0),
+    )
+
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> FakeRedis:
+    redis = FakeRedis()
+    monkeypatch.setattr(segment_hydrator, "redis_client", redis)
+    monkeypatch.setattr(segment_hydrator.dify_config, "RETRIEVAL_SEGMENT_CACHE_TTL", 60)
+    return redis
+
+
+@pytest.fixture
+def session(monkeypatch) -> MagicMock:
+    session = MagicMock()
+    monkeypatch.setattr(segment_hydrator, "db", MagicMock(session=session))
+    return session
+
+
+def test_get_segments_loads_node_ids_and_segment_ids_in_one_query(fake_redis, session):
+    by_node = _create_segment(id="segment-1", index_node_id="node-1")
+    by_id = _create_segment(id="segment-2", index_node_id="node-2")
+    session.query.return_value.filter.return_value.all.return_value = [by_node, by_id]
+
+    segments_by_node_id, segments_by_id = SegmentHydrator.get_segments(
+        {"dataset-1": {"node-1"}}, {"dataset-1": {"segment-2"}}
+    )
+
+    session.query.assert_called_once_with(DocumentSegment)
+    assert segments_by_node_id == {"node-1": by_node}
+    assert segments_by_id == {"segment-2": by_id}
+
+
+def test_get_segments_is_served_from_cache(fake_redis, session):
+    session.query.return_value.filter.return_value.all.return_value = [_create_segment()]
+    SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+    session.reset_mock()
+
+    segments_by_node_id, _ = SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+
+    session.query.assert_not_called()
+    segment = segments_by_node_id["node-1"]
+    assert segment.id == "segment-1"
+    assert segment.keywords == ["content"]
+    assert segment.created_at == datetime(2025, 1, 1, 12, 0, 0)
+
+
+def test_invalidate_drops_cached_segments(fake_redis, session):
+    session.query.return_value.filter.return_value.all.return_value = [_create_segment()]
+    SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+
+    SegmentHydrator.invalidate("dataset-1")
+    SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+
+    assert session.query.call_count == 2
+
+
+def test_expired_entries_are_ignored(fake_redis, session, monkeypatch):
+    session.query.return_value.filter.return_value.all.return_value = [_create_segment()]
+    SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+
+    now = segment_hydrator.time.time()
+    monkeypatch.setattr(segment_hydrator.time, "time", lambda: now + 61)
+    SegmentHydrator.get_segments({"dataset-1": {"node-1"}}, {})
+
+    assert session.query.call_count == 2
+
+
+def test_get_child_chunks_caches_by_index_node_id(fake_redis, session):
+    child_chunk = ChildChunk(id="child-1", dataset_id="dataset-1", segment_id="segment-1", index_node_id="child-node-1")
+    session.query.return_value.filter.return_value.all.return_value = [child_chunk]
+
+    assert SegmentHydrator.get_child_chunks({"dataset-1": {"child-node-1"}}) == {"child-node-1": child_chunk}
+    cached = SegmentHydrator.get_child_chunks({"dataset-1": {"child-node-1"}})
+
+    session.query.assert_called_once_with(ChildChunk)
+    assert cached["child-node-1"].segment_id == "segment-1"
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from core.rag.datasource.vdb.embedded import collection as embedded_collection
+from core.rag.datasource.vdb.embedded.collection import EmbeddedCollection, IVFIndex
+
+
+def _upsert(collection: EmbeddedCollection, vectors: dict[str, list[float]], **metadata):
+    ids = list(vectors)
+    metadatas = [dict(metadata, doc_id=id) for id in ids]
+    collection.upsert(ids, [f"text of {id}" for id in ids], metadatas, list(vectors.values()))
+
+
+def test_search_returns_top_k_by_cosine_similarity(tmp_path):
+    collection = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {"a": [1.0, 0.0], "b": [1.0, 1.0], "c": [0.0, 1.0]})
+
+    results = collection.search([2.0, 0.1], top_k=2)
+
+    assert [collection.get_id(row) for row, _ in results] == ["a", "b"]
+    assert results[0][1] == pytest.approx(np.cos(np.arctan2(0.1, 2.0)), rel=1e-5)
+
+
+def test_search_applies_score_threshold_and_filters(tmp_path):
+    collection = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {"a": [1.0, 0.0]}, group_id="dataset-1", document_id="document-1")
+    _upsert(collection, {"b": [1.0, 0.1]}, group_id="dataset-2", document_id="document-2")
+    _upsert(collection, {"c": [0.0, 1.0]}, group_id="dataset-1", document_id="document-3")
+
+    results = collection.search([1.0, 0.0], top_k=10, filters={"group_id": ["dataset-1"]})
+    assert [collection.get_id(row) for row, _ in results] == ["a", "c"]
+
+    results = collection.search([1.0, 0.0], top_k=10, score_threshold=0.5, filters={"group_id": ["dataset-1"]})
+    assert [collection.get_id(row) for row, _ in results] == ["a"]
+
+    results = collection.search([1.0, 0.0], top_k=10, filters={"document_id": ["document-2", "document-3"]})
+    assert [collection.get_id(row) for row, _ in results] == ["b", "c"]
+
+
+def test_upsert_replaces_rows_with_same_id(tmp_path):
+    collection = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {"a": [1.0, 0.0], "b": [0.0, 1.0]})
+    _upsert(collection, {"a": [0.0, 1.0]})
+
+    assert collection.count == 2
+    results = collection.search([0.0, 1.0], top_k=10)
+    assert sorted(collection.get_id(row) for row, _ in results) == ["a", "b"]
+    assert all(score == pytest.approx(1.0) for _, score in results)
+
+
+def test_upsert_rejects_dimension_mismatch(tmp_path):
+    collection = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {"a": [1.0, 0.0]})
+
+    with pytest.raises(ValueError):
+        _upsert(collection, {"b": [1.0, 0.0, 0.0]})
+
+
+def test_writes_are_visible_to_other_processes(tmp_path):
+    writer = EmbeddedCollection(str(tmp_path))
+    reader = EmbeddedCollection(str(tmp_path))
+    _upsert(writer, {"a": [1.0, 0.0], "b": [0.0, 1.0]}, document_id="document-1")
+    assert reader.contains("a")
+
+    writer.delete_rows(writer.rows_by_field("document_id", ["document-1"]))
+    assert not reader.contains("a")
+    assert reader.search([1.0, 0.0], top_k=10) == []
+
+    writer.drop()
+    _upsert(writer, {"c": [1.0, 0.0]})
+    assert [reader.get_id(row) for row, _ in reader.search([1.0, 0.0], top_k=10)] == ["c"]
+
+
+def test_delete_rows_compacts_collection(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedded_collection, "_COMPACT_MIN_DELETED", 2)
+    collection = EmbeddedCollection(str(tmp_path))
+    reader = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {"a": [1.0, 0.0], "b": [0.0, 1.0], "c": [1.0, 1.0]})
+
+    collection.delete_rows(collection.rows_by_ids(["a", "b"]))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "deleted.1.jsonl",
+        "documents.1.jsonl",
+        "manifest.json",
+        "vectors.1.f32",
+    ]
+    assert [reader.get_id(row) for row, _ in reader.search([1.0, 1.0], top_k=10)] == ["c"]
+
+
+def test_ivf_search_finds_nearest_neighbors(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 16))
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.05, size=(400, 16))
+    collection = EmbeddedCollection(str(tmp_path))
+    _upsert(collection, {str(i): vector.tolist() for i, vector in enumerate(vectors)})
+
+    exact = collection.search(centers[3], top_k=5)
+    approximate = collection.search(centers[3], top_k=5, ivf_threshold=100, ivf_nprobe=4)
+
+    assert isinstance(collection._ivf, IVFIndex)
+    assert [row for row, _ in approximate] == [row for row, _ in exact]
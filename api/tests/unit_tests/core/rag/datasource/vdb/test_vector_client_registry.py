@@ -0,0 +1,101 @@
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from core.rag.datasource.vdb import vector_client_registry
+from core.rag.datasource.vdb.vector_client_registry import (
+    VectorClientRegistry,
+    create_pooled_engine,
+    engine_pool_stats,
+)
+
+
+class _Config(BaseModel):
+    host: str
+    port: int
+
+
+@pytest.fixture(autouse=True)
+def _clear_registry():
+    VectorClientRegistry.clear()
+    yield
+    VectorClientRegistry.clear()
+
+
+def test_get_client_shares_client_per_config():
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = VectorClientRegistry.get_client("pgvector", _Config(host="a", port=1), factory)
+    second = VectorClientRegistry.get_client("pgvector", _Config(host="a", port=1), factory)
+    other = VectorClientRegistry.get_client("pgvector", _Config(host="b", port=1), factory)
+
+    assert first is second
+    assert other is not first
+    assert factory.call_count == 2
+
+
+def test_get_client_does_not_share_clients_across_processes(monkeypatch):
+    factory = MagicMock(side_effect=lambda: object())
+    first = VectorClientRegistry.get_client("qdrant", _Config(host="a", port=1), factory)
+
+    monkeypatch.setattr(vector_client_registry.os, "getpid", lambda: -1)
+
+    assert VectorClientRegistry.get_stats() == []
+    assert VectorClientRegistry.get_client("qdrant", _Config(host="a", port=1), factory) is not first
+
+
+def test_get_stats_reports_client_stats():
+    VectorClientRegistry.get_client("pgvector", _Config(host="a", port=1), object, stats=lambda _: {"pool_size": 5})
+    VectorClientRegistry.get_client("qdrant", _Config(host="a", port=1), object)
+
+    stats = VectorClientRegistry.get_stats()
+
+    assert [s["vector_type"] for s in stats] == ["pgvector", "qdrant"]
+    assert stats[0]["pool_size"] == 5
+    assert "pool_size" not in stats[1]
+
+
+def test_pooled_engine_replaces_dead_idle_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_client_registry.dify_config, "VECTOR_STORE_POOL_SIZE", 1)
+    monkeypatch.setattr(vector_client_registry.dify_config, "VECTOR_STORE_POOL_IDLE_CHECK_INTERVAL", 0)
+    engine = create_pooled_engine(f"sqlite:///{tmp_path / 'vector.db'}")
+
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+    # simulate a connection dropped by the server while it was idle in the pool
+    dbapi_connection.close()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert conn.connection.dbapi_connection is not dbapi_connection
+
+    assert engine_pool_stats(engine)["pool_size"] == 1
+
+
+def test_pgvector_pool_counts_checkouts_and_replaced_connections(monkeypatch):
+    import psycopg2
+
+    from core.rag.datasource.vdb.pgvector.pgvector import PGVectorConnectionPool
+
+    dead = MagicMock(closed=False)
+    monkeypatch.setattr(psycopg2, "connect", MagicMock(side_effect=[dead, MagicMock(closed=False)]))
+    pool = PGVectorConnectionPool(1, 2, idle_check_interval=0)
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.stats()["checked_out_connections"] == 0
+    # dropped by the server while idle in the pool
+    dead.closed = True
+
+    # the idle connection is dead, it is replaced on checkout
+    conn = pool.getconn()
+    assert conn is not dead
+    assert pool.stats() == {
+        "min_connections": 1,
+        "max_connections": 2,
+        "checked_out_connections": 1,
+        "checkouts": 2,
+        "replaced_connections": 1,
+    }
@@ -0,0 +1,97 @@
+import math
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.models.document import Document
+from core.rag.rerank import weight_rerank
+from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+from models.dataset import DocumentSegment
+
+
+class _KeywordTableHandler:
+    def __init__(self, keywords: dict[str, set[str]]):
+        self.keywords = keywords
+        self.extracted: list[str] = []
+
+    def extract_keywords(self, text, max_keywords_per_chunk=10):
+        self.extracted.append(text)
+        return self.keywords[text]
+
+
+@pytest.fixture
+def runner():
+    return WeightRerankRunner(
+        "tenant-id",
+        Weights(
+            vector_setting=VectorSetting(
+                vector_weight=0.5, embedding_provider_name="provider", embedding_model_name="model"
+            ),
+            keyword_setting=KeywordSetting(keyword_weight=0.5),
+        ),
+    )
+
+
+def _document(doc_id: str, text: str, **metadata) -> Document:
+    return Document(page_content=text, metadata={"doc_id": doc_id, "dataset_id": "dataset-id", **metadata})
+
+
+def test_keyword_score_reuses_segment_keywords(runner, monkeypatch):
+    handler = _KeywordTableHandler({"query": {"apple", "pie"}, "text b": {"pie", "crust"}})
+    monkeypatch.setattr(weight_rerank, "JiebaKeywordTableHandler", lambda: handler)
+    get_segments = MagicMock(return_value=({"a": DocumentSegment(index_node_id="a", keywords=["apple", "tree"])}, {}))
+    monkeypatch.setattr(weight_rerank.SegmentHydrator, "get_segments", get_segments)
+    documents = [_document("a", "text a"), _document("b", "text b"), _document("c", "text c")]
+    handler.keywords["text c"] = {"tree"}
+
+    scores = runner._calculate_keyword_score("query", documents)
+
+    get_segments.assert_called_once_with({"dataset-id": {"a", "b", "c"}}, {})
+    assert handler.extracted == ["query", "text b", "text c"]
+    assert documents[0].metadata["keywords"] == {"apple", "tree"}
+    # apple and pie appear in one document each, tree in two and crust in one
+    rare_idf = math.log(4 / 2) + 1
+    common_idf = math.log(4 / 3) + 1
+    query_norm = math.sqrt(2) * rare_idf
+    assert scores[0] == pytest.approx(rare_idf**2 / (math.hypot(rare_idf, common_idf) * query_norm))
+    assert scores[1] == pytest.approx(rare_idf**2 / (math.sqrt(2) * rare_idf * query_norm))
+    assert scores[2] == 0.0
+
+
+def test_keyword_score_without_query_keywords(runner, monkeypatch):
+    handler = _KeywordTableHandler({"query": set(), "text a": {"apple"}})
+    monkeypatch.setattr(weight_rerank, "JiebaKeywordTableHandler", lambda: handler)
+    monkeypatch.setattr(weight_rerank.SegmentHydrator, "get_segments", MagicMock(return_value=({}, {})))
+
+    assert runner._calculate_keyword_score("query", [_document("a", "text a")]) == [0.0]
+
+
+def test_cosine_scores_unscored_documents_in_batch(runner, monkeypatch):
+    model_manager = MagicMock()
+    monkeypatch.setattr(weight_rerank, "ModelManager", lambda: model_manager)
+    cache_embedding = MagicMock()
+    cache_embedding.embed_query.return_value = [1.0, 0.0]
+    monkeypatch.setattr(weight_rerank, "CacheEmbedding", MagicMock(return_value=cache_embedding))
+    documents = [
+        _document("a", "text a", score=0.3),
+        Document(page_content="text b", vector=[1.0, 1.0], metadata={"doc_id": "b"}),
+        Document(page_content="text c", vector=[0.0, 2.0], metadata={"doc_id": "c"}),
+    ]
+
+    scores = runner._calculate_cosine("tenant-id", "query", documents, runner.weights.vector_setting)
+
+    assert scores == pytest.approx([0.3, math.sqrt(2) / 2, 0.0])
+    cache_embedding.embed_query.assert_called_once_with("query")
+
+
+def test_cosine_skips_query_embedding_when_all_documents_are_scored(runner, monkeypatch):
+    model_manager = MagicMock()
+    monkeypatch.setattr(weight_rerank, "ModelManager", lambda: model_manager)
+
+    scores = runner._calculate_cosine(
+        "tenant-id", "query", [_document("a", "text a", score=0.7)], runner.weights.vector_setting
+    )
+
+    assert scores == [0.7]
+    model_manager.get_model_instance.assert_not_called()
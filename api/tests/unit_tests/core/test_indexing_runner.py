@@ -0,0 +1,99 @@
+import concurrent.futures
+import queue
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.indexing_runner import DocumentCheckpointMismatchError, DocumentIsPausedError, IndexingRunner
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+
+
+def _chunk(text: str) -> Document:
+    return Document(page_content=text, metadata={"doc_id": text, "doc_hash": f"hash-{text}"})
+
+
+@pytest.fixture
+def index_processor():
+    processor = MagicMock()
+    processor.transform.side_effect = lambda documents, **kwargs: [
+        _chunk(f"{document.page_content}-{i}") for document in documents for i in range(3)
+    ]
+    return processor
+
+
+@pytest.fixture
+def dataset():
+    return MagicMock(indexing_technique="economy", tenant_id="tenant_id")
+
+
+@pytest.fixture
+def batch_size(monkeypatch):
+    monkeypatch.setattr(dify_config, "INDEXING_PIPELINE_BATCH_SIZE", 4)
+
+
+def _text_docs():
+    return [Document(page_content="a"), Document(page_content="b")]
+
+
+def _split(index_processor, dataset, checkpoint_hashes=None):
+    batches = IndexingRunner()._split_to_batches(
+        index_processor, dataset, _text_docs(), "English", {"mode": "automatic"}, checkpoint_hashes
+    )
+    return [[document.page_content for document in batch] for batch in batches]
+
+
+def test_split_to_batches(index_processor, dataset, batch_size):
+    assert _split(index_processor, dataset) == [["a-0", "a-1", "a-2", "b-0"], ["b-1", "b-2"]]
+    # text documents are split one by one
+    assert index_processor.transform.call_count == 2
+
+
+def test_split_to_batches_skips_chunks_up_to_checkpoint(index_processor, dataset, batch_size):
+    assert _split(index_processor, dataset, ["hash-a-0", "hash-a-1", "hash-a-2", "hash-b-0"]) == [["b-1", "b-2"]]
+
+
+@pytest.mark.parametrize(
+    "checkpoint_hashes",
+    [
+        ["hash-a-0", "hash-changed"],
+        ["hash-a-0", "hash-a-1", "hash-a-2", "hash-b-0", "hash-b-1", "hash-b-2", "hash-c-0"],
+    ],
+)
+def test_split_to_batches_raises_on_checkpoint_mismatch(index_processor, dataset, batch_size, checkpoint_hashes):
+    with pytest.raises(DocumentCheckpointMismatchError):
+        _split(index_processor, dataset, checkpoint_hashes)
+
+
+@pytest.mark.parametrize(
+    ("doc_form", "parent_mode", "expected"),
+    [
+        (IndexType.PARAGRAPH_INDEX, None, True),
+        (IndexType.PARENT_CHILD_INDEX, "paragraph", True),
+        (IndexType.PARENT_CHILD_INDEX, "full-doc", False),
+        (IndexType.QA_INDEX, None, False),
+    ],
+)
+def test_is_pipelined(batch_size, doc_form, parent_mode, expected):
+    dataset_document = MagicMock(doc_form=doc_form)
+    process_rule = {"mode": "hierarchical", "rules": {"parent_mode": parent_mode}}
+
+    assert IndexingRunner._is_pipelined(dataset_document, process_rule) is expected
+
+
+def test_is_pipelined_disabled(monkeypatch):
+    monkeypatch.setattr(dify_config, "INDEXING_PIPELINE_BATCH_SIZE", 0)
+
+    assert not IndexingRunner._is_pipelined(MagicMock(doc_form=IndexType.PARAGRAPH_INDEX), {"mode": "automatic"})
+
+
+def test_put_batch_raises_loader_error():
+    batch_queue: queue.Queue = queue.Queue(maxsize=1)
+    batch_queue.put([_chunk("a")])
+    future: concurrent.futures.Future = concurrent.futures.Future()
+    future.set_exception(DocumentIsPausedError())
+
+    with pytest.raises(DocumentIsPausedError):
+        IndexingRunner._put_batch(batch_queue, [_chunk("b")], future)
+    assert batch_queue.qsize() == 1
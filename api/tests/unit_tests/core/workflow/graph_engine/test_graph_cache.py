@@ -0,0 +1,55 @@
+import pytest
+from pydantic import ValidationError
+
+from core.workflow.graph_engine import graph_cache
+from core.workflow.graph_engine.graph_cache import GraphCache
+
+GRAPH_CONFIG = {
+    "edges": [
+        {"id": "start-source-llm-target", "source": "start", "target": "llm"},
+        {"id": "llm-source-answer-target", "source": "llm", "target": "answer"},
+    ],
+    "nodes": [
+        {"data": {"type": "start"}, "id": "start"},
+        {"data": {"type": "llm"}, "id": "llm"},
+        {"data": {"type": "answer", "title": "answer", "answer": "{{#llm.text#}}"}, "id": "answer"},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    GraphCache.clear()
+    yield
+    GraphCache.clear()
+
+
+def test_get_shares_compiled_graph_per_hash_and_root_node():
+    graph = GraphCache.get(GRAPH_CONFIG, graph_hash="hash")
+
+    assert GraphCache.get(GRAPH_CONFIG, graph_hash="hash") is graph
+    assert GraphCache.get(GRAPH_CONFIG, graph_hash="other-hash") is not graph
+    assert GraphCache.get(GRAPH_CONFIG, root_node_id="start", graph_hash="hash") is not graph
+    assert graph.node_ids == ["start", "llm", "answer"]
+
+
+def test_get_hashes_graph_config_without_graph_hash():
+    graph = GraphCache.get(GRAPH_CONFIG)
+    edited_config = {**GRAPH_CONFIG, "nodes": [*GRAPH_CONFIG["nodes"][:2], {**GRAPH_CONFIG["nodes"][2], "id": "end"}]}
+    edited_config["edges"] = [GRAPH_CONFIG["edges"][0], {**GRAPH_CONFIG["edges"][1], "target": "end"}]
+
+    assert GraphCache.get({"nodes": GRAPH_CONFIG["nodes"], "edges": GRAPH_CONFIG["edges"]}) is graph
+    assert GraphCache.get(edited_config).node_ids == ["start", "llm", "end"]
+
+
+def test_get_without_cache(monkeypatch):
+    monkeypatch.setattr(graph_cache.dify_config, "WORKFLOW_GRAPH_CACHE_SIZE", 0)
+
+    assert GraphCache.get(GRAPH_CONFIG, graph_hash="hash") is not GraphCache.get(GRAPH_CONFIG, graph_hash="hash")
+
+
+def test_cached_graph_is_immutable():
+    graph = GraphCache.get(GRAPH_CONFIG, graph_hash="hash")
+
+    with pytest.raises(ValidationError):
+        graph.root_node_id = "llm"
@@ -1,8 +1,13 @@
+import subprocess
+import sys
 import time
 import uuid
+from typing import Optional
 from unittest.mock import patch
 
+from configs import dify_config
 from core.app.entities.app_invoke_entities import InvokeFrom
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.enums import SystemVariableKey
@@ -858,3 +863,183 @@ def test_iteration_run_error_handle():
             assert item.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
             assert item.run_result.outputs == {"output": []}
     assert count == 14
+
+
+def _run_code_node_iteration(code: str, items: list, code_node_data: Optional[dict] = None, **iteration_data):
+    graph_config = {
+        "edges": [
+            {"id": "start-source-iteration-1-target", "source": "start", "target": "iteration-1"},
+            {"id": "iteration-1-source-answer-target", "source": "iteration-1", "target": "answer"},
+        ],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {
+                "data": {
+                    "iterator_selector": ["pe", "list_output"],
+                    "output_selector": ["code", "result"],
+                    "output_type": "array[string]",
+                    "startNodeType": "code",
+                    "start_node_id": "code",
+                    "title": "iteration",
+                    "type": "iteration",
+                    **iteration_data,
+                },
+                "id": "iteration-1",
+            },
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "title": "code",
+                    "type": "code",
+                    "code_language": "python3",
+                    "code": code,
+                    "variables": [
+                        {"value_selector": ["iteration-1", "item"], "variable": "item"},
+                        {"value_selector": ["sys", "query"], "variable": "query"},
+                    ],
+                    "outputs": {"result": {"type": "string"}},
+                    **(code_node_data or {}),
+                },
+                "id": "code",
+            },
+            {"data": {"answer": "{{#iteration-1.output#}}", "title": "answer", "type": "answer"}, "id": "answer"},
+        ],
+    }
+
+    graph = Graph.init(graph_config=graph_config)
+
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.CHAT,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+
+    pool = VariablePool(
+        system_variables={
+            SystemVariableKey.QUERY: "dify",
+            SystemVariableKey.FILES: [],
+            SystemVariableKey.CONVERSATION_ID: "abababa",
+            SystemVariableKey.USER_ID: "1",
+        },
+        user_inputs={},
+        environment_variables=[],
+    )
+    pool.add(["pe", "list_output"], items)
+
+    iteration_node = IterationNode(
+        id=str(uuid.uuid4()),
+        graph_init_params=init_params,
+        graph=graph,
+        graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+        config=graph_config["nodes"][1],
+    )
+
+    sandbox_runs = []
+
+    def execute_code(language, preload, code):
+        sandbox_runs.append(code)
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if process.returncode != 0:
+            raise CodeExecutionError(process.stderr or "exit", stdout=process.stdout)
+        return process.stdout
+
+    with patch.object(CodeExecutor, "execute_code", side_effect=execute_code):
+        events = list(iteration_node._run())
+
+    return events, sandbox_runs
+
+
+def test_run_code_node_in_batch():
+    events, sandbox_runs = _run_code_node_iteration(
+        "def main(item: str, query: str) -> dict:\n    return {'result': f'{query} {item}'}\n",
+        ["a", "b", "c"],
+        error_handle_mode=ErrorHandleMode.CONTINUE_ON_ERROR,
+    )
+
+    assert len(sandbox_runs) == 1
+    assert isinstance(events[-1], RunCompletedEvent)
+    assert events[-1].run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert events[-1].run_result.outputs == {"output": ["dify a", "dify b", "dify c"]}
+
+
+def test_run_code_node_in_batches_as_the_iteration_goes(monkeypatch):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_BATCH_SIZE", 2)
+
+    events, sandbox_runs = _run_code_node_iteration(
+        "def main(item: str, query: str) -> dict:\n    return {'result': item}\n",
+        ["a", "b", "c", "d", "e"],
+        error_handle_mode=ErrorHandleMode.CONTINUE_ON_ERROR,
+    )
+
+    # one batch every two items, executed when the iteration reaches them
+    assert len(sandbox_runs) == 3
+    assert events[-1].run_result.outputs == {"output": ["a", "b", "c", "d", "e"]}
+
+
+def test_report_code_node_batch_errors():
+    # a batch run exiting as a whole fails the item it was running, the items after it are executed later
+    events, sandbox_runs = _run_code_node_iteration(
+        "def main(item: str, query: str) -> dict:\n    import os\n    os._exit(1)\n",
+        ["a", "b", "c"],
+        error_handle_mode=ErrorHandleMode.REMOVE_ABNORMAL_OUTPUT,
+    )
+
+    assert len(sandbox_runs) == 3
+    assert isinstance(events[-1], RunCompletedEvent)
+    assert events[-1].run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
+    assert events[-1].run_result.outputs == {"output": []}
+
+
+def test_execute_duplicate_items_in_batch_once_each():
+    events, sandbox_runs = _run_code_node_iteration(
+        "def main(item: str, query: str) -> dict:\n    import uuid\n    return {'result': str(uuid.uuid4())}\n",
+        ["a", "a", "a"],
+        error_handle_mode=ErrorHandleMode.CONTINUE_ON_ERROR,
+    )
+
+    assert len(sandbox_runs) == 1
+    assert isinstance(events[-1], RunCompletedEvent)
+    assert len(set(events[-1].run_result.outputs["output"])) == 3
+
+
+def test_retry_code_node_failed_in_batch(tmp_path):
+    # fails the first time it runs only
+    marker = tmp_path / "ran"
+    code = (
+        "def main(item: str, query: str) -> dict:\n"
+        "    import os\n"
+        f"    if not os.path.exists({str(marker)!r}):\n"
+        f"        open({str(marker)!r}, 'w').close()\n"
+        "        raise ValueError('first run')\n"
+        "    return {'result': item}\n"
+    )
+
+    events, sandbox_runs = _run_code_node_iteration(
+        code,
+        ["a", "b", "c"],
+        code_node_data={"retry_config": {"retry_enabled": True, "max_retries": 1, "retry_interval": 0}},
+        error_handle_mode=ErrorHandleMode.CONTINUE_ON_ERROR,
+    )
+
+    # the batch run, then the retry of the first item executes the code again
+    assert len(sandbox_runs) == 2
+    assert isinstance(events[-1], RunCompletedEvent)
+    assert events[-1].run_result.outputs == {"output": ["a", "b", "c"]}
+
+
+def test_run_code_node_without_batch():
+    code = "def main(item: str, query: str) -> dict:\n    return {'result': f'{query} {item}'}\n"
+
+    # iterations which terminate on errors, by default, or run in parallel run each item on its own
+    for iteration_data in ({}, {"is_parallel": True, "parallel_nums": 2}):
+        events, sandbox_runs = _run_code_node_iteration(code, ["a", "b", "c"], **iteration_data)
+
+        assert len(sandbox_runs) == 3
+        assert isinstance(events[-1], RunCompletedEvent)
+        assert events[-1].run_result.outputs == {"output": ["dify a", "dify b", "dify c"]}
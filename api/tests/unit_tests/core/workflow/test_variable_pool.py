@@ -44,3 +44,73 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_child_pool_reads_parent_and_keeps_own_writes(pool, file):
+    pool.add(("node_1", "text"), StringSegment(value="parent"))
+    pool.add(("node_1", "file_var"), FileSegment(value=file))
+    child = pool.create_child()
+
+    child.add(("node_2", "text"), StringSegment(value="child"))
+    child.add(("node_1", "text"), StringSegment(value="overridden"))
+
+    assert child.get(("node_1", "text")).value == "overridden"
+    assert child.get(("node_1", "file_var", "name")).value == file.filename
+    assert child.get(("node_2", "text")).value == "child"
+    assert pool.get(("node_1", "text")).value == "parent"
+    assert pool.get(("node_2", "text")) is None
+
+
+def test_child_pool_removals_hide_parent_variables(pool):
+    pool.add(("node_1", "a"), StringSegment(value="a"))
+    pool.add(("node_1", "b"), StringSegment(value="b"))
+    pool.add(("node_2", "a"), StringSegment(value="a"))
+    child = pool.create_child()
+
+    child.remove(("node_1", "a"))
+    child.remove(("node_2",))
+    child.add(("node_2", "c"), StringSegment(value="c"))
+
+    assert child.get(("node_1", "a")) is None
+    assert child.get(("node_1", "b")).value == "b"
+    assert child.get(("node_2", "a")) is None
+    assert child.get(("node_2", "c")).value == "c"
+    assert pool.get(("node_1", "a")).value == "a"
+    assert pool.get(("node_2", "a")).value == "a"
+
+    child.add(("node_1", "a"), StringSegment(value="again"))
+    assert child.get(("node_1", "a")).value == "again"
+
+
+def test_grandchild_pool_reads_through_all_layers(pool):
+    pool.add(("node_1", "a"), StringSegment(value="a"))
+    child = pool.create_child()
+    child.remove(("node_1", "a"))
+    grandchild = child.create_child()
+
+    assert grandchild.get(("node_1", "a")) is None
+
+    grandchild.add(("node_1", "a"), StringSegment(value="grandchild"))
+    assert grandchild.get(("node_1", "a")).value == "grandchild"
+    assert child.get(("node_1", "a")) is None
+
+
+def test_merge_into_parent_applies_writes_and_removals(pool):
+    pool.add(("node_1", "a"), StringSegment(value="a"))
+    pool.add(("node_2", "a"), StringSegment(value="a"))
+    pool.add(("node_3", "a"), StringSegment(value="a"))
+    child = pool.create_child()
+    child.remove(("node_1", "a"))
+    child.remove(("node_2",))
+    child.add(("node_2", "b"), StringSegment(value="b"))
+    child.add(("node_3", "a"), StringSegment(value="child"))
+
+    child.merge_into_parent()
+
+    assert pool.get(("node_1", "a")) is None
+    assert pool.get(("node_2", "a")) is None
+    assert pool.get(("node_2", "b")).value == "b"
+    assert pool.get(("node_3", "a")).value == "child"
+
+    with pytest.raises(ValueError):
+        pool.merge_into_parent()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import DateTime, String, create_engine, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from libs.infinite_scroll_pagination import paginate_by_keyset
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Row(_Base):
+    __tablename__ = "rows"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    group: Mapped[str] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    _Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        start = datetime(2026, 1, 1)
+        # rows sharing a creation time are told apart by their ids
+        session.add_all(
+            _Row(id=f"{i:02d}", group="a" if i % 3 else "b", created_at=start + timedelta(minutes=i // 2))
+            for i in range(10)
+        )
+        session.commit()
+        yield session
+
+
+def _paginate_all(session, stmt, limit, descending):
+    ids = []
+    last = None
+    while True:
+        pagination = paginate_by_keyset(
+            session,
+            stmt,
+            sort_column=_Row.created_at,
+            id_column=_Row.id,
+            limit=limit,
+            last=last,
+            descending=descending,
+        )
+        assert len(pagination.data) <= limit
+        ids.extend(row.id for row in pagination.data)
+        if not pagination.has_more:
+            return ids
+        last = pagination.data[-1]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10, 20])
+def test_paginate_by_keyset_descending(session, limit):
+    ids = _paginate_all(session, select(_Row), limit, descending=True)
+    assert ids == [f"{i:02d}" for i in reversed(range(10))]
+
+
+@pytest.mark.parametrize("limit", [1, 4])
+def test_paginate_by_keyset_ascending_with_filters(session, limit):
+    ids = _paginate_all(session, select(_Row).where(_Row.group == "a"), limit, descending=False)
+    assert ids == [f"{i:02d}" for i in range(10) if i % 3]
+
+
+def test_paginate_by_keyset_has_no_more_on_full_last_page(session):
+    pagination = paginate_by_keyset(session, select(_Row), sort_column=_Row.created_at, id_column=_Row.id, limit=10)
+    assert len(pagination.data) == 10
+    assert pagination.limit == 10
+    assert not pagination.has_more
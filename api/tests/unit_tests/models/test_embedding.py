@@ -0,0 +1,29 @@
+import pickle
+
+import numpy as np
+
+from models.dataset import Embedding
+
+
+def test_embedding_is_stored_as_float32_bytes():
+    vector = [0.1, -0.2, 0.3, 0.4]
+    embedding = Embedding()
+    embedding.set_embedding(vector)
+
+    assert embedding.embedding.startswith(Embedding.FLOAT32_PREFIX)
+    assert len(embedding.embedding) == len(Embedding.FLOAT32_PREFIX) + 4 * len(vector)
+    assert np.allclose(embedding.get_embedding(), vector)
+
+
+def test_legacy_pickled_embedding_is_still_readable():
+    vector = [0.1, -0.2, 0.3, 0.4]
+    embedding = Embedding()
+    embedding.embedding = pickle.dumps(vector, protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert embedding.get_embedding() == vector
+
+
+def test_decode_embedding_from_memoryview():
+    vector = [1.0, 0.5]
+
+    assert Embedding.decode_embedding(memoryview(Embedding.encode_embedding(vector))) == vector
@@ -0,0 +1,153 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+import pytz
+
+from models.model import AppDailyStatistic
+from services import app_statistic_service
+from services.app_statistic_service import AppStatisticService
+
+TIMEZONE = "Asia/Shanghai"
+
+
+def _local(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d %H:%M")
+
+
+def _utc(value: str) -> datetime:
+    return pytz.timezone(TIMEZONE).localize(_local(value)).astimezone(pytz.utc)
+
+
+def _statistic(day: date, message_count: int) -> AppDailyStatistic:
+    return AppDailyStatistic(app_id="app", timezone=TIMEZONE, date=day, message_count=message_count)
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    """
+    Days rolled up get one message, days computed from the messages get two
+    """
+    sources = SimpleNamespace(computed=[], read=[], scheduled=[], rolled_up_until=date.max)
+
+    def compute(app_id, timezone, start_utc, end_utc):
+        sources.computed.append((start_utc, end_utc))
+        if start_utc is None or (end_utc is not None and start_utc >= end_utc):
+            return {}
+        day = start_utc.astimezone(pytz.timezone(timezone)).date()
+        return {day: _statistic(day, 2)}
+
+    def get_rolled_up_statistics(app_id, timezone, first_day, last_day):
+        sources.read.append((first_day, last_day))
+        day = first_day or date(2024, 1, 1)
+        statistics = {}
+        while day < last_day:
+            statistics[day] = _statistic(day, 1)
+            day += timedelta(days=1)
+        return statistics
+
+    monkeypatch.setattr(
+        AppStatisticService, "_get_rolled_up_until", staticmethod(lambda app_id, timezone: sources.rolled_up_until)
+    )
+    monkeypatch.setattr(
+        AppStatisticService,
+        "_schedule_roll_up",
+        staticmethod(lambda app_id, timezone: sources.scheduled.append((app_id, timezone))),
+    )
+    monkeypatch.setattr(AppStatisticService, "_compute", staticmethod(compute))
+    monkeypatch.setattr(AppStatisticService, "_get_rolled_up_statistics", staticmethod(get_rolled_up_statistics))
+    return sources
+
+
+def _message_counts(statistics: list[AppDailyStatistic]) -> list[tuple[str, int]]:
+    return [(str(statistic.date), statistic.message_count) for statistic in statistics]
+
+
+def test_whole_days_are_read_from_rollups(sources):
+    statistics = AppStatisticService.get_daily_statistics(
+        "app", TIMEZONE, _local("2024-03-01 00:00"), _local("2024-03-04 00:00")
+    )
+
+    assert _message_counts(statistics) == [("2024-03-01", 1), ("2024-03-02", 1), ("2024-03-03", 1)]
+    assert sources.read == [(date(2024, 3, 1), date(2024, 3, 4))]
+    assert sources.computed == [(_utc("2024-03-04 00:00"), _utc("2024-03-04 00:00"))]
+
+
+def test_partial_days_are_computed(sources):
+    statistics = AppStatisticService.get_daily_statistics(
+        "app", TIMEZONE, _local("2024-03-01 12:00"), _local("2024-03-03 08:30")
+    )
+
+    assert _message_counts(statistics) == [("2024-03-01", 2), ("2024-03-02", 1), ("2024-03-03", 2)]
+    assert sources.read == [(date(2024, 3, 2), date(2024, 3, 3))]
+    assert sources.computed == [
+        (_utc("2024-03-01 12:00"), _utc("2024-03-02 00:00")),
+        (_utc("2024-03-03 00:00"), _utc("2024-03-03 08:30")),
+    ]
+
+
+def test_range_within_a_day_is_computed(sources):
+    statistics = AppStatisticService.get_daily_statistics(
+        "app", TIMEZONE, _local("2024-03-01 08:00"), _local("2024-03-01 20:00")
+    )
+
+    assert _message_counts(statistics) == [("2024-03-01", 2)]
+    assert not sources.read
+    assert sources.computed == [(_utc("2024-03-01 08:00"), _utc("2024-03-01 20:00"))]
+
+
+def test_current_day_is_computed(sources):
+    today = datetime.now(pytz.timezone(TIMEZONE)).date()
+    start = datetime.combine(today - timedelta(days=2), datetime.min.time())
+
+    statistics = AppStatisticService.get_daily_statistics("app", TIMEZONE, start)
+
+    assert _message_counts(statistics) == [
+        (str(today - timedelta(days=2)), 1),
+        (str(today - timedelta(days=1)), 1),
+        (str(today), 2),
+    ]
+    assert sources.read == [(today - timedelta(days=2), today)]
+    assert sources.computed[0][1] is None
+
+
+def test_days_not_rolled_up_are_computed(sources):
+    sources.rolled_up_until = date(2024, 3, 3)
+
+    statistics = AppStatisticService.get_daily_statistics(
+        "app", TIMEZONE, _local("2024-03-01 00:00"), _local("2024-03-05 00:00")
+    )
+
+    assert _message_counts(statistics) == [("2024-03-01", 1), ("2024-03-02", 1), ("2024-03-03", 2)]
+    assert sources.read == [(date(2024, 3, 1), date(2024, 3, 3))]
+    assert sources.computed == [(_utc("2024-03-03 00:00"), _utc("2024-03-05 00:00"))]
+    assert not sources.scheduled
+
+
+def test_rollup_is_scheduled_and_range_computed_before_first_rollup(sources):
+    sources.rolled_up_until = None
+
+    statistics = AppStatisticService.get_daily_statistics(
+        "app", TIMEZONE, _local("2024-03-01 00:00"), _local("2024-03-04 00:00")
+    )
+
+    assert _message_counts(statistics) == [("2024-03-01", 2)]
+    assert not sources.read
+    assert sources.computed == [(_utc("2024-03-01 00:00"), _utc("2024-03-04 00:00"))]
+    assert sources.scheduled == [("app", TIMEZONE)]
+
+
+def test_roll_up_leaves_the_days_to_the_running_rollup(monkeypatch):
+    redis = MagicMock()
+    redis.lock.return_value.acquire.return_value = False
+    monkeypatch.setattr(app_statistic_service, "redis_client", redis)
+    monkeypatch.setattr(AppStatisticService, "_get_rolled_up_until", staticmethod(lambda app_id, timezone: None))
+    compute = MagicMock()
+    monkeypatch.setattr(AppStatisticService, "_compute", staticmethod(compute))
+
+    AppStatisticService.roll_up("app", TIMEZONE)
+
+    assert redis.lock.call_args.kwargs["blocking_timeout"] == app_statistic_service.ROLLUP_LOCK_BLOCKING_TIMEOUT
+    compute.assert_not_called()
+    redis.lock.return_value.release.assert_not_called()